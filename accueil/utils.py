@@ -1,7 +1,7 @@
-from django.core.cache import cache
 from typing import List, Dict
 
 from epreuve.models import Epreuve
+from olympiadesnsi.calcul_unique import obtenir_ou_calculer
 
 
 def get_epreuves_publiques_info() -> List[Dict[str, object]]:
@@ -13,16 +13,14 @@ def get_epreuves_publiques_info() -> List[Dict[str, object]]:
         List[dict]: Liste de dictionnaires {nom, nombre_participants}
     """
     cache_key = "liste_epreuves_publiques_info"
-    donnees = cache.get(cache_key)
 
-    if donnees is None:
-        donnees = [
+    def calculer_donnees() -> List[Dict[str, object]]:
+        return [
             {
                 "nom": e.nom,
                 "nombre_participants": e.compte_participants_inscrits()
             }
             for e in Epreuve.liste_epreuves_publiques()
         ]
-        cache.set(cache_key, donnees, timeout=86400)  # 24 heures
 
-    return donnees
+    return obtenir_ou_calculer(cache_key, calculer_donnees, timeout=86400)  # 24 heures
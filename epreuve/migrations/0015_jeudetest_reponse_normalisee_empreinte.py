@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+from epreuve.utils import empreinte_reponse, forme_canonique_reponse
+
+TAILLE_LOT = 1000
+
+
+def calculer_empreintes(apps, schema_editor):
+    """
+    Calcule l'empreinte de la forme canonique des jeux de test existants, par lots.
+    """
+    JeuDeTest = apps.get_model("epreuve", "JeuDeTest")
+    lot = []
+    for jeu in JeuDeTest.objects.only("id", "reponse").iterator(chunk_size=TAILLE_LOT):
+        jeu.empreinte = empreinte_reponse(forme_canonique_reponse(jeu.reponse))
+        lot.append(jeu)
+        if len(lot) >= TAILLE_LOT:
+            JeuDeTest.objects.bulk_update(lot, ["empreinte"])
+            lot = []
+    if lot:
+        JeuDeTest.objects.bulk_update(lot, ["empreinte"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("epreuve", "0014_alter_exercice_code_a_soumettre_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jeudetest",
+            name="empreinte",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.RunPython(calculer_empreintes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Les valeurs des épreuves existantes sont calculées par la commande `reconstruire_scores`.
+    """
+    dependencies = [
+        ("epreuve", "0015_jeudetest_reponse_normalisee_empreinte"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userexercice",
+            name="reponse_correcte",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="userepreuve",
+            name="nb_bonnes_reponses",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('epreuve', '0016_userexercice_reponse_correcte_userepreuve_nb_bonnes_reponses'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TacheExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_export', models.CharField(choices=[('rendus_exercice', 'Rendus par exercice'), ('rendus_participant', 'Rendus par participant'), ('epreuve_json', 'Épreuve au format JSON')], max_length=32)),
+                ('version_donnees', models.CharField(max_length=64)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('terminee', 'Terminée'), ('echec', 'Échec')], default='en_attente', max_length=16)),
+                ('progression', models.PositiveSmallIntegerField(default=0, help_text='Avancement, en pourcentage.')),
+                ('fichier', models.CharField(blank=True, default='', max_length=255)),
+                ('taille', models.BigIntegerField(default=0)),
+                ('erreur', models.TextField(blank=True, default='')),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_debut', models.DateTimeField(blank=True, null=True)),
+                ('date_fin', models.DateTimeField(blank=True, null=True)),
+                ('date_dernier_acces', models.DateTimeField(blank=True, null=True)),
+                ('demandeur', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='taches_export', to=settings.AUTH_USER_MODEL)),
+                ('epreuve', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='taches_export', to='epreuve.epreuve')),
+            ],
+            options={
+                'db_table': 'TacheExport',
+                'indexes': [models.Index(fields=['statut', 'date_creation'], name='TacheExport_statut_58f170_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('statut', 'echec'), _negated=True), fields=('epreuve', 'type_export', 'version_donnees'), name='tache_export_unique_par_version')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('epreuve', '0017_tacheexport'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tacheexport',
+            name='type_export',
+            field=models.CharField(choices=[('rendus_exercice', 'Rendus par exercice'), ('rendus_participant', 'Rendus par participant'), ('epreuve_json', 'Épreuve au format JSON'), ('resultats_ndjson', 'Résultats au format NDJSON'), ('resultats_parquet', 'Résultats au format Parquet')], max_length=32),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('epreuve', '0018_tacheexport_resultats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tacheexport',
+            name='date_activite',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
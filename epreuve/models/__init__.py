@@ -3,6 +3,7 @@ from .exercice import Exercice
 from .userepreuve import UserEpreuve
 from .userexercice import UserExercice
 from .jeudetest import JeuDeTest
+from .tacheexport import TacheExport
 
 __all__ = [
     "Epreuve",
@@ -11,4 +12,5 @@ __all__ = [
     "UserEpreuve",
     "UserExercice",
     "JeuDeTest",
+    "TacheExport",
 ]
\ No newline at end of file
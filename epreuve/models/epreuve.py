@@ -1,25 +1,25 @@
 from typing import List, Iterable, Optional, Set, TYPE_CHECKING, Union
 from django.core.cache import cache
-from django.apps import apps
 from django.db import models, transaction
 from django.utils import timezone
 from django.utils.text import slugify
 from django.contrib.auth.models import User
 from django.db.models import CheckConstraint, Q, F, QuerySet
-from epreuve.utils import get_cache_key_liste_epreuves_publiques
+from epreuve.services.attribution_jeux import attribuer_jeux_de_test, inscrire_participants_epreuve
+from epreuve.services import desinscription
+from epreuve.utils import (
+    get_cache_key_liste_epreuves_publiques,
+    get_cache_key_nombre_participants,
+    invalider_contenu_exercices,
+    invalider_donnees_export,
+)
 from inscription.models import GroupeParticipeAEpreuve, InscriptionDomaine
 from intranet.models import GroupeParticipant
+from olympiadesnsi.calcul_unique import obtenir_ou_calculer
 from olympiadesnsi.constants import MAX_TAILLE_NOM
 from olympiadesnsi.utils import encode_id
 if TYPE_CHECKING:
-    from epreuve.models import Exercice, JeuDeTest
-
-
-def _modeles_runtime_epreuve() -> tuple[type[models.Model], type[models.Model], type[models.Model]]:
-    modele_user_epreuve = apps.get_model("epreuve", "UserEpreuve")
-    modele_user_exercice = apps.get_model("epreuve", "UserExercice")
-    modele_jeu_de_test = apps.get_model("epreuve", "JeuDeTest")
-    return modele_user_epreuve, modele_user_exercice, modele_jeu_de_test
+    from epreuve.models import Exercice
 
 
 class Epreuve(models.Model):
@@ -73,55 +73,31 @@ class Epreuve(models.Model):
         return self.exercices.all()
 
     # Dans la classe Epreuve :
-    def assigner_jeux_tests_exercices(self) -> None:
+    def assigner_jeux_tests_exercices(self) -> int:
         """
-        Attribue un jeu de test à chaque UserExercice pour tous les exercices de l’épreuve.
+        Attribue un jeu de test à chaque UserExercice pour tous les exercices de l’épreuve,
+        en une seule requête (voir epreuve.services.attribution_jeux).
 
         Ne fait l’attribution que pour les exercices configurés avec un jeu de test.
+
+        Returns:
+            int: Le nombre de UserExercice qui ont reçu un jeu de test.
         """
-        for exercice in self.get_exercices():
-            exercice.assigner_jeux_de_test()
+        return attribuer_jeux_de_test(self.id)
 
     def inscrire_participants(self, participants: Iterable[User]) -> None:
-        modele_user_epreuve, modele_user_exercice, _ = _modeles_runtime_epreuve()
+        """
+        Inscrit des participants à l’épreuve et à tous ses exercices, puis leur attribue un
+        jeu de test. Le nombre de requêtes ne dépend ni du nombre de participants ni du
+        nombre d’exercices ; les inscriptions existantes sont conservées.
 
+        Args:
+            participants (Iterable[User]): Les participants à inscrire.
+        """
         participants_liste: list[User] = list(participants)
-        exercices: List["Exercice"] = list(self.get_exercices())
-
-        user_epreuves_a_creer: list[models.Model] = []
-        user_exercices_a_creer: list[models.Model] = []
 
         with transaction.atomic():
-            for user in participants_liste:
-                user_epreuves_a_creer.append(modele_user_epreuve(participant=user, epreuve=self))
-                for exercice in exercices:
-                    user_exercices_a_creer.append(modele_user_exercice(participant=user, exercice=exercice))
-
-            modele_user_epreuve.objects.bulk_create(user_epreuves_a_creer, ignore_conflicts=True)
-            modele_user_exercice.objects.bulk_create(user_exercices_a_creer, ignore_conflicts=True)
-
-            for exercice in exercices:
-                if not exercice.avec_jeu_de_test:
-                    continue
-
-                jeux: List["JeuDeTest"] = list(exercice.get_jeux_de_test())
-                if not jeux:
-                    continue
-
-                user_exercices = modele_user_exercice.objects.filter(exercice=exercice,
-                                                                     participant__in=participants_liste)
-                user_exercices_a_mettre_a_jour: list[models.Model] = []
-
-                i: int = 0
-                for ue in user_exercices:
-                    if getattr(ue, "jeu_de_test_id", None):
-                        continue
-                    ue.jeu_de_test = jeux[i % len(jeux)]
-                    i += 1
-                    user_exercices_a_mettre_a_jour.append(ue)
-
-                modele_user_exercice.objects.bulk_update(user_exercices_a_mettre_a_jour, ["jeu_de_test"])
-
+            inscrire_participants_epreuve(self.id, [user.id for user in participants_liste])
             self._maj_cache_nb_participants_epreuve(len(participants_liste))
 
     def inscrire_groupe(self, groupe: GroupeParticipant) -> None:
@@ -164,20 +140,17 @@ class Epreuve(models.Model):
         Returns:
             int: Le nombre total de participants inscrits.
         """
-        cache_key: str = f"epreuve_{self.id}_nombre_participants"
+        cache_key: str = get_cache_key_nombre_participants(self.id)
 
-        cached: Optional[int] = cache.get(cache_key)
-        if cached is not None:
-            return cached
-
-        total: int = (
-                self.groupes_participants.annotate(nb=models.Count("membres"))
-                .aggregate(total=models.Sum("nb"))
-                .get("total") or 0
-        )
+        def calculer_total() -> int:
+            return (
+                    self.groupes_participants.annotate(nb=models.Count("membres"))
+                    .aggregate(total=models.Sum("nb"))
+                    .get("total") or 0
+            )
 
-        cache.set(cache_key, total, timeout=None)  # Pas d’expiration automatique
-        return total
+        # Pas d’expiration automatique : la clé est invalidée par les signaux
+        return obtenir_ou_calculer(cache_key, calculer_total, timeout=None)
 
     def a_pour_membre_comite(self, user: User) -> bool:
         """
@@ -207,30 +180,13 @@ class Epreuve(models.Model):
     def desinscrire_groupe(self, groupe: GroupeParticipant) -> None:
         """
         Désinscrit tous les membres d’un groupe de cette épreuve.
-        Cela supprime :
+        Cela supprime, par lots de participants (voir epreuve.services.desinscription) :
           - les UserExercice liés
           - les UserEpreuve correspondants
-          - le lien dans GroupeParticipeAEpreuve
-        Et met à jour le cache du nombre de participants.
+          - le lien dans GroupeParticipeAEpreuve, en dernier
+        Le cache du nombre de participants est invalidé une seule fois, par la suppression du lien.
         """
-        modele_user_epreuve, modele_user_exercice, _ = _modeles_runtime_epreuve()
-
-        participants: QuerySet[User] = groupe.participants()
-
-        user_epreuves = modele_user_epreuve.objects.filter(epreuve=self, participant__in=participants)
-
-        exercice_ids = list(self.exercices.values_list("id", flat=True))
-
-        modele_user_exercice.objects.filter(
-            exercice_id__in=exercice_ids,
-            participant__in=user_epreuves.values_list("participant", flat=True),
-        ).delete()
-
-        user_epreuves.delete()
-
-        GroupeParticipeAEpreuve.objects.filter(epreuve=self, groupe=groupe).delete()
-
-        self._maj_cache_nb_participants_epreuve(-groupe.get_nombre_participants())
+        desinscription.desinscrire_groupe(self.id, groupe.id)
 
     def lister_annales(self) -> List["Epreuve"]:
         """
@@ -256,7 +212,7 @@ class Epreuve(models.Model):
             delta (int): Le nombre de participants à ajouter ou retirer du total.
                          Peut être négatif.
         """
-        cache_key: str = f"epreuve_{self.id}_nombre_participants"
+        cache_key: str = get_cache_key_nombre_participants(self.id)
         valeur_cachee: int = cache.get(cache_key)
 
         if valeur_cachee is not None:
@@ -283,21 +239,40 @@ class Epreuve(models.Model):
         Returns:
             Un nom unique pour ce référent.
         """
-        base: str = f"copie de {nom_source}"
+        return cls.generer_nom_disponible(f"copie de {nom_source}", referent)
+
+    @classmethod
+    def generer_nom_disponible(cls, base: str, referent: Union[User, int]) -> str:
+        """
+        Renvoie le premier nom libre pour ce référent parmi "<base>", "<base> (2)", "<base> (3)", etc.
+        `base` est tronquée au besoin pour que le nom tienne dans `MAX_TAILLE_NOM` caractères.
+
+        Args:
+            base: Nom souhaité (ex: "copie de Olympiades NSI 2025").
+            referent: Objet User ou id du référent.
+
+        Returns:
+            Un nom unique pour ce référent.
+        """
+        base = base[:MAX_TAILLE_NOM]
+        # Début commun à tous les candidats, même tronqués pour laisser la place au suffixe
+        racine: str = base[:MAX_TAILLE_NOM - len(" (99999)")]
 
         # On accepte User ou id, pour être pratique selon le contexte appelant.
         filtre_referent = {"referent": referent} if isinstance(referent, User) else {"referent_id": referent}
 
-        # Cas le plus fréquent : aucune copie existante.
-        if not cls.objects.filter(nom=base, **filtre_referent).exists():
+        # Une seule requête : tous les noms candidats déjà pris, puis le premier libre.
+        pris: Set[str] = set(
+            cls.objects.filter(nom__startswith=racine, **filtre_referent).values_list("nom", flat=True)
+        )
+        if base not in pris:
             return base
-
-        # Sinon, on numérote.
         i: int = 2
         while True:
-            candidat: str = f"{base} ({i})"
-            if not cls.objects.filter(nom=candidat, **filtre_referent).exists():
-                return candidat
+            suffixe: str = f" ({i})"
+            nom: str = f"{base[:MAX_TAILLE_NOM - len(suffixe)]}{suffixe}"
+            if nom not in pris:
+                return nom
             i += 1
 
     def __str__(self):
@@ -388,6 +363,11 @@ class Epreuve(models.Model):
             # Mise à jour directe en base (pas de chargement d'objets).
             modele_exercice.objects.filter(id=exercice_id, epreuve=self).update(numero=index)
 
+        # `update()` ne déclenche pas les signaux : le contenu affiché aux participants et les exports
+        # sont invalidés ici.
+        invalider_contenu_exercices(self.id)
+        invalider_donnees_export(self.id)
+
     class Meta:
         db_table = 'Epreuve'
         unique_together = ['nom', 'referent']
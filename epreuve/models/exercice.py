@@ -1,14 +1,11 @@
-import random
-from typing import List
-
 from django.db import models
 from django.contrib.auth.models import User
 from django.db.models import QuerySet
 
 from epreuve.models.epreuve import Epreuve
 from epreuve.models.jeudetest import JeuDeTest
-from epreuve.models.userepreuve import UserEpreuve
-from epreuve.models.userexercice import UserExercice
+from epreuve.services.attribution_jeux import attribuer_jeux_de_test, inscrire_participants_exercice
+from epreuve.utils import invalider_donnees_export
 from olympiadesnsi.constants import MAX_TAILLE_NOM
 from olympiadesnsi.utils import encode_id
 
@@ -71,42 +68,34 @@ class Exercice(models.Model):
             return self.separateur_reponse_jeudetest
         return '\n'
 
-    def inscrire_utilisateurs_de_epreuve(self):
+    def inscrire_utilisateurs_de_epreuve(self) -> int:
         """
         Pour tous les UserEpreuve associés à l’épreuve de cet exercice,
-        crée un UserExercice si besoin pour ce participant et cet exercice.
-        """
-        user_epreuves: QuerySet[UserEpreuve] = UserEpreuve.objects.filter(epreuve=self.epreuve)
+        crée un UserExercice si besoin pour ce participant et cet exercice,
+        avec un jeu de test attribué si l’exercice en a.
+
+        Le nombre de requêtes ne dépend pas du nombre de participants
+        (voir epreuve.services.attribution_jeux).
 
-        for ue in user_epreuves:
-            UserExercice.objects.get_or_create(
-                exercice=self,
-                participant=ue.participant
-            )
+        Returns:
+            int: Le nombre de UserExercice créés.
+        """
+        return inscrire_participants_exercice(self.epreuve_id, self.id, self.avec_jeu_de_test)
 
-    def assigner_jeux_de_test(self) -> None:
+    def assigner_jeux_de_test(self) -> int:
         """
         Attribue un jeu de test à chaque UserExercice associé à cet exercice.
 
-        Les jeux de test sont attribués de manière cyclique et aléatoire.
+        Les jeux de test sont attribués de manière cyclique et aléatoire, en une requête
+        (voir epreuve.services.attribution_jeux).
         Si un UserExercice a déjà un jeu de test attribué, il est ignoré.
+
+        Returns:
+            int: Le nombre de UserExercice qui ont reçu un jeu de test.
         """
         if not self.avec_jeu_de_test:
-            return
-        jeux_disponibles: List[JeuDeTest] = list(self.get_jeux_de_test())
-        if not jeux_disponibles:
-            return
-
-        random.shuffle(jeux_disponibles)
-        nb_jeux: int = len(jeux_disponibles)
-
-        user_exercices: QuerySet[UserExercice] = self.user_exercices.all()
-
-        for i, ue in enumerate(user_exercices):
-            if ue.jeu_de_test:
-                continue
-            ue.jeu_de_test = jeux_disponibles[i % nb_jeux]
-            ue.save()
+            return 0
+        return attribuer_jeux_de_test(self.epreuve_id, exercice_id=self.id)
 
     def pick_jeu_de_test(self) -> 'JeuDeTest':
         """
@@ -132,6 +121,7 @@ class Exercice(models.Model):
         puis réinitialise les séparateurs à leur valeur par défaut.
         """
         self.jeux_de_test.all().delete()
+        invalider_donnees_export(self.epreuve_id)
         self.separateur_reponse_jeudetest = "\n"
         self.separateur_jeu_test = "\n"
         self.save(update_fields=["separateur_reponse_jeudetest", "separateur_jeu_test"])
@@ -1,5 +1,12 @@
 from django.db import models
 
+from epreuve.utils import (
+    empreinte_reponse,
+    est_valide_reponse_empreinte,
+    est_valide_reponse_jeu_de_test,
+    forme_canonique_reponse,
+)
+
 
 class JeuDeTest(models.Model):
     exercice = models.ForeignKey(
@@ -9,9 +16,40 @@ class JeuDeTest(models.Model):
     )
     instance = models.TextField(null=False)
     reponse = models.TextField(null=False)
+    # Empreinte de la forme canonique de `reponse`, calculée une fois pour toutes à l'enregistrement
+    empreinte = models.CharField(max_length=64, null=False, blank=True, default="")
 
     class Meta:
         db_table = 'JeuDeTest'
         indexes = [
             models.Index(fields=['exercice'])
         ]
+
+    def calculer_empreinte(self) -> None:
+        """
+        Met à jour `empreinte` à partir de `reponse`.
+        À appeler avant un `bulk_create`, qui ne passe pas par `save()`.
+        """
+        self.empreinte = empreinte_reponse(forme_canonique_reponse(self.reponse))
+
+    def save(self, *args, **kwargs):
+        self.calculer_empreinte()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'reponse' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'empreinte'}
+        super().save(*args, **kwargs)
+
+    def est_reponse_valide(self, reponse_soumise: str) -> bool:
+        """
+        Indique si la réponse soumise correspond à la réponse attendue de ce jeu de test.
+
+        Args:
+            reponse_soumise (str): La réponse du participant.
+
+        Returns:
+            bool: True si la réponse est correcte.
+        """
+        if not self.empreinte:
+            # Ligne pas encore recalculée : comparaison complète
+            return est_valide_reponse_jeu_de_test(reponse_soumise, self.reponse)
+        return est_valide_reponse_empreinte(reponse_soumise, self.empreinte)
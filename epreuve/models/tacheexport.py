@@ -0,0 +1,102 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models import Q
+
+
+class TacheExport(models.Model):
+    """
+    Demande d'export d'une épreuve, construite par le worker `traiter_exports` (ou dans la
+    requête si `EXPORTS_ASYNCHRONES` est désactivé). Une tâche terminée référence son
+    artefact sur disque, réutilisé tant que la version des données de l'épreuve ne change pas.
+    """
+    RENDUS_EXERCICE = 'rendus_exercice'
+    RENDUS_PARTICIPANT = 'rendus_participant'
+    EPREUVE_JSON = 'epreuve_json'
+    RESULTATS_NDJSON = 'resultats_ndjson'
+    RESULTATS_PARQUET = 'resultats_parquet'
+    TYPES = [
+        (RENDUS_EXERCICE, 'Rendus par exercice'),
+        (RENDUS_PARTICIPANT, 'Rendus par participant'),
+        (EPREUVE_JSON, 'Épreuve au format JSON'),
+        (RESULTATS_NDJSON, 'Résultats au format NDJSON'),
+        (RESULTATS_PARQUET, 'Résultats au format Parquet'),
+    ]
+    # Extension et type MIME de l'artefact de chaque type d'export
+    FORMATS = {
+        RENDUS_EXERCICE: ('zip', 'application/zip'),
+        RENDUS_PARTICIPANT: ('zip', 'application/zip'),
+        EPREUVE_JSON: ('zip', 'application/zip'),
+        RESULTATS_NDJSON: ('ndjson', 'application/x-ndjson'),
+        RESULTATS_PARQUET: ('parquet', 'application/vnd.apache.parquet'),
+    }
+
+    EN_ATTENTE = 'en_attente'
+    EN_COURS = 'en_cours'
+    TERMINEE = 'terminee'
+    ECHEC = 'echec'
+    STATUTS = [
+        (EN_ATTENTE, 'En attente'),
+        (EN_COURS, 'En cours'),
+        (TERMINEE, 'Terminée'),
+        (ECHEC, 'Échec'),
+    ]
+
+    epreuve = models.ForeignKey('Epreuve', related_name='taches_export', on_delete=models.CASCADE)
+    type_export = models.CharField(max_length=32, choices=TYPES)
+    # Version des données de l'épreuve au moment de la demande (voir epreuve.services.exports)
+    version_donnees = models.CharField(max_length=64)
+    statut = models.CharField(max_length=16, choices=STATUTS, default=EN_ATTENTE)
+    progression = models.PositiveSmallIntegerField(default=0, help_text="Avancement, en pourcentage.")
+    demandeur = models.ForeignKey(User, related_name='taches_export', null=True, blank=True,
+                                  on_delete=models.SET_NULL)
+    # Chemin de l'artefact, relatif à EXPORTS_CHEMIN
+    fichier = models.CharField(max_length=255, blank=True, default="")
+    taille = models.BigIntegerField(default=0)
+    erreur = models.TextField(blank=True, default="")
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_debut = models.DateTimeField(null=True, blank=True)
+    # Dernier signe de vie de la construction (réservation, puis chaque enregistrement de la progression)
+    date_activite = models.DateTimeField(null=True, blank=True)
+    date_fin = models.DateTimeField(null=True, blank=True)
+    # Dernier téléchargement : les artefacts les moins récemment utilisés sont évincés en premier
+    date_dernier_acces = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'TacheExport'
+        indexes = [
+            models.Index(fields=['statut', 'date_creation']),
+        ]
+        constraints = [
+            # Une seule tâche vivante par (épreuve, type, version) : les clics répétés la retrouvent
+            models.UniqueConstraint(
+                fields=['epreuve', 'type_export', 'version_donnees'],
+                condition=~Q(statut='echec'),
+                name='tache_export_unique_par_version',
+            ),
+        ]
+
+    def est_terminee(self) -> bool:
+        return self.statut == self.TERMINEE
+
+    def extension(self) -> str:
+        return self.FORMATS[self.type_export][0]
+
+    def type_mime(self) -> str:
+        return self.FORMATS[self.type_export][1]
+
+    def chemin_fichier(self) -> str:
+        """
+        Renvoie le chemin absolu de l'artefact ('' si la tâche n'en a pas).
+        """
+        return os.path.join(settings.EXPORTS_CHEMIN, self.fichier) if self.fichier else ""
+
+    def supprimer_fichier(self) -> None:
+        """
+        Efface l'artefact du disque, s'il existe encore.
+        """
+        chemin: str = self.chemin_fichier()
+        if chemin and os.path.exists(chemin):
+            os.remove(chemin)
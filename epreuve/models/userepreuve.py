@@ -14,6 +14,8 @@ class UserEpreuve(models.Model):
     debut_epreuve = models.DateTimeField(auto_now=False, null=True)
     anonymat = models.CharField(max_length=255, blank=True, null=True,
                                 help_text="Stocke les numéros d'anonymat des 3 participants séparés par '|'.")
+    # Nombre de UserExercice de l'épreuve dont `reponse_correcte` est vrai (voir epreuve.services.scores)
+    nb_bonnes_reponses = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = 'UserEpreuve'
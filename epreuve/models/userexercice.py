@@ -10,6 +10,8 @@ class UserExercice(models.Model):
     solution_instance_participant = models.TextField(null=True)
     code_participant = models.TextField(null=True)
     nb_soumissions = models.IntegerField(default=0)
+    # Dernière réponse soumise correcte pour le jeu de test attribué (voir epreuve.services.scores)
+    reponse_correcte = models.BooleanField(default=False)
 
     class Meta:
         db_table = 'User_Exercice'
@@ -0,0 +1,169 @@
+"""
+Attribution des jeux de test aux participants, en une requête ensembliste.
+
+Pour chaque exercice concerné, les jeux de test sont mélangés (`ORDER BY random()`) et
+numérotés, les UserExercice sans jeu sont numérotés de leur côté, et le UserExercice de rang
+`r` reçoit le jeu de rang `r % nb_jeux` : c'est la répartition cyclique et aléatoire que
+faisait `Exercice.assigner_jeux_de_test` ligne par ligne, en un seul `UPDATE ... FROM`
+quel que soit le nombre de participants et d'exercices.
+
+Les inscriptions suivent le même principe : un `INSERT ... SELECT` crée les UserEpreuve et
+UserExercice manquants (pour une liste de participants, ou pour un exercice ajouté à une
+épreuve qui a déjà des participants), puis l'attribution ci-dessus leur donne un jeu de test.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+from django.db import connection
+
+from epreuve.utils import invalider_donnees_export
+
+# Nombre de UserExercice insérés à partir duquel la table est analysée avant l'attribution
+SEUIL_ANALYSE: int = 5000
+
+_SQL_ATTRIBUTION_JEUX: str = """
+WITH jeux AS (
+    SELECT j.id, j.exercice_id,
+           row_number() OVER (PARTITION BY j.exercice_id ORDER BY random()) - 1 AS rang,
+           count(*) OVER (PARTITION BY j.exercice_id) AS nb
+    FROM "JeuDeTest" j
+    JOIN "Exercice" e ON e.id = j.exercice_id
+    WHERE e.epreuve_id = %(epreuve_id)s AND e.avec_jeu_de_test
+      AND (%(exercice_id)s IS NULL OR e.id = %(exercice_id)s)
+), cibles AS (
+    SELECT ue.id, ue.exercice_id,
+           row_number() OVER (PARTITION BY ue.exercice_id ORDER BY ue.id) - 1 AS rang
+    FROM "User_Exercice" ue
+    JOIN "Exercice" e ON e.id = ue.exercice_id
+    WHERE e.epreuve_id = %(epreuve_id)s AND e.avec_jeu_de_test AND ue.jeu_de_test_id IS NULL
+      AND (%(exercice_id)s IS NULL OR e.id = %(exercice_id)s)
+)
+UPDATE "User_Exercice" ue
+SET jeu_de_test_id = jeux.id
+FROM cibles
+JOIN jeux ON jeux.exercice_id = cibles.exercice_id AND jeux.rang = cibles.rang %% jeux.nb
+WHERE ue.id = cibles.id
+"""
+
+_SQL_INSCRIPTION_EXERCICE: str = """
+INSERT INTO "User_Exercice" (participant_id, exercice_id, nb_soumissions, reponse_correcte)
+SELECT uep.participant_id, %(exercice_id)s, 0, false
+FROM "UserEpreuve" uep
+WHERE uep.epreuve_id = %(epreuve_id)s
+ON CONFLICT (participant_id, exercice_id) DO NOTHING
+"""
+
+_SQL_INSCRIPTION_EPREUVE: str = """
+INSERT INTO "UserEpreuve" (participant_id, epreuve_id, nb_bonnes_reponses)
+SELECT p.id, %(epreuve_id)s, 0
+FROM unnest(%(participants)s::integer[]) AS p(id)
+ON CONFLICT (participant_id, epreuve_id) DO NOTHING
+"""
+
+_SQL_INSCRIPTION_EXERCICES: str = """
+INSERT INTO "User_Exercice" (participant_id, exercice_id, nb_soumissions, reponse_correcte)
+SELECT p.id, e.id, 0, false
+FROM unnest(%(participants)s::integer[]) AS p(id)
+CROSS JOIN "Exercice" e
+WHERE e.epreuve_id = %(epreuve_id)s
+ON CONFLICT (participant_id, exercice_id) DO NOTHING
+"""
+
+
+@dataclass(frozen=True)
+class ResultatInscription:
+    """
+    Bilan de l'inscription d'une liste de participants à une épreuve.
+    """
+    nb_inscrits: int
+    nb_user_exercices_crees: int
+    nb_jeux_attribues: int
+
+
+def _analyser_si_volumineux(nb_inseres: int) -> None:
+    # Sans statistiques à jour sur les lignes tout juste insérées (même transaction), le
+    # planificateur estime `cibles` à une ligne et choisit une boucle imbriquée quadratique
+    if nb_inseres >= SEUIL_ANALYSE:
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE "User_Exercice"')
+
+
+def attribuer_jeux_de_test(epreuve_id: int, exercice_id: Optional[int] = None) -> int:
+    """
+    Attribue un jeu de test à chaque UserExercice qui n'en a pas encore, pour les exercices
+    de l'épreuve configurés avec des jeux de test (ou pour un seul d'entre eux).
+
+    Les attributions existantes ne sont jamais modifiées ; un exercice sans jeu de test
+    laisse ses UserExercice sans jeu.
+
+    Args:
+        epreuve_id (int): L'épreuve concernée.
+        exercice_id (Optional[int]): Limite l'attribution à cet exercice de l'épreuve.
+
+    Returns:
+        int: Le nombre de UserExercice qui ont reçu un jeu de test.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_SQL_ATTRIBUTION_JEUX, {"epreuve_id": epreuve_id, "exercice_id": exercice_id})
+        nb_attribues: int = cursor.rowcount
+
+    if nb_attribues:
+        # Le jeu attribué figure dans les exports des rendus
+        invalider_donnees_export(epreuve_id)
+    return nb_attribues
+
+
+def inscrire_participants_exercice(epreuve_id: int, exercice_id: int, avec_jeu_de_test: bool) -> int:
+    """
+    Crée le UserExercice de chaque participant de l'épreuve qui n'en a pas encore pour cet
+    exercice, et lui attribue un jeu de test si l'exercice en a.
+
+    Args:
+        epreuve_id (int): L'épreuve de l'exercice.
+        exercice_id (int): L'exercice à ouvrir aux participants.
+        avec_jeu_de_test (bool): Si l'exercice est configuré avec des jeux de test.
+
+    Returns:
+        int: Le nombre de UserExercice créés.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_SQL_INSCRIPTION_EXERCICE, {"epreuve_id": epreuve_id, "exercice_id": exercice_id})
+        nb_crees: int = cursor.rowcount
+
+    if nb_crees:
+        invalider_donnees_export(epreuve_id)
+        if avec_jeu_de_test:
+            _analyser_si_volumineux(nb_crees)
+            attribuer_jeux_de_test(epreuve_id, exercice_id=exercice_id)
+    return nb_crees
+
+
+def inscrire_participants_epreuve(epreuve_id: int, participants_ids: List[int]) -> ResultatInscription:
+    """
+    Crée les UserEpreuve et UserExercice manquants des participants donnés pour l'épreuve et
+    tous ses exercices, puis attribue les jeux de test manquants de l'épreuve. Les
+    inscriptions et attributions existantes sont conservées.
+
+    Args:
+        epreuve_id (int): L'épreuve concernée.
+        participants_ids (List[int]): Les identifiants des participants à inscrire.
+
+    Returns:
+        ResultatInscription: Les lignes créées et les jeux de test attribués.
+    """
+    parametres = {"epreuve_id": epreuve_id, "participants": participants_ids}
+    with connection.cursor() as cursor:
+        cursor.execute(_SQL_INSCRIPTION_EPREUVE, parametres)
+        nb_inscrits: int = cursor.rowcount
+        cursor.execute(_SQL_INSCRIPTION_EXERCICES, parametres)
+        nb_crees: int = cursor.rowcount
+
+    if nb_inscrits or nb_crees:
+        invalider_donnees_export(epreuve_id)
+        _analyser_si_volumineux(nb_crees)
+    # Complète aussi les UserExercice existants restés sans jeu de test
+    nb_attribues: int = attribuer_jeux_de_test(epreuve_id)
+    return ResultatInscription(nb_inscrits=nb_inscrits, nb_user_exercices_crees=nb_crees,
+                               nb_jeux_attribues=nb_attribues)
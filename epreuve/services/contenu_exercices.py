@@ -0,0 +1,97 @@
+"""
+Contenu des exercices commun à tous les participants d'une épreuve.
+
+La partie statique de chaque exercice (titre, énoncé, options) est sérialisée une fois
+et mise en cache par épreuve, sous une clé versionnée : `epreuve.signals` et
+`Epreuve.reordonner_exercices` changent de version à chaque modification.
+À chaque affichage, seule la partie propre au participant est sérialisée puis fusionnée.
+"""
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+
+from epreuve.models import Epreuve, Exercice
+from epreuve.utils import get_cache_key_version_contenu_exercices
+
+# Durée de vie du contenu en cache (la version garantit la fraîcheur, la durée limite l'encombrement)
+DUREE_CACHE_CONTENU: int = 3600
+
+
+@dataclass(frozen=True)
+class ContenuExercice:
+    """
+    Partie d'un exercice identique pour tous les participants, avec son fragment JSON
+    déjà sérialisé (objet JSON sans son accolade fermante).
+    """
+    id: int
+    avec_jeu_de_test: bool
+    nombre_max_soumissions: int
+    fragment_json: str
+
+
+def _version_contenu(epreuve_id: int) -> int:
+    cle: str = get_cache_key_version_contenu_exercices(epreuve_id)
+    version: Optional[int] = cache.get(cle)
+    if version is None:
+        # Valeur nouvelle à chaque (re)création, pour ne jamais retomber sur un contenu périmé
+        cache.add(cle, time.time_ns(), timeout=None)
+        version = cache.get(cle)
+    return version
+
+
+def _cle_contenu(epreuve_id: int, version: int) -> str:
+    return f"epreuve_{epreuve_id}_contenu_exercices_v{version}"
+
+
+def construire_contenu_exercice(exercice: Exercice) -> ContenuExercice:
+    """
+    Sérialise la partie statique d'un exercice.
+    """
+    statique: Dict[str, object] = {
+        'id': exercice.id,
+        'titre': exercice.titre,
+        'bareme': exercice.bareme,
+        'enonce': exercice.enonce,
+        'enonce_code': exercice.enonce_code,
+        'type_exercice': exercice.type_exercice,
+        'avec_jeu_de_test': exercice.avec_jeu_de_test,
+        'code_a_soumettre': exercice.code_a_soumettre,
+        'nb_max_soumissions': exercice.nombre_max_soumissions,
+        'retour_en_direct': exercice.retour_en_direct,
+        'lecture_seule': False,
+    }
+    return ContenuExercice(
+        id=exercice.id,
+        avec_jeu_de_test=exercice.avec_jeu_de_test,
+        nombre_max_soumissions=exercice.nombre_max_soumissions,
+        fragment_json=json.dumps(statique)[:-1],
+    )
+
+
+def get_contenu_exercices(epreuve: Epreuve) -> List[ContenuExercice]:
+    """
+    Renvoie la partie statique des exercices de l'épreuve, dans l'ordre de leur numéro,
+    depuis le cache ou reconstruite en une requête.
+    """
+    cle: str = _cle_contenu(epreuve.id, _version_contenu(epreuve.id))
+    contenu: Optional[List[ContenuExercice]] = cache.get(cle)
+    if contenu is None:
+        exercices = Exercice.objects.filter(epreuve=epreuve).order_by('numero')
+        contenu = [construire_contenu_exercice(exercice) for exercice in exercices]
+        cache.set(cle, contenu, timeout=DUREE_CACHE_CONTENU)
+    return contenu
+
+
+def fusionner_exercice_json(contenu: ContenuExercice, donnees_participant: Dict[str, object]) -> str:
+    """
+    Complète le fragment statique d'un exercice avec les données du participant.
+
+    Returns:
+        str: L'objet JSON complet de l'exercice.
+    """
+    return f"{contenu.fragment_json}, {json.dumps(donnees_participant)[1:]}"
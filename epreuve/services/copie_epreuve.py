@@ -0,0 +1,93 @@
+"""
+Copie d'une épreuve avec ses exercices et (une partie de) ses jeux de test.
+
+Le nombre de requêtes ne dépend pas de la taille de l'épreuve : les exercices sont lus puis
+insérés d'un seul `bulk_create`, avec leur `numero` déjà attribué (pas d'agrégat par
+exercice comme dans `Exercice.save()`), et les jeux de test à copier sont sélectionnés en une
+requête par une fonction de fenêtrage, puis insérés par lots.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, MembreComite
+from epreuve.utils import invalider_contenu_exercices, invalider_donnees_export
+
+# Nombre de jeux de test copiés par exercice par défaut
+MAX_JEUX_COPIES: int = 5
+
+# Nombre de jeux de test insérés par requête
+TAILLE_LOT: int = 2000
+
+
+@dataclass(frozen=True)
+class ResultatCopie:
+    epreuve: Epreuve
+    nb_exercices: int
+    nb_jeux_de_test: int
+
+
+def dupliquer_epreuve(source: Epreuve, membre: User, max_jeux_de_test: Optional[int] = MAX_JEUX_COPIES) -> ResultatCopie:
+    """
+    Copie une épreuve. La copie garde le référent de l'épreuve source, porte un nom de copie
+    libre pour ce référent et n'est jamais publique ; `membre` en est le seul membre du comité
+    et devient l'auteur des exercices copiés.
+
+    Args:
+        source (Epreuve): L'épreuve à copier.
+        membre (User): L'organisateur à l'origine de la copie.
+        max_jeux_de_test (Optional[int]): Nombre de jeux de test copiés par exercice (les
+            premiers créés) ; None pour tous les copier.
+
+    Returns:
+        ResultatCopie: L'épreuve créée et le nombre d'objets copiés.
+    """
+    with transaction.atomic():
+        copie: Epreuve = Epreuve(
+            nom=Epreuve.generer_nom_copie(source.nom, source.referent_id),
+            date_debut=source.date_debut,
+            date_fin=source.date_fin,
+            duree=source.duree,
+            referent_id=source.referent_id,
+            exercices_un_par_un=source.exercices_un_par_un,
+            temps_limite=source.temps_limite,
+            inscription_externe=False,  # forcé à False
+        )
+        copie.save()  # génère l'ID et le code
+        MembreComite.objects.create(epreuve=copie, membre=membre)
+
+        exercices_source: List[Exercice] = list(source.exercices.order_by(F("numero").asc(nulls_last=True), "id"))
+        copies: Dict[int, Exercice] = {}
+        for numero, exercice in enumerate(exercices_source, start=1):
+            id_source: int = exercice.pk
+            exercice.pk = None
+            exercice.epreuve = copie
+            exercice.auteur = membre
+            exercice.numero = numero
+            copies[id_source] = exercice
+        Exercice.objects.bulk_create(copies.values())
+
+        jeux = JeuDeTest.objects.filter(exercice__epreuve=source, exercice__avec_jeu_de_test=True)
+        if max_jeux_de_test is not None:
+            jeux = jeux.annotate(rang=Window(RowNumber(), partition_by=F("exercice_id"), order_by=F("id").asc())) \
+                .filter(rang__lte=max_jeux_de_test)
+        nouveaux_jeux: List[JeuDeTest] = []
+        for jeu in jeux.order_by("id").only("exercice_id", "instance", "reponse", "empreinte"):
+            nouveau = JeuDeTest(exercice=copies[jeu.exercice_id], instance=jeu.instance, reponse=jeu.reponse,
+                                empreinte=jeu.empreinte)
+            if not nouveau.empreinte:
+                nouveau.calculer_empreinte()  # ligne source pas encore recalculée
+            nouveaux_jeux.append(nouveau)
+        JeuDeTest.objects.bulk_create(nouveaux_jeux, batch_size=TAILLE_LOT)
+
+        # `bulk_create` n'envoie pas les signaux post_save des exercices
+        invalider_contenu_exercices(copie.id)
+        invalider_donnees_export(copie.id)
+
+    return ResultatCopie(epreuve=copie, nb_exercices=len(copies), nb_jeux_de_test=len(nouveaux_jeux))
@@ -0,0 +1,85 @@
+"""
+Désinscription d'un groupe d'une épreuve, par lots de participants.
+
+`QuerySet.delete()` charge chaque ligne en mémoire pour envoyer les signaux et suivre les
+cascades ; `UserEpreuve` et `User_Exercice` n'ont ni l'un ni l'autre, leurs lignes sont donc
+supprimées directement en SQL. Chaque lot est supprimé dans sa propre transaction, ce qui
+garde les verrous sur `User_Exercice` courts même pour un très gros groupe.
+
+Le lien `GroupeParticipeAEpreuve` est supprimé en dernier, par l'ORM : ses signaux invalident
+une seule fois le nombre de participants en cache et les autorisations des membres. Si la
+désinscription est interrompue, le groupe reste inscrit et peut être désinscrit à nouveau.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from django.db import connection, transaction
+
+from epreuve.utils import invalider_donnees_export
+from inscription.models import GroupeParticipeAEpreuve
+from intranet.models import ParticipantEstDansGroupe
+
+# Nombre de participants désinscrits par transaction
+TAILLE_LOT: int = 500
+
+# Callback de progression : (participants traités, participants à traiter)
+Progression = Callable[[int, int], None]
+
+_SQL_SUPPRESSION_USER_EXERCICES: str = """
+DELETE FROM "User_Exercice" ue
+USING "Exercice" e
+WHERE e.id = ue.exercice_id AND e.epreuve_id = %(epreuve_id)s AND ue.participant_id = ANY(%(participants)s)
+"""
+
+_SQL_SUPPRESSION_USER_EPREUVES: str = """
+DELETE FROM "UserEpreuve"
+WHERE epreuve_id = %(epreuve_id)s AND participant_id = ANY(%(participants)s)
+"""
+
+
+@dataclass(frozen=True)
+class ResultatDesinscription:
+    nb_participants: int
+    nb_user_exercices: int
+
+
+def desinscrire_groupe(epreuve_id: int, groupe_id: int, progression: Optional[Progression] = None,
+                       taille_lot: int = TAILLE_LOT) -> ResultatDesinscription:
+    """
+    Désinscrit les membres d'un groupe d'une épreuve (UserExercice puis UserEpreuve), puis
+    supprime l'inscription du groupe.
+
+    Args:
+        epreuve_id (int): L'épreuve concernée.
+        groupe_id (int): Le groupe à désinscrire.
+        progression (Optional[Progression]): Appelé après chaque lot supprimé.
+        taille_lot (int): Nombre de participants par lot.
+
+    Returns:
+        ResultatDesinscription: Le nombre de participants désinscrits et de UserExercice
+            supprimés.
+    """
+    membres: List[int] = list(
+        ParticipantEstDansGroupe.objects.filter(groupe_id=groupe_id)
+        .order_by("utilisateur_id").values_list("utilisateur_id", flat=True)
+    )
+
+    nb_participants: int = 0
+    nb_user_exercices: int = 0
+    for debut in range(0, len(membres), taille_lot):
+        parametres = {"epreuve_id": epreuve_id, "participants": membres[debut:debut + taille_lot]}
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(_SQL_SUPPRESSION_USER_EXERCICES, parametres)
+            nb_user_exercices += cursor.rowcount
+            cursor.execute(_SQL_SUPPRESSION_USER_EPREUVES, parametres)
+            nb_participants += cursor.rowcount
+        if progression is not None:
+            progression(min(debut + taille_lot, len(membres)), len(membres))
+
+    GroupeParticipeAEpreuve.objects.filter(epreuve_id=epreuve_id, groupe_id=groupe_id).delete()
+
+    if nb_participants or nb_user_exercices:
+        invalider_donnees_export(epreuve_id)
+    return ResultatDesinscription(nb_participants=nb_participants, nb_user_exercices=nb_user_exercices)
@@ -0,0 +1,133 @@
+"""
+Export d'une épreuve (paramètres, exercices et jeux de test) au format JSON.
+
+L'archive contient deux fichiers : une version complète avec tous les jeux de test et une
+version allégée limitée aux `MAX_JEUX_LEGER` premiers jeux de test de chaque exercice.
+
+Aucun des deux documents n'est construit en mémoire. Le JSON est écrit fragment par fragment
+(avec la même mise en forme que `json.dumps(..., indent=2)`) pendant un parcours unique des
+jeux de test, lus par paquets : la version complète part directement dans l'entrée de
+l'archive, la version allégée est mise de côté dans un fichier temporaire puis recopiée dans
+l'entrée suivante.
+"""
+from __future__ import annotations
+
+import json
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+from typing import IO, Any, Dict, Iterator, List, Tuple
+
+from django.db.models import F
+from django.utils.text import slugify
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest
+from epreuve.services.zip_flux import Entree
+
+# Nombre de jeux de test par exercice dans la version allégée
+MAX_JEUX_LEGER: int = 5
+
+# Nombre de jeux de test lus à la fois sur le curseur côté serveur
+TAILLE_PAQUET: int = 500
+
+# Taille de la version allégée gardée en mémoire avant de basculer sur disque
+TAILLE_LEGER_EN_MEMOIRE: int = 1024 * 1024
+
+# Fragment de JSON, et s'il appartient aussi à la version allégée
+Fragment = Tuple[str, bool]
+
+
+def _dumps(valeur: Any) -> str:
+    return json.dumps(valeur, ensure_ascii=False)
+
+
+def _champs(dictionnaire: Dict[str, Any], indentation: str) -> str:
+    return "".join(f"{indentation}{_dumps(cle)}: {_dumps(valeur)},\n" for cle, valeur in dictionnaire.items())
+
+
+def _fragments(epreuve: Epreuve) -> Iterator[Fragment]:
+    """
+    Produit le JSON de l'export complet, fragment par fragment, en une requête pour les
+    exercices et une requête (itérée par paquets) pour leurs jeux de test.
+    """
+    yield "{\n" + _champs({
+        "nom": epreuve.nom,
+        "date_debut": epreuve.date_debut.isoformat(),
+        "date_fin": epreuve.date_fin.isoformat(),
+        "duree": epreuve.duree,
+        "exercices_un_par_un": epreuve.exercices_un_par_un,
+        "temps_limite": epreuve.temps_limite,
+    }, "  ") + '  "exercices": [', True
+
+    # Exercices et jeux de test dans le même ordre, pour les apparier en un seul parcours
+    exercices: List[Exercice] = list(
+        epreuve.exercices.select_related("auteur").order_by(F("numero").asc(nulls_last=True), "id")
+    )
+    jeux: Iterator[Tuple[int, str, str]] = (
+        JeuDeTest.objects.filter(exercice__epreuve=epreuve, exercice__avec_jeu_de_test=True)
+        .order_by(F("exercice__numero").asc(nulls_last=True), "exercice_id", "id")
+        .values_list("exercice_id", "instance", "reponse")
+        .iterator(chunk_size=TAILLE_PAQUET)
+    )
+    jeux_par_exercice = groupby(jeux, key=itemgetter(0))
+    groupe = next(jeux_par_exercice, None)
+
+    for i, exercice in enumerate(exercices):
+        yield ("," if i else "") + "\n    {\n" + _champs({
+            "titre": exercice.titre,
+            "auteur_username": exercice.auteur.username if exercice.auteur else None,
+            "bareme": exercice.bareme,
+            "type_exercice": exercice.type_exercice,
+            "enonce": exercice.enonce,
+            "enonce_code": exercice.enonce_code,
+            "avec_jeu_de_test": exercice.avec_jeu_de_test,
+            "separateur_jeu_test": exercice.separateur_jeu_test,
+            "separateur_reponse_jeudetest": exercice.separateur_reponse_jeudetest,
+            "retour_en_direct": exercice.retour_en_direct,
+            "code_a_soumettre": exercice.code_a_soumettre,
+            "nombre_max_soumissions": exercice.nombre_max_soumissions,
+        }, "      ") + '      "jeux_de_test": [', True
+
+        nb_jeux: int = 0
+        if groupe is not None and groupe[0] == exercice.id:
+            for _, instance, reponse in groupe[1]:
+                # La virgule fait partie du jeu qui la suit : la version allégée s'arrête proprement
+                yield (("," if nb_jeux else "") + "\n        {\n"
+                       f'          "instance": {_dumps(instance)},\n'
+                       f'          "reponse": {_dumps(reponse)}\n'
+                       "        }"), nb_jeux < MAX_JEUX_LEGER
+                nb_jeux += 1
+            groupe = next(jeux_par_exercice, None)
+        yield ("\n      ]" if nb_jeux else "]") + "\n    }", True
+
+    yield ("\n  ]" if exercices else "]") + "\n}", True
+
+
+def _version_complete(epreuve: Epreuve, leger: IO[bytes]) -> Iterator[bytes]:
+    for texte, dans_leger in _fragments(epreuve):
+        donnees: bytes = texte.encode()
+        if dans_leger:
+            leger.write(donnees)
+        yield donnees
+
+
+def _relire(fichier: IO[bytes]) -> Iterator[bytes]:
+    fichier.seek(0)
+    while morceau := fichier.read(64 * 1024):
+        yield morceau
+
+
+def entrees_export_epreuve(epreuve: Epreuve) -> Iterator[Entree]:
+    """
+    Produit les deux fichiers JSON de l'export d'une épreuve, en flux.
+
+    Le contenu de chaque entrée est un itérable de morceaux, à consommer entièrement (ce que
+    fait `iterer_zip`) avant de demander l'entrée suivante.
+
+    Yields:
+        Entree: Les couples (chemin dans l'archive, contenu).
+    """
+    nom_slugifie: str = slugify(epreuve.nom)
+    with tempfile.SpooledTemporaryFile(max_size=TAILLE_LEGER_EN_MEMOIRE) as leger:
+        yield f"{nom_slugifie}_complete.json", _version_complete(epreuve, leger)
+        yield f"{nom_slugifie}_light.json", _relire(leger)
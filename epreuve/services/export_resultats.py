@@ -0,0 +1,126 @@
+"""
+Export tabulaire des résultats d'une épreuve : une ligne par `UserExercice`, dans un seul fichier.
+
+Destiné aux scripts de correction, qui chargent ainsi une épreuve entière d'un coup au lieu de
+décompresser des centaines de milliers de petits fichiers. Deux formats :
+
+- NDJSON (un objet JSON par ligne), toujours disponible ;
+- Parquet (colonnes compressées en zstd), si la bibliothèque optionnelle `pyarrow` est installée.
+
+Les lignes sont lues par paquets avec un curseur côté serveur, en une seule requête.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List
+
+from django.db.models import FilteredRelation, Q
+
+from epreuve.models import Epreuve, UserExercice
+
+# Nombre de lignes lues à la fois sur le curseur côté serveur
+TAILLE_PAQUET: int = 2000
+
+# Nombre de lignes par groupe de lignes Parquet
+TAILLE_GROUPE_PARQUET: int = 50000
+
+# Colonnes de l'export, dans l'ordre, et champ lu pour chacune
+COLONNES: Dict[str, str] = {
+    "anonymat": "inscription__anonymat",
+    "participant": "participant__username",
+    "debut_epreuve": "inscription__debut_epreuve",
+    "exercice": "exercice_id",
+    "exercice_numero": "exercice__numero",
+    "exercice_titre": "exercice__titre",
+    "reponse": "solution_instance_participant",
+    "reponse_attendue": "jeu_de_test__reponse",
+    "reponse_correcte": "reponse_correcte",
+    "nb_soumissions": "nb_soumissions",
+    "code": "code_participant",
+}
+
+
+def parquet_disponible() -> bool:
+    """Indique si `pyarrow` est installé (format Parquet proposé)."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def lignes_resultats(epreuve: Epreuve) -> Iterator[Dict[str, Any]]:
+    """
+    Parcourt les `UserExercice` de l'épreuve, joints à l'inscription de leur participant.
+
+    Yields:
+        Dict[str, Any]: Une ligne par `UserExercice`, clés dans l'ordre de `COLONNES`.
+    """
+    noms: List[str] = list(COLONNES)
+    valeurs: Iterable[tuple] = (
+        UserExercice.objects.filter(exercice__epreuve=epreuve)
+        .annotate(inscription=FilteredRelation(
+            "participant__user_epreuves", condition=Q(participant__user_epreuves__epreuve=epreuve),
+        ))
+        .order_by("participant__username", "exercice__numero", "exercice_id")
+        .values_list(*COLONNES.values())
+        .iterator(chunk_size=TAILLE_PAQUET)
+    )
+    for ligne in valeurs:
+        yield dict(zip(noms, ligne))
+
+
+def iterer_ndjson(lignes: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """
+    Sérialise les lignes au format NDJSON, un paquet de lignes par morceau produit.
+
+    Yields:
+        bytes: Les octets du fichier, dans l'ordre.
+    """
+    paquet: List[str] = []
+    for ligne in lignes:
+        debut = ligne["debut_epreuve"]
+        paquet.append(json.dumps({**ligne, "debut_epreuve": debut.isoformat() if debut else None},
+                                 ensure_ascii=False))
+        if len(paquet) >= TAILLE_PAQUET:
+            yield ("\n".join(paquet) + "\n").encode()
+            paquet = []
+    if paquet:
+        yield ("\n".join(paquet) + "\n").encode()
+
+
+def ecrire_parquet(lignes: Iterable[Dict[str, Any]], fichier: BinaryIO) -> None:
+    """
+    Écrit les lignes au format Parquet, par groupes de `TAILLE_GROUPE_PARQUET` lignes.
+
+    Raises:
+        ImportError: Si `pyarrow` n'est pas installé.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("anonymat", pa.string()),
+        ("participant", pa.string()),
+        ("debut_epreuve", pa.timestamp("us", tz="UTC")),
+        ("exercice", pa.int64()),
+        ("exercice_numero", pa.int32()),
+        ("exercice_titre", pa.string()),
+        ("reponse", pa.string()),
+        ("reponse_attendue", pa.string()),
+        ("reponse_correcte", pa.bool_()),
+        ("nb_soumissions", pa.int32()),
+        ("code", pa.string()),
+    ])
+    colonnes: Dict[str, List[Any]] = {nom: [] for nom in COLONNES}
+
+    with pq.ParquetWriter(fichier, schema, compression="zstd") as writer:
+        def vider() -> None:
+            writer.write_batch(pa.RecordBatch.from_pydict(colonnes, schema=schema))
+            for valeurs in colonnes.values():
+                valeurs.clear()
+
+        for nb, ligne in enumerate(lignes, start=1):
+            for nom, valeur in ligne.items():
+                colonnes[nom].append(valeur)
+            if nb % TAILLE_GROUPE_PARQUET == 0:
+                vider()
+        if colonnes["participant"]:
+            vider()
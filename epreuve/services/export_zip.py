@@ -0,0 +1,101 @@
+"""
+Export ZIP des rendus d'une épreuve, produit au fil de l'eau.
+
+L'archive n'est jamais construite en mémoire : les `UserExercice` sont lus par paquets avec un
+curseur côté serveur et chaque fichier est transmis à `epreuve.services.zip_flux.iterer_zip`,
+qui l'écrit aussitôt. La mémoire consommée ne dépend donc pas de la taille de l'épreuve.
+"""
+from __future__ import annotations
+
+import csv
+from io import StringIO
+from typing import Iterator, Optional, Tuple
+
+from epreuve.models import Epreuve, UserEpreuve, UserExercice
+from epreuve.services.zip_flux import Entree
+
+# Nombre de lignes lues à la fois sur le curseur côté serveur
+TAILLE_PAQUET: int = 500
+
+# Ordre de parcours de chaque disposition de l'archive
+_ORDRES = {
+    "exercice": ("exercice__numero", "exercice_id", "participant__username"),
+    "participant": ("participant__username", "exercice__numero", "exercice_id"),
+}
+
+
+def _resume_tsv(epreuve: Epreuve) -> str:
+    """
+    Construit `resume_epreuve.tsv` : début et nombre de bonnes réponses de chaque participant
+    inscrit, y compris ceux qui n'ont encore aucun exercice.
+    """
+    sortie = StringIO()
+    writer = csv.writer(sortie, delimiter='\t')
+    writer.writerow(['username', 'date/heure de debut', 'nombre de bonnes reponses'])
+    inscriptions = (
+        UserEpreuve.objects.filter(epreuve=epreuve)
+        .order_by("participant__username")
+        .values_list("participant__username", "debut_epreuve", "nb_bonnes_reponses")
+        .iterator(chunk_size=TAILLE_PAQUET)
+    )
+    for username, debut, nb_bonnes_reponses in inscriptions:
+        writer.writerow([username, debut.strftime('%Y-%m-%d %H:%M:%S') if debut else 'N/A',
+                         nb_bonnes_reponses or 0])
+    return sortie.getvalue()
+
+
+def _fichier_reponse(solution: str, attendue: str, instance: str) -> str:
+    return (f"##### reponse_equipe :\n{solution}\n\n"
+            f"##### reponse_attendue :\n{attendue}\n\n"
+            f"##### jeu_de_test :\n{instance}")
+
+
+def _lignes_export(epreuve: Epreuve, ordre: Tuple[str, ...]) -> Iterator[tuple]:
+    """
+    Parcours unique des rendus : chaque `UserExercice` de l'épreuve, joint à son exercice et à
+    son jeu de test, dans l'ordre demandé.
+    """
+    return (
+        UserExercice.objects.filter(exercice__epreuve=epreuve)
+        .order_by(*ordre)
+        .values_list(
+            "participant__username", "exercice_id", "exercice__titre", "exercice__avec_jeu_de_test",
+            "solution_instance_participant", "code_participant", "jeu_de_test__reponse", "jeu_de_test__instance",
+        )
+        .iterator(chunk_size=TAILLE_PAQUET)
+    )
+
+
+def entrees_export(epreuve: Epreuve, by: str) -> Iterator[Entree]:
+    """
+    Produit les fichiers de l'export des rendus, rangés par exercice ou par participant.
+
+    Les fichiers des rendus proviennent d'une seule requête parcourue dans l'ordre de la
+    disposition. Le résumé, lu à part sur les inscriptions pour couvrir aussi les participants
+    sans exercice, est écrit en dernier.
+
+    Args:
+        epreuve (Epreuve): L'épreuve exportée.
+        by (str): 'exercice' ou 'participant' (toute autre valeur : résumé seul).
+
+    Yields:
+        Entree: Les couples (chemin dans l'archive, contenu).
+    """
+    ordre: Optional[Tuple[str, ...]] = _ORDRES.get(by)
+    if ordre is not None:
+        for (username, exercice_id, titre, avec_jeu_de_test,
+             solution, code, attendue, instance) in _lignes_export(epreuve, ordre):
+            if by == 'exercice':
+                dossier = f"{titre}/{username}"
+                suffixe = f"{exercice_id}_{username}"
+            else:
+                dossier = f"{username}/{titre}"
+                suffixe = f"{username}_{exercice_id}"
+
+            if avec_jeu_de_test:
+                instance = instance if instance is not None else "N/A"
+                yield (f"{dossier}/reponse_{suffixe}.txt",
+                       _fichier_reponse((solution or "").strip(), (attendue or "").strip(), instance))
+            yield f"{dossier}/code_{suffixe}.py", code or ""
+
+    yield 'resume_epreuve.tsv', _resume_tsv(epreuve)
@@ -0,0 +1,362 @@
+"""
+Exports d'épreuve construits en tâche de fond et conservés sur disque.
+
+Un clic sur « exporter » crée (ou retrouve) une `TacheExport` pour le couple (épreuve, type
+d'export) et la version courante des données de l'épreuve. La commande `traiter_exports`
+construit l'archive ; sans worker, elle est transmise au client au fil de sa construction
+et écrite en même temps sur disque (`diffuser_tache`). Tant que les données ne changent pas,
+les clics suivants renvoient directement le fichier déjà construit.
+
+La version des données combine un compteur en cache, incrémenté par
+`epreuve.utils.invalider_donnees_export` à chaque modification en place (édition, recalcul des
+scores), et des agrégats des lignes `UserExercice` et `UserEpreuve` de l'épreuve : leur nombre
+couvre les créations et suppressions en masse, le total des soumissions et le nombre de
+participants ayant commencé couvrent les soumissions sans écriture dans le cache à chacune.
+
+Les artefacts sont évincés du moins récemment téléchargé au plus récent dès que leur taille
+totale dépasse `EXPORTS_TAILLE_MAX_MO`.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from epreuve.models import Epreuve, TacheExport, UserEpreuve, UserExercice
+from epreuve.services.export_epreuve import entrees_export_epreuve
+from epreuve.services.export_resultats import ecrire_parquet, iterer_ndjson, lignes_resultats
+from epreuve.services.export_zip import entrees_export
+from epreuve.services.zip_flux import Entree, iterer_zip
+from epreuve.utils import get_cache_key_version_donnees_export
+
+logger = logging.getLogger(__name__)
+
+# Intervalle minimal entre deux enregistrements de la progression d'une tâche (secondes)
+INTERVALLE_PROGRESSION: float = 1.0
+
+# Sans signe de vie depuis cette durée, une tâche « en cours » est considérée comme abandonnée
+# (worker ou requête interrompus) : la progression est enregistrée toutes les secondes
+DELAI_INACTIVITE_TACHE: timedelta = timedelta(minutes=2)
+
+T = TypeVar("T")
+
+# Fichiers de chaque type d'export archivé en ZIP, à partir de l'épreuve
+_ENTREES: Dict[str, Callable[[Epreuve], Iterator[Entree]]] = {
+    TacheExport.RENDUS_EXERCICE: lambda epreuve: entrees_export(epreuve, "exercice"),
+    TacheExport.RENDUS_PARTICIPANT: lambda epreuve: entrees_export(epreuve, "participant"),
+    TacheExport.EPREUVE_JSON: entrees_export_epreuve,
+}
+
+
+def version_donnees(epreuve_id: int) -> str:
+    """
+    Renvoie la version courante des données exportables d'une épreuve.
+    """
+    cle: str = get_cache_key_version_donnees_export(epreuve_id)
+    compteur: Optional[int] = cache.get(cle)
+    if compteur is None:
+        # Valeur nouvelle à chaque (re)création, pour ne jamais retomber sur une version déjà servie
+        cache.add(cle, time.time_ns(), timeout=None)
+        compteur = cache.get(cle)
+    user_exercices: Dict[str, int] = UserExercice.objects.filter(exercice__epreuve_id=epreuve_id).aggregate(
+        nb=Count("id"), soumissions=Coalesce(Sum("nb_soumissions"), 0),
+    )
+    user_epreuves: Dict[str, int] = UserEpreuve.objects.filter(epreuve_id=epreuve_id).aggregate(
+        nb=Count("id"), demarrees=Count("debut_epreuve"),
+    )
+    return (f"{compteur}-{user_exercices['nb']}-{user_exercices['soumissions']}"
+            f"-{user_epreuves['nb']}-{user_epreuves['demarrees']}")
+
+
+def exports_asynchrones() -> bool:
+    """Indique si les exports sont construits par la commande `traiter_exports`."""
+    return bool(getattr(settings, "EXPORTS_ASYNCHRONES", False))
+
+
+def demander_export(epreuve: Epreuve, type_export: str, demandeur: Optional[User] = None) -> TacheExport:
+    """
+    Renvoie la tâche d'export correspondant à la version courante des données, en la créant
+    si besoin. L'artefact n'est pas construit ici (voir `construire_sans_worker`).
+
+    Args:
+        epreuve (Epreuve): L'épreuve à exporter.
+        type_export (str): Un des `TacheExport.TYPES`.
+        demandeur (Optional[User]): L'utilisateur à l'origine de la demande.
+
+    Returns:
+        TacheExport: La tâche, terminée si l'artefact existait déjà.
+    """
+    version: str = version_donnees(epreuve.id)
+    existantes = TacheExport.objects.filter(epreuve=epreuve, type_export=type_export, version_donnees=version)
+    tache: Optional[TacheExport] = existantes.exclude(statut=TacheExport.ECHEC).first()
+
+    if tache is not None and tache.est_terminee() and not os.path.exists(tache.chemin_fichier()):
+        # Artefact effacé à la main : on le reconstruit
+        tache.delete()
+        tache = None
+
+    if tache is None:
+        try:
+            with transaction.atomic():
+                tache = TacheExport.objects.create(epreuve=epreuve, type_export=type_export,
+                                                   version_donnees=version, demandeur=demandeur)
+        except IntegrityError:
+            # Double clic : la tâche vient d'être créée par une autre requête
+            tache = existantes.exclude(statut=TacheExport.ECHEC).get()
+    return tache
+
+
+def construire_sans_worker(tache: TacheExport) -> Optional[Iterator[bytes]]:
+    """
+    Sans worker (`EXPORTS_ASYNCHRONES` désactivé), prend en charge dans la requête courante une
+    tâche en attente.
+
+    Returns:
+        Optional[Iterator[bytes]]: Les octets de l'artefact, à transmettre au client pendant sa
+        construction ; None si la tâche est déjà terminée, prise par une autre requête, ou si
+        c'est un export Parquet, construit d'un bloc (la tâche est alors terminée).
+    """
+    # Sans worker pour relancer les tâches, une requête tuée en cours de construction
+    # laisserait sa tâche « en cours » pour de bon : on la reprend ici
+    if exports_asynchrones() or not _reserver(tache, reprendre_inactive=True):
+        return None
+    if tache.type_export == TacheExport.RESULTATS_PARQUET:
+        # pyarrow écrit dans un fichier : pas de flux à transmettre en même temps
+        executer_tache(tache)
+        return None
+    return diffuser_tache(tache)
+
+
+def _taches_inactives(delai: timedelta = DELAI_INACTIVITE_TACHE) -> Q:
+    """
+    Condition « en cours, sans signe de vie depuis `delai` ».
+    """
+    limite = timezone.now() - delai
+    return Q(statut=TacheExport.EN_COURS) & (
+        Q(date_activite__lt=limite) | Q(date_activite__isnull=True, date_debut__lt=limite)
+    )
+
+
+def _reserver(tache: TacheExport, reprendre_inactive: bool = False) -> bool:
+    """
+    Passe la tâche « en cours » si elle est encore en attente (ou, avec `reprendre_inactive`,
+    si sa construction a été abandonnée).
+
+    Returns:
+        bool: False si un autre processus l'a réservée avant.
+    """
+    maintenant = timezone.now()
+    condition: Q = Q(statut=TacheExport.EN_ATTENTE)
+    if reprendre_inactive:
+        condition |= _taches_inactives()
+    nb: int = TacheExport.objects.filter(condition, id=tache.id).update(
+        statut=TacheExport.EN_COURS, progression=0, date_debut=maintenant, date_activite=maintenant,
+    )
+    if nb:
+        tache.statut, tache.progression = TacheExport.EN_COURS, 0
+        tache.date_debut = tache.date_activite = maintenant
+    return bool(nb)
+
+
+def prendre_tache() -> Optional[TacheExport]:
+    """
+    Réserve la plus ancienne tâche en attente, sans bloquer les autres workers.
+    """
+    with transaction.atomic():
+        tache: Optional[TacheExport] = (
+            TacheExport.objects.select_for_update(skip_locked=True)
+            .filter(statut=TacheExport.EN_ATTENTE)
+            .order_by("date_creation")
+            .first()
+        )
+        if tache is None or not _reserver(tache):
+            return None
+    return tache
+
+
+def relancer_taches_interrompues(delai: timedelta = DELAI_INACTIVITE_TACHE) -> int:
+    """
+    Remet en attente les tâches « en cours » sans signe de vie depuis `delai` (worker arrêté
+    brutalement).
+
+    Returns:
+        int: Le nombre de tâches relancées.
+    """
+    return TacheExport.objects.filter(_taches_inactives(delai)).update(statut=TacheExport.EN_ATTENTE, progression=0)
+
+
+def _nb_entrees(tache: TacheExport) -> int:
+    """
+    Nombre de fichiers de l'archive (ou de lignes de l'export tabulaire), pour exprimer la
+    progression en pourcentage.
+    """
+    if tache.type_export == TacheExport.EPREUVE_JSON:
+        return 2
+    if tache.type_export in (TacheExport.RESULTATS_NDJSON, TacheExport.RESULTATS_PARQUET):
+        return UserExercice.objects.filter(exercice__epreuve_id=tache.epreuve_id).count()
+    compte: Dict[str, int] = UserExercice.objects.filter(exercice__epreuve_id=tache.epreuve_id).aggregate(
+        codes=Count("id"), reponses=Count("id", filter=Q(exercice__avec_jeu_de_test=True)),
+    )
+    return compte["codes"] + compte["reponses"] + 1  # + le résumé
+
+
+def _suivre_progression(tache: TacheExport, entrees: Iterable[T], total: int) -> Iterator[T]:
+    prochain_enregistrement: float = time.monotonic() + INTERVALLE_PROGRESSION
+    for nb, entree in enumerate(entrees, start=1):
+        yield entree
+        if time.monotonic() >= prochain_enregistrement:
+            progression: int = min(99, 100 * nb // max(total, 1))
+            TacheExport.objects.filter(id=tache.id).update(progression=progression, date_activite=timezone.now())
+            prochain_enregistrement = time.monotonic() + INTERVALLE_PROGRESSION
+
+
+def _signaler_activite(tache: TacheExport, morceaux: Iterable[bytes]) -> Iterator[bytes]:
+    # Une seule entrée volumineuse (JSON de l'épreuve) ne fait pas avancer la progression
+    prochain_signal: float = time.monotonic() + INTERVALLE_PROGRESSION
+    for morceau in morceaux:
+        yield morceau
+        if time.monotonic() >= prochain_signal:
+            TacheExport.objects.filter(id=tache.id).update(date_activite=timezone.now())
+            prochain_signal = time.monotonic() + INTERVALLE_PROGRESSION
+
+
+def _morceaux_artefact(tache: TacheExport) -> Iterator[bytes]:
+    """
+    Octets de l'artefact d'une tâche (tous les types sauf Parquet), produits au fil de l'eau.
+    """
+    total: int = _nb_entrees(tache)
+    if tache.type_export == TacheExport.RESULTATS_NDJSON:
+        return iterer_ndjson(_suivre_progression(tache, lignes_resultats(tache.epreuve), total))
+    entrees: Iterator[Entree] = _suivre_progression(tache, _ENTREES[tache.type_export](tache.epreuve), total)
+    return _signaler_activite(tache, iterer_zip(entrees, processus=settings.EXPORTS_PROCESSUS_COMPRESSION))
+
+
+def _chemins_artefact(tache: TacheExport) -> Tuple[str, str]:
+    """
+    Chemin définitif de l'artefact d'une tâche et chemin temporaire pendant sa construction.
+    """
+    chemin_final: str = os.path.join(settings.EXPORTS_CHEMIN, str(tache.epreuve_id),
+                                     f"{tache.type_export}_{tache.version_donnees}.{tache.extension()}")
+    return chemin_final, f"{chemin_final}.{os.getpid()}.tmp"
+
+
+def _abandonner(tache: TacheExport, chemin_temporaire: str, erreur: Optional[Exception]) -> None:
+    """
+    Efface l'artefact incomplet d'une tâche, qui passe en échec ou, si la construction a été
+    interrompue sans erreur (client parti), repart en attente.
+    """
+    if os.path.exists(chemin_temporaire):
+        os.remove(chemin_temporaire)
+    if erreur is None:
+        tache.statut, tache.progression = TacheExport.EN_ATTENTE, 0
+        tache.save(update_fields=["statut", "progression"])
+        return
+    logger.error("Échec de l'export %s", tache.id, exc_info=erreur)
+    tache.statut, tache.erreur, tache.date_fin = TacheExport.ECHEC, str(erreur), timezone.now()
+    tache.save(update_fields=["statut", "erreur", "date_fin"])
+
+
+def executer_tache(tache: TacheExport) -> None:
+    """
+    Construit l'artefact d'une tâche réservée dans un fichier, sans rien transmettre (worker
+    `traiter_exports`, export Parquet).
+    """
+    chemin_final, chemin_temporaire = _chemins_artefact(tache)
+    try:
+        os.makedirs(os.path.dirname(chemin_final), exist_ok=True)
+        with open(chemin_temporaire, "wb") as fichier:
+            if tache.type_export == TacheExport.RESULTATS_PARQUET:
+                total: int = _nb_entrees(tache)
+                ecrire_parquet(_suivre_progression(tache, lignes_resultats(tache.epreuve), total), fichier)
+            else:
+                for morceau in _morceaux_artefact(tache):
+                    fichier.write(morceau)
+        os.replace(chemin_temporaire, chemin_final)
+    except Exception as erreur:
+        _abandonner(tache, chemin_temporaire, erreur)
+        return
+    _terminer(tache, chemin_final)
+
+
+def diffuser_tache(tache: TacheExport) -> Iterator[bytes]:
+    """
+    Construit l'artefact d'une tâche réservée en renvoyant ses octets au fur et à mesure,
+    pour le client, tout en les écrivant sur disque pour les demandes suivantes.
+
+    Si le client interrompt le téléchargement, le fichier incomplet est effacé et la tâche
+    repart en attente ; en cas d'erreur, elle passe en échec et l'erreur est propagée.
+    """
+    chemin_final, chemin_temporaire = _chemins_artefact(tache)
+    try:
+        os.makedirs(os.path.dirname(chemin_final), exist_ok=True)
+        with open(chemin_temporaire, "wb") as fichier:
+            for morceau in _morceaux_artefact(tache):
+                fichier.write(morceau)
+                yield morceau
+        os.replace(chemin_temporaire, chemin_final)
+    except GeneratorExit:
+        _abandonner(tache, chemin_temporaire, None)
+        raise
+    except Exception as erreur:
+        _abandonner(tache, chemin_temporaire, erreur)
+        raise
+    _terminer(tache, chemin_final)
+
+
+def _terminer(tache: TacheExport, chemin_final: str) -> None:
+    """
+    Enregistre l'artefact construit d'une tâche, puis libère la place prise par les anciennes
+    versions et, si besoin, par les artefacts les moins récemment utilisés.
+    """
+    tache.statut, tache.progression, tache.date_fin = TacheExport.TERMINEE, 100, timezone.now()
+    tache.fichier = os.path.relpath(chemin_final, settings.EXPORTS_CHEMIN)
+    tache.taille = os.path.getsize(chemin_final)
+    tache.save(update_fields=["statut", "progression", "date_fin", "fichier", "taille"])
+
+    # Les versions précédentes ne seront plus jamais servies (le fichier part avec la ligne, voir signals)
+    for ancienne in TacheExport.objects.filter(
+            epreuve_id=tache.epreuve_id, type_export=tache.type_export, statut=TacheExport.TERMINEE,
+    ).exclude(id=tache.id):
+        ancienne.delete()
+    evincer_artefacts(settings.EXPORTS_TAILLE_MAX_MO * 1024 * 1024, sauf=tache)
+
+
+def marquer_acces(tache: TacheExport) -> None:
+    """Enregistre un téléchargement, qui protège l'artefact de l'éviction."""
+    tache.date_dernier_acces = timezone.now()
+    TacheExport.objects.filter(id=tache.id).update(date_dernier_acces=tache.date_dernier_acces)
+
+
+def evincer_artefacts(taille_max: int, sauf: Optional[TacheExport] = None) -> int:
+    """
+    Supprime les artefacts les moins récemment utilisés jusqu'à repasser sous `taille_max` octets.
+
+    Args:
+        taille_max (int): Taille totale autorisée, en octets.
+        sauf (Optional[TacheExport]): Une tâche à conserver quoi qu'il arrive (celle qu'on vient de construire).
+
+    Returns:
+        int: Le nombre d'artefacts supprimés.
+    """
+    terminees = TacheExport.objects.filter(statut=TacheExport.TERMINEE)
+    taille_totale: int = terminees.aggregate(total=Sum("taille"))["total"] or 0
+    if sauf is not None:
+        terminees = terminees.exclude(id=sauf.id)
+    nb_supprimes: int = 0
+    for tache in terminees.order_by(Coalesce("date_dernier_acces", "date_fin").asc(), "id"):
+        if taille_totale <= taille_max:
+            break
+        taille_totale -= tache.taille
+        tache.delete()
+        nb_supprimes += 1
+    return nb_supprimes
@@ -0,0 +1,360 @@
+"""
+Import d'une épreuve (paramètres, exercices et jeux de test) depuis le JSON produit par
+`epreuve.services.export_epreuve`.
+
+Le fichier est lu deux fois, sans jamais être chargé en entier :
+
+1. une première passe valide le schéma de bout en bout et compte les objets à créer, sans
+   rien écrire : un fichier invalide est refusé avant la moindre requête ;
+2. une seconde passe crée l'épreuve, puis les exercices et leurs jeux de test par lots de
+   `bulk_create`, dans une seule transaction.
+
+L'analyse est incrémentale au niveau des exercices : seul l'exercice en cours de lecture
+(avec ses jeux de test) et le lot en attente d'insertion sont en mémoire.
+"""
+from __future__ import annotations
+
+import io
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Set, TextIO, Tuple
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, MembreComite
+from epreuve.utils import invalider_contenu_exercices, invalider_donnees_export
+from olympiadesnsi.constants import MAX_TAILLE_NOM
+
+# Nombre de caractères lus à la fois dans le fichier
+TAILLE_LECTURE: int = 64 * 1024
+
+# Nombre d'objets (exercices et jeux de test) accumulés avant insertion
+TAILLE_LOT: int = 2000
+
+# Callback de progression : (objets créés, objets à créer)
+Progression = Callable[[int, int], None]
+
+# Bornes d'un `IntegerField` (entier signé sur 32 bits)
+_ENTIER_MIN: int = -2 ** 31
+_ENTIER_MAX: int = 2 ** 31 - 1
+
+# Champs texte facultatifs d'un exercice (chaîne ou null)
+_TEXTES_FACULTATIFS: Tuple[str, ...] = ("enonce", "enonce_code", "separateur_jeu_test",
+                                        "separateur_reponse_jeudetest")
+
+
+class EpreuveJsonInvalide(ValueError):
+    """Le fichier est un JSON valide mais ne décrit pas une épreuve importable."""
+
+
+@dataclass(frozen=True)
+class ResultatImport:
+    epreuve: Epreuve
+    nb_exercices: int
+    nb_jeux_de_test: int
+
+
+class _LecteurJson:
+    """
+    Lecteur JSON incrémental : parcourt les délimiteurs à la main et délègue le décodage de
+    chaque valeur à `json.JSONDecoder.raw_decode`, en lisant la suite du fichier au besoin.
+    """
+
+    def __init__(self, flux: TextIO):
+        self._flux = flux
+        self._tampon: str = ""
+        self._pos: int = 0
+        self._fin: bool = False
+        self._decodeur = json.JSONDecoder()
+
+    def _lire_plus(self) -> bool:
+        # Lectures de plus en plus grandes : une valeur longue n'est pas redécodée un nombre quadratique de fois
+        morceau: str = self._flux.read(max(TAILLE_LECTURE, len(self._tampon) - self._pos))
+        if not morceau:
+            self._fin = True
+            return False
+        self._tampon = self._tampon[self._pos:] + morceau
+        self._pos = 0
+        return True
+
+    def prochain(self) -> str:
+        """Renvoie le prochain caractère significatif sans le consommer ('' en fin de fichier)."""
+        while True:
+            while self._pos < len(self._tampon) and self._tampon[self._pos] in " \t\n\r":
+                self._pos += 1
+            if self._pos < len(self._tampon):
+                return self._tampon[self._pos]
+            if not self._lire_plus():
+                return ""
+
+    def consommer(self, attendus: str) -> str:
+        """Consomme le prochain caractère significatif, qui doit être l'un des `attendus`."""
+        caractere: str = self.prochain()
+        if not caractere or caractere not in attendus:
+            raise json.JSONDecodeError(f"'{attendus}' attendu", self._tampon, self._pos)
+        self._pos += 1
+        return caractere
+
+    def valeur(self) -> Any:
+        """Décode la prochaine valeur JSON complète."""
+        self.prochain()
+        while True:
+            try:
+                valeur, fin = self._decodeur.raw_decode(self._tampon, self._pos)
+                # Un nombre en fin de tampon peut se poursuivre dans la lecture suivante
+                if fin < len(self._tampon) or self._fin:
+                    self._pos = fin
+                    return valeur
+            except json.JSONDecodeError:
+                if self._fin:
+                    raise
+            self._lire_plus()
+
+
+def _parcourir(flux: TextIO) -> Iterator[Tuple[str, Any]]:
+    """
+    Parcourt l'objet racine du fichier.
+
+    Yields:
+        Tuple[str, Any]: ('exercice', dictionnaire) pour chaque élément de la liste `exercices`,
+        (clé, valeur) pour les autres clés de l'épreuve.
+    """
+    lecteur = _LecteurJson(flux)
+    lecteur.consommer("{")
+    if lecteur.prochain() == "}":
+        lecteur.consommer("}")
+    else:
+        while True:
+            cle: Any = lecteur.valeur()
+            if not isinstance(cle, str):
+                raise EpreuveJsonInvalide("Le fichier ne décrit pas une épreuve.")
+            lecteur.consommer(":")
+            if cle == "exercices" and lecteur.prochain() == "[":
+                lecteur.consommer("[")
+                if lecteur.prochain() == "]":
+                    lecteur.consommer("]")
+                else:
+                    while True:
+                        yield "exercice", lecteur.valeur()
+                        if lecteur.consommer(",]") == "]":
+                            break
+            else:
+                yield cle, lecteur.valeur()
+            if lecteur.consommer(",}") == "}":
+                break
+    if lecteur.prochain():
+        raise json.JSONDecodeError("Données après la fin de l'épreuve", "", 0)
+
+
+def _parcourir_fichier(fichier: IO[bytes]) -> Iterator[Tuple[str, Any]]:
+    """Parcourt un fichier binaire depuis son début, sans le fermer."""
+    fichier.seek(0)
+    texte = io.TextIOWrapper(fichier, encoding="utf-8-sig")
+    try:
+        yield from _parcourir(texte)
+    finally:
+        texte.detach()
+
+
+def _date(entete: Dict[str, Any], cle: str) -> datetime:
+    valeur: Any = entete.get(cle)
+    date: Optional[datetime] = parse_datetime(valeur) if isinstance(valeur, str) else None
+    if date is None:
+        raise EpreuveJsonInvalide(f"« {cle} » manquante ou invalide.")
+    return date
+
+
+def _est_entier(valeur: Any) -> bool:
+    # bool est une sous-classe d'int : `true` n'est pas un entier accepté
+    return isinstance(valeur, int) and not isinstance(valeur, bool) and _ENTIER_MIN <= valeur <= _ENTIER_MAX
+
+
+def _valider_exercice(numero: int, exercice: Any, titres: Set[str]) -> int:
+    """
+    Vérifie un exercice du fichier : chaque champ lu par `_nouvel_exercice` doit avoir le
+    type attendu par le modèle, pour qu'aucune insertion n'échoue en seconde passe.
+
+    Returns:
+        int: Le nombre de jeux de test qui seront importés.
+    """
+    if not isinstance(exercice, dict):
+        raise EpreuveJsonInvalide(f"Exercice {numero} : un objet est attendu.")
+    titre: Any = exercice.get("titre")
+    if not isinstance(titre, str) or not titre:
+        raise EpreuveJsonInvalide(f"Exercice {numero} : titre manquant.")
+    if len(titre) > MAX_TAILLE_NOM:
+        raise EpreuveJsonInvalide(f"Exercice {numero} : le titre dépasse {MAX_TAILLE_NOM} caractères.")
+    if titre in titres:
+        raise EpreuveJsonInvalide(f"Exercice {numero} : le titre « {titre} » est déjà utilisé.")
+    titres.add(titre)
+
+    type_exercice: Any = exercice.get("type_exercice", "programmation")
+    if not isinstance(type_exercice, str) or type_exercice not in dict(Exercice.TYPE_EXERCICE_CHOIX):
+        raise EpreuveJsonInvalide(f"Exercice « {titre} » : type d'exercice inconnu.")
+    code_a_soumettre: Any = exercice.get("code_a_soumettre", "python")
+    if code_a_soumettre is not None and (not isinstance(code_a_soumettre, str)
+                                         or code_a_soumettre not in dict(Exercice.CODE_A_SOUMETTRE_CHOIX)):
+        raise EpreuveJsonInvalide(f"Exercice « {titre} » : code à soumettre inconnu.")
+    bareme: Any = exercice.get("bareme")
+    if bareme is not None and not _est_entier(bareme):
+        raise EpreuveJsonInvalide(f"Exercice « {titre} » : « bareme » doit être un entier.")
+    if not _est_entier(exercice.get("nombre_max_soumissions", 50)):
+        raise EpreuveJsonInvalide(f"Exercice « {titre} » : « nombre_max_soumissions » doit être un entier.")
+    for cle in ("avec_jeu_de_test", "retour_en_direct"):
+        if not isinstance(exercice.get(cle, False), bool):
+            raise EpreuveJsonInvalide(f"Exercice « {titre} » : « {cle} » doit être un booléen.")
+    for cle in _TEXTES_FACULTATIFS:
+        if not isinstance(exercice.get(cle), (str, type(None))):
+            raise EpreuveJsonInvalide(f"Exercice « {titre} » : « {cle} » doit être une chaîne.")
+
+    if not exercice.get("avec_jeu_de_test", False):
+        return 0
+    jeux: Any = exercice.get("jeux_de_test", [])
+    if not isinstance(jeux, list) or not all(
+            isinstance(jeu, dict) and isinstance(jeu.get("instance"), str) and isinstance(jeu.get("reponse"), str)
+            for jeu in jeux):
+        raise EpreuveJsonInvalide(f"Exercice « {titre} » : chaque jeu de test doit avoir une instance "
+                                  f"et une réponse.")
+    return len(jeux)
+
+
+def valider_fichier(fichier: IO[bytes]) -> Tuple[Dict[str, Any], int, int]:
+    """
+    Première passe : valide tout le fichier sans rien écrire.
+
+    Returns:
+        Tuple[Dict[str, Any], int, int]: Les paramètres de l'épreuve (hors exercices), le nombre
+        d'exercices et le nombre de jeux de test.
+
+    Raises:
+        json.JSONDecodeError: Si le fichier n'est pas un JSON valide.
+        EpreuveJsonInvalide: Si le JSON ne décrit pas une épreuve importable.
+    """
+    entete: Dict[str, Any] = {}
+    titres: Set[str] = set()
+    nb_jeux: int = 0
+    for cle, valeur in _parcourir_fichier(fichier):
+        if cle == "exercice":
+            nb_jeux += _valider_exercice(len(titres) + 1, valeur, titres)
+        else:
+            entete[cle] = valeur
+
+    if "exercices" in entete:
+        raise EpreuveJsonInvalide("« exercices » doit être une liste.")
+    if not isinstance(entete.get("nom"), str) or not entete["nom"]:
+        raise EpreuveJsonInvalide("Nom de l'épreuve manquant.")
+    if len(entete["nom"]) > MAX_TAILLE_NOM:
+        raise EpreuveJsonInvalide(f"Le nom de l'épreuve dépasse {MAX_TAILLE_NOM} caractères.")
+    if _date(entete, "date_debut") > _date(entete, "date_fin"):
+        raise EpreuveJsonInvalide("La date de début est postérieure à la date de fin.")
+    duree: Any = entete.get("duree")
+    if duree is not None and not _est_entier(duree):
+        raise EpreuveJsonInvalide("« duree » doit être un entier.")
+    for cle in ("exercices_un_par_un", "temps_limite"):
+        if not isinstance(entete.get(cle, False), bool):
+            raise EpreuveJsonInvalide(f"« {cle} » doit être un booléen.")
+    return entete, len(titres), nb_jeux
+
+
+def _nouvel_exercice(epreuve: Epreuve, auteur: User, numero: int, donnees: Dict[str, Any]) -> Exercice:
+    return Exercice(
+        epreuve=epreuve,
+        auteur=auteur,
+        numero=numero,  # attribué ici : `bulk_create` ne passe pas par `Exercice.save()`
+        titre=donnees["titre"],
+        bareme=donnees.get("bareme"),
+        type_exercice=donnees.get("type_exercice", "programmation"),
+        enonce=donnees.get("enonce"),
+        enonce_code=donnees.get("enonce_code"),
+        avec_jeu_de_test=donnees.get("avec_jeu_de_test", False),
+        separateur_jeu_test=donnees.get("separateur_jeu_test"),
+        separateur_reponse_jeudetest=donnees.get("separateur_reponse_jeudetest"),
+        retour_en_direct=donnees.get("retour_en_direct", False),
+        code_a_soumettre=donnees.get("code_a_soumettre", "python"),
+        nombre_max_soumissions=donnees.get("nombre_max_soumissions", 50),
+    )
+
+
+def importer_epreuve(fichier: IO[bytes], referent: User,
+                     progression: Optional[Progression] = None) -> ResultatImport:
+    """
+    Importe une épreuve depuis un fichier JSON ouvert en binaire (et qu'on peut relire).
+
+    L'épreuve importée est nommée « import de <nom> », suivi de « (2) », « (3) »... si ce nom est
+    déjà pris (voir `Epreuve.generer_nom_disponible`) ; `referent` en devient le référent,
+    le seul membre du comité et l'auteur de tous les exercices.
+
+    Args:
+        fichier (IO[bytes]): Le fichier JSON, parcouru deux fois.
+        referent (User): L'organisateur qui importe l'épreuve.
+        progression (Optional[Progression]): Appelé après chaque lot inséré.
+
+    Returns:
+        ResultatImport: L'épreuve créée et le nombre d'objets importés.
+
+    Raises:
+        json.JSONDecodeError: Si le fichier n'est pas un JSON valide.
+        EpreuveJsonInvalide: Si le JSON ne décrit pas une épreuve importable.
+    """
+    entete, nb_exercices, nb_jeux = valider_fichier(fichier)
+    total: int = nb_exercices + nb_jeux
+    nb_crees: int = 0
+
+    with transaction.atomic():
+        epreuve: Epreuve = Epreuve.objects.create(
+            nom=Epreuve.generer_nom_disponible(f"import de {entete['nom']}", referent),
+            date_debut=_date(entete, "date_debut"),
+            date_fin=_date(entete, "date_fin"),
+            duree=entete.get("duree"),
+            referent=referent,
+            exercices_un_par_un=entete.get("exercices_un_par_un", False),
+            temps_limite=entete.get("temps_limite", False),
+            inscription_externe=False,
+        )
+        MembreComite.objects.create(epreuve=epreuve, membre=referent)
+
+        lot: List[Tuple[Exercice, List[JeuDeTest]]] = []
+        taille_lot: int = 0
+
+        def inserer_lot() -> None:
+            nonlocal nb_crees, taille_lot
+            Exercice.objects.bulk_create([exercice for exercice, _ in lot])
+            jeux: List[JeuDeTest] = []
+            for exercice, jeux_exercice in lot:
+                for jeu in jeux_exercice:
+                    jeu.exercice = exercice
+                    jeux.append(jeu)
+            JeuDeTest.objects.bulk_create(jeux, batch_size=TAILLE_LOT)
+            nb_crees += taille_lot
+            lot.clear()
+            taille_lot = 0
+            if progression is not None:
+                progression(nb_crees, total)
+
+        numero: int = 0
+        for cle, donnees in _parcourir_fichier(fichier):
+            if cle != "exercice":
+                continue
+            numero += 1
+            exercice: Exercice = _nouvel_exercice(epreuve, referent, numero, donnees)
+            jeux_exercice: List[JeuDeTest] = []
+            if exercice.avec_jeu_de_test:
+                for jeu_donnees in donnees.get("jeux_de_test", []):
+                    jeu = JeuDeTest(instance=jeu_donnees["instance"], reponse=jeu_donnees["reponse"])
+                    jeu.calculer_empreinte()
+                    jeux_exercice.append(jeu)
+            lot.append((exercice, jeux_exercice))
+            taille_lot += 1 + len(jeux_exercice)
+            if taille_lot >= TAILLE_LOT:
+                inserer_lot()
+        if lot:
+            inserer_lot()
+
+        # `bulk_create` n'envoie pas les signaux post_save des exercices
+        invalider_contenu_exercices(epreuve.id)
+        invalider_donnees_export(epreuve.id)
+
+    return ResultatImport(epreuve=epreuve, nb_exercices=nb_exercices, nb_jeux_de_test=nb_jeux)
@@ -0,0 +1,280 @@
+"""
+Journal local des soumissions (mode « write-behind »).
+
+Quand `SOUMISSIONS_WRITE_BEHIND` est activé, une soumission n'écrit plus dans `User_Exercice` :
+elle est ajoutée à un journal SQLite (mode WAL, partagé par tous les workers de la machine)
+et acquittée immédiatement. La commande `vider_journal_soumissions` fusionne ensuite le dernier
+état de chaque couple (participant, exercice) et l'applique en base avec un `bulk_update`.
+
+Le nombre maximal de soumissions est vérifié contre un compteur tenu dans le journal,
+initialisé à partir de la valeur en base à la première soumission. Le compteur est conservé
+jusqu'à la fin de l'épreuve (plus `MARGE_PURGE_COMPTEURS`) : le purger plus tôt laisserait une
+requête en cours le réinitialiser depuis un `UserExercice` lu avant le vidage, donc périmé.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from epreuve.models import UserExercice
+from epreuve.services.scores import recalculer_reponses_correctes
+from epreuve.utils import invalider_donnees_export
+
+# Délai après la fin d'une épreuve avant la purge de ses compteurs (requêtes encore en vol)
+MARGE_PURGE_COMPTEURS: timedelta = timedelta(minutes=5)
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS soumissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_exercice_id INTEGER NOT NULL,
+    participant_id INTEGER NOT NULL,
+    exercice_id INTEGER NOT NULL,
+    code TEXT,
+    solution TEXT,
+    nb_soumissions INTEGER NOT NULL,
+    horodatage REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS soumissions_user_exercice ON soumissions (user_exercice_id, id);
+CREATE TABLE IF NOT EXISTS compteurs (
+    user_exercice_id INTEGER PRIMARY KEY,
+    nb_soumissions INTEGER NOT NULL,
+    fin_epreuve REAL
+);
+"""
+
+
+@dataclass(frozen=True)
+class EtatEnAttente:
+    """Dernier état journalisé (pas encore appliqué en base) d'un UserExercice."""
+    code_participant: Optional[str]
+    solution_instance_participant: Optional[str]
+    nb_soumissions: int
+
+
+class JournalSoumissions:
+    """
+    Journal append-only des soumissions, stocké dans un fichier SQLite en mode WAL.
+
+    Une connexion est ouverte par thread et par processus (les connexions SQLite ne
+    survivent pas à un fork des workers gunicorn).
+    """
+
+    def __init__(self, chemin: str) -> None:
+        self.chemin: str = chemin
+        self._local = threading.local()
+
+    def _connexion(self) -> sqlite3.Connection:
+        connexion: Optional[sqlite3.Connection] = getattr(self._local, "connexion", None)
+        if connexion is not None and getattr(self._local, "pid", None) == os.getpid():
+            return connexion
+
+        dossier: str = os.path.dirname(self.chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        connexion = sqlite3.connect(self.chemin, timeout=30, isolation_level=None)
+        connexion.execute("PRAGMA journal_mode=WAL")
+        # NORMAL : une entrée acquittée survit à l'arrêt brutal du processus (le cas visé).
+        connexion.execute("PRAGMA synchronous=NORMAL")
+        connexion.executescript(_SCHEMA)
+        colonnes = {ligne[1] for ligne in connexion.execute("PRAGMA table_info(compteurs)")}
+        if "fin_epreuve" not in colonnes:
+            # Journal créé par une version précédente : ses compteurs ne seront jamais purgés
+            connexion.execute("ALTER TABLE compteurs ADD COLUMN fin_epreuve REAL")
+        self._local.connexion = connexion
+        self._local.pid = os.getpid()
+        return connexion
+
+    def ajouter(
+            self,
+            user_exercice: UserExercice,
+            nb_max: int,
+            code: str,
+            solution: str,
+    ) -> Optional[int]:
+        """
+        Journalise une soumission si le maximum n'est pas atteint.
+
+        Args:
+            user_exercice (UserExercice): Le UserExercice chargé depuis la base avec son
+                exercice et son épreuve (sert à initialiser le compteur à la première soumission).
+            nb_max (int): Le nombre maximal de soumissions de l'exercice.
+            code (str): Le code soumis.
+            solution (str): La réponse au jeu de test.
+
+        Returns:
+            Optional[int]: Le nombre de soumissions après celle-ci, ou None si le maximum est atteint.
+        """
+        connexion = self._connexion()
+        connexion.execute("BEGIN IMMEDIATE")
+        try:
+            connexion.execute(
+                "INSERT OR IGNORE INTO compteurs (user_exercice_id, nb_soumissions, fin_epreuve) VALUES (?, ?, ?)",
+                (user_exercice.id, user_exercice.nb_soumissions,
+                 user_exercice.exercice.epreuve.date_fin.timestamp()),
+            )
+            curseur = connexion.execute(
+                "UPDATE compteurs SET nb_soumissions = nb_soumissions + 1 "
+                "WHERE user_exercice_id = ? AND nb_soumissions < ?",
+                (user_exercice.id, nb_max),
+            )
+            if curseur.rowcount == 0:
+                connexion.execute("ROLLBACK")
+                return None
+
+            nb_soumissions: int = connexion.execute(
+                "SELECT nb_soumissions FROM compteurs WHERE user_exercice_id = ?", (user_exercice.id,)
+            ).fetchone()[0]
+            connexion.execute(
+                "INSERT INTO soumissions "
+                "(user_exercice_id, participant_id, exercice_id, code, solution, nb_soumissions, horodatage) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (user_exercice.id, user_exercice.participant_id, user_exercice.exercice_id,
+                 code, solution, nb_soumissions, time.time()),
+            )
+            connexion.execute("COMMIT")
+        except BaseException:
+            connexion.execute("ROLLBACK")
+            raise
+        return nb_soumissions
+
+    def etats_en_attente(self, user_exercice_ids: Iterable[int]) -> Dict[int, EtatEnAttente]:
+        """
+        Renvoie le dernier état journalisé des UserExercice donnés, pour ceux qui ont
+        des soumissions pas encore appliquées en base.
+        """
+        ids: List[int] = list(user_exercice_ids)
+        if not ids:
+            return {}
+        marqueurs: str = ",".join("?" * len(ids))
+        lignes = self._connexion().execute(
+            "SELECT s.user_exercice_id, s.code, s.solution, s.nb_soumissions FROM soumissions s "
+            f"JOIN (SELECT MAX(id) AS id FROM soumissions WHERE user_exercice_id IN ({marqueurs}) "
+            "GROUP BY user_exercice_id) d ON s.id = d.id",
+            ids,
+        ).fetchall()
+        return {ligne[0]: EtatEnAttente(ligne[1], ligne[2], ligne[3]) for ligne in lignes}
+
+    def nb_en_attente(self) -> int:
+        """Nombre d'entrées du journal pas encore appliquées en base."""
+        return self._connexion().execute("SELECT COUNT(*) FROM soumissions").fetchone()[0]
+
+    def nb_compteurs(self) -> int:
+        """Nombre de compteurs de soumissions tenus par le journal."""
+        return self._connexion().execute("SELECT COUNT(*) FROM compteurs").fetchone()[0]
+
+    def _purger(self, id_max: int) -> None:
+        """
+        Retire les entrées appliquées (jusqu'à `id_max`) et les compteurs des épreuves
+        terminées depuis plus de `MARGE_PURGE_COMPTEURS`, qui ne reçoivent plus de soumissions.
+        """
+        limite: float = (timezone.now() - MARGE_PURGE_COMPTEURS).timestamp()
+        connexion = self._connexion()
+        connexion.execute("BEGIN IMMEDIATE")
+        try:
+            connexion.execute(
+                "DELETE FROM compteurs WHERE fin_epreuve < ? "
+                "AND user_exercice_id NOT IN (SELECT user_exercice_id FROM soumissions WHERE id > ?)",
+                (limite, id_max),
+            )
+            connexion.execute("DELETE FROM soumissions WHERE id <= ?", (id_max,))
+            connexion.execute("COMMIT")
+        except BaseException:
+            connexion.execute("ROLLBACK")
+            raise
+
+    def vider(self, taille_lot: int = 1000) -> int:
+        """
+        Applique en base le dernier état de chaque couple (participant, exercice) présent
+        dans le journal, puis retire les entrées appliquées et les compteurs des épreuves terminées.
+
+        L'opération est idempotente : si le processus s'arrête entre le `bulk_update` et la
+        purge, le prochain appel réapplique le même état. C'est ce qui sert de reprise
+        après incident au démarrage du flusher.
+
+        Returns:
+            int: Le nombre de UserExercice mis à jour.
+        """
+        connexion = self._connexion()
+        id_max: Optional[int] = connexion.execute("SELECT MAX(id) FROM soumissions").fetchone()[0]
+        if id_max is None:
+            self._purger(0)
+            return 0
+
+        lignes = connexion.execute(
+            "SELECT s.user_exercice_id, s.code, s.solution, s.nb_soumissions FROM soumissions s "
+            "JOIN (SELECT MAX(id) AS id FROM soumissions WHERE id <= ? GROUP BY user_exercice_id) d "
+            "ON s.id = d.id",
+            (id_max,),
+        ).fetchall()
+
+        a_mettre_a_jour: List[UserExercice] = [
+            UserExercice(id=ligne[0], code_participant=ligne[1], solution_instance_participant=ligne[2],
+                         nb_soumissions=ligne[3])
+            for ligne in lignes
+        ]
+        UserExercice.objects.bulk_update(
+            a_mettre_a_jour,
+            ["code_participant", "solution_instance_participant", "nb_soumissions"],
+            batch_size=taille_lot,
+        )
+        appliques: QuerySet[UserExercice] = UserExercice.objects.filter(id__in=[ue.id for ue in a_mettre_a_jour])
+        # La correction des réponses dépend du jeu de test, absent du journal : on la recalcule ici
+        recalculer_reponses_correctes(appliques)
+        for epreuve_id in appliques.values_list("exercice__epreuve_id", flat=True).distinct():
+            invalider_donnees_export(epreuve_id)
+
+        self._purger(id_max)
+        return len(a_mettre_a_jour)
+
+    def boucle(self, intervalle_ms: int, continuer: Callable[[], bool],
+               rapport: Optional[Callable[[int], None]] = None) -> None:
+        """
+        Vide le journal toutes les `intervalle_ms` millisecondes tant que `continuer()` est vrai.
+        """
+        while continuer():
+            nb: int = self.vider()
+            if nb and rapport is not None:
+                rapport(nb)
+            time.sleep(intervalle_ms / 1000)
+
+
+_journaux: Dict[str, JournalSoumissions] = {}
+
+
+def write_behind_actif() -> bool:
+    """Indique si les soumissions passent par le journal local."""
+    return bool(getattr(settings, "SOUMISSIONS_WRITE_BEHIND", False))
+
+
+def get_journal() -> JournalSoumissions:
+    """Renvoie le journal configuré par `SOUMISSIONS_JOURNAL_CHEMIN`."""
+    chemin: str = settings.SOUMISSIONS_JOURNAL_CHEMIN
+    journal: Optional[JournalSoumissions] = _journaux.get(chemin)
+    if journal is None:
+        journal = _journaux.setdefault(chemin, JournalSoumissions(chemin))
+    return journal
+
+
+def appliquer_etats_en_attente(user_exercices: Iterable[UserExercice]) -> None:
+    """
+    Reporte sur les objets fournis les soumissions encore dans le journal, pour que
+    l'affichage du participant reflète sa dernière soumission même avant le vidage.
+    Sans effet si le mode write-behind est désactivé.
+    """
+    if not write_behind_actif():
+        return
+    par_id: Dict[int, UserExercice] = {ue.id: ue for ue in user_exercices}
+    for user_exercice_id, etat in get_journal().etats_en_attente(par_id.keys()).items():
+        user_exercice: UserExercice = par_id[user_exercice_id]
+        user_exercice.code_participant = etat.code_participant
+        user_exercice.solution_instance_participant = etat.solution_instance_participant
+        user_exercice.nb_soumissions = etat.nb_soumissions
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import random
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Union
+
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+
+from epreuve.models import Exercice, JeuDeTest, UserExercice
+from epreuve.services.contenu_exercices import ContenuExercice
+
+
+def _requete_user_exercices(participant: User, exercices_ids: List[int]) -> QuerySet[UserExercice]:
+    return (
+        UserExercice.objects
+        .filter(participant=participant, exercice_id__in=exercices_ids)
+        .select_related("jeu_de_test")
+    )
+
+
+def charger_user_exercices(
+        participant: User,
+        exercices: Sequence[Union[Exercice, ContenuExercice]],
+) -> Dict[int, UserExercice]:
+    """
+    Renvoie les UserExercice du participant pour les exercices donnés, en créant les lignes
+    manquantes et en attribuant un jeu de test aléatoire là où il en manque un.
+
+    Le nombre de requêtes ne dépend pas du nombre d'exercices : une lecture lorsque tout
+    est déjà en place, cinq au plus lors de la première visite (lecture, identifiants des
+    jeux de test, `bulk_update`, `bulk_create`, relecture).
+
+    Args:
+        participant (User): Le participant.
+        exercices (Sequence[Union[Exercice, ContenuExercice]]): Les exercices de l'épreuve
+            (seuls `id` et `avec_jeu_de_test` sont utilisés).
+
+    Returns:
+        Dict[int, UserExercice]: Les UserExercice indexés par identifiant d'exercice,
+        avec leur jeu de test déjà chargé.
+    """
+    exercices_ids: List[int] = [exercice.id for exercice in exercices]
+    par_exercice: Dict[int, UserExercice] = {
+        ue.exercice_id: ue for ue in _requete_user_exercices(participant, exercices_ids)
+    }
+
+    a_creer: List[Union[Exercice, ContenuExercice]] = [ex for ex in exercices if ex.id not in par_exercice]
+    sans_jeu: List[UserExercice] = [
+        ue for ue in par_exercice.values() if ue.jeu_de_test_id is None
+    ]
+    exercices_a_tirer: List[int] = [ex.id for ex in a_creer if ex.avec_jeu_de_test]
+    avec_jeu_de_test: Dict[int, bool] = {ex.id: ex.avec_jeu_de_test for ex in exercices}
+    exercices_a_tirer += [ue.exercice_id for ue in sans_jeu if avec_jeu_de_test[ue.exercice_id]]
+
+    if not a_creer and not exercices_a_tirer:
+        return par_exercice
+
+    # Tirage aléatoire d'un jeu de test par exercice, sur les seuls identifiants
+    jeux_par_exercice: Dict[int, List[int]] = defaultdict(list)
+    if exercices_a_tirer:
+        for jeu_id, exercice_id in JeuDeTest.objects.filter(
+                exercice_id__in=exercices_a_tirer).values_list("id", "exercice_id"):
+            jeux_par_exercice[exercice_id].append(jeu_id)
+
+    def tirer(exercice_id: int) -> Optional[int]:
+        jeux: List[int] = jeux_par_exercice.get(exercice_id, [])
+        return random.choice(jeux) if jeux else None
+
+    a_mettre_a_jour: List[UserExercice] = []
+    for ue in sans_jeu:
+        if avec_jeu_de_test[ue.exercice_id]:
+            ue.jeu_de_test_id = tirer(ue.exercice_id)
+            if ue.jeu_de_test_id is not None:
+                a_mettre_a_jour.append(ue)
+    if a_mettre_a_jour:
+        UserExercice.objects.bulk_update(a_mettre_a_jour, ["jeu_de_test"])
+
+    if a_creer:
+        # ignore_conflicts : un autre onglet a pu créer la ligne entre-temps
+        UserExercice.objects.bulk_create(
+            [UserExercice(participant=participant, exercice_id=ex.id,
+                          jeu_de_test_id=tirer(ex.id) if ex.avec_jeu_de_test else None)
+             for ex in a_creer],
+            ignore_conflicts=True,
+        )
+
+    return {ue.exercice_id: ue for ue in _requete_user_exercices(participant, exercices_ids)}
@@ -0,0 +1,80 @@
+"""
+Préchauffage d'une épreuve avant son ouverture.
+
+Sans préchauffage, les lignes `UserEpreuve` / `UserExercice` et l'attribution des jeux de test
+sont créées à la première visite de chaque participant : le pic de lecture de l'ouverture est
+aussi un pic d'écriture. `prechauffer_epreuve` fait ce travail à l'avance, en masse, et remplit
+les caches lus par les pages de l'épreuve. L'opération est idempotente.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+
+from epreuve.models import Epreuve
+from epreuve.services.attribution_jeux import ResultatInscription, inscrire_participants_epreuve
+from epreuve.services.contenu_exercices import get_contenu_exercices
+from epreuve.utils import get_cache_key_nombre_participants
+from intranet.models import get_cache_key_nombre_participants_groupe
+
+
+@dataclass(frozen=True)
+class RapportPrechauffage:
+    """
+    Bilan du préchauffage d'une épreuve.
+    """
+    epreuve_id: int
+    nb_participants: int
+    nb_exercices: int
+    user_epreuves_crees: int
+    user_exercices_crees: int
+    jeux_de_test_attribues: int
+    nb_groupes: int
+
+
+def prechauffer_epreuve(epreuve: Epreuve) -> RapportPrechauffage:
+    """
+    Prépare une épreuve pour son ouverture :
+
+    - crée les `UserEpreuve` et `UserExercice` manquants de tous les participants inscrits ;
+    - attribue les jeux de test manquants ;
+    - recalcule les caches du nombre de participants (épreuve et groupes) et le contenu
+      des exercices affiché aux participants.
+
+    Peut être relancée sans risque : seules les lignes manquantes sont créées.
+
+    Args:
+        epreuve (Epreuve): L'épreuve à préparer.
+
+    Returns:
+        RapportPrechauffage: Ce qui a été fait.
+    """
+    participants_ids: List[int] = list(
+        User.objects.filter(appartenances__groupe__epreuves=epreuve).values_list("id", flat=True).distinct()
+    )
+
+    with transaction.atomic():
+        resultat: ResultatInscription = inscrire_participants_epreuve(epreuve.id, participants_ids)
+
+    # Caches : recalculés à partir de la base plutôt que simplement conservés
+    cache.delete(get_cache_key_nombre_participants(epreuve.id))
+    epreuve.compte_participants_inscrits()
+    groupes = list(epreuve.groupes_participants.all())
+    cache.delete_many([get_cache_key_nombre_participants_groupe(groupe.id) for groupe in groupes])
+    for groupe in groupes:
+        groupe.get_nombre_participants()
+    get_contenu_exercices(epreuve)
+
+    return RapportPrechauffage(
+        epreuve_id=epreuve.id,
+        nb_participants=len(participants_ids),
+        nb_exercices=epreuve.get_exercices().count(),
+        user_epreuves_crees=resultat.nb_inscrits,
+        user_exercices_crees=resultat.nb_user_exercices_crees,
+        jeux_de_test_attribues=resultat.nb_jeux_attribues,
+        nb_groupes=len(groupes),
+    )
@@ -0,0 +1,190 @@
+"""
+Résultats détaillés d'une épreuve pour les organisateurs, page par page.
+
+Les lignes (une par `UserExercice`) sont paginées par clé (« keyset ») : le curseur encode les
+valeurs de tri de la dernière ligne renvoyée et la page suivante reprend strictement après. Le
+coût d'une page ne dépend donc ni de sa position ni de la taille de l'épreuve, contrairement à
+un `OFFSET`. Le code soumis et l'instance du jeu de test, volumineux, ne sont renvoyés que par
+`detail_resultat`, à la demande.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+
+from epreuve.models import Epreuve, UserExercice
+
+TAILLE_PAGE_DEFAUT: int = 50
+TAILLE_PAGE_MAX: int = 200
+
+# Tris proposés : nom -> champs (uniques ensemble, ce qui rend le curseur non ambigu)
+TRIS: Dict[str, Tuple[str, str]] = {
+    "equipe": ("participant__username", "exercice_id"),
+    "exercice": ("exercice_id", "participant__username"),
+}
+
+# Type attendu, dans un curseur, de la valeur de chaque champ de tri
+_TYPES_CHAMPS: Dict[str, type] = {
+    "participant__username": str,
+    "exercice_id": int,
+}
+
+
+@dataclass(frozen=True)
+class PageResultats:
+    """
+    Une page de résultats et le curseur de la suivante (None s'il n'y en a plus).
+    """
+    lignes: List[Dict[str, Any]]
+    curseur_suivant: Optional[str]
+
+
+def _encoder_curseur(valeurs: List[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(valeurs).encode()).decode()
+
+
+def _decoder_curseur(curseur: str, champs: Tuple[str, str]) -> List[Any]:
+    """
+    Raises:
+        ValueError: Si le curseur n'a pas été produit par `_encoder_curseur` pour ces champs de tri.
+    """
+    try:
+        valeurs = json.loads(base64.urlsafe_b64decode(curseur.encode()))
+    except (ValueError, TypeError) as erreur:
+        raise ValueError("Curseur invalide") from erreur
+    if not isinstance(valeurs, list) or len(valeurs) != len(champs):
+        raise ValueError("Curseur invalide")
+    for valeur, champ in zip(valeurs, champs):
+        # bool est une sous-classe d'int : `true` n'est pas un identifiant
+        if isinstance(valeur, bool) or not isinstance(valeur, _TYPES_CHAMPS[champ]):
+            raise ValueError("Curseur invalide")
+    return valeurs
+
+
+def _apres(champs: Tuple[str, str], valeurs: List[Any], decroissant: bool) -> Q:
+    """
+    Condition « strictement après (a, b) » dans l'ordre de tri.
+    """
+    operateur: str = "lt" if decroissant else "gt"
+    premier, second = champs
+    return (Q(**{f"{premier}__{operateur}": valeurs[0]})
+            | Q(**{premier: valeurs[0], f"{second}__{operateur}": valeurs[1]}))
+
+
+def _filtrer(
+        epreuve: Epreuve,
+        exercice_id: Optional[int],
+        groupe_id: Optional[int],
+        participant_id: Optional[int],
+        correct: Optional[bool],
+) -> QuerySet[UserExercice]:
+    user_exercices: QuerySet[UserExercice] = UserExercice.objects.filter(
+        exercice__epreuve=epreuve, exercice__avec_jeu_de_test=True,
+    )
+    if exercice_id is not None:
+        user_exercices = user_exercices.filter(exercice_id=exercice_id)
+    if groupe_id is not None:
+        user_exercices = user_exercices.filter(participant__appartenances__groupe_id=groupe_id)
+    if participant_id is not None:
+        user_exercices = user_exercices.filter(participant_id=participant_id)
+    if correct is not None:
+        user_exercices = user_exercices.filter(reponse_correcte=correct)
+    return user_exercices
+
+
+def lister_resultats(
+        epreuve: Epreuve,
+        exercice_id: Optional[int] = None,
+        groupe_id: Optional[int] = None,
+        participant_id: Optional[int] = None,
+        correct: Optional[bool] = None,
+        tri: str = "equipe",
+        curseur: Optional[str] = None,
+        taille: int = TAILLE_PAGE_DEFAUT,
+) -> PageResultats:
+    """
+    Renvoie une page de résultats (colonnes de synthèse uniquement), en une requête.
+
+    Args:
+        epreuve (Epreuve): L'épreuve concernée.
+        exercice_id, groupe_id, participant_id (Optional[int]): Filtres facultatifs.
+        correct (Optional[bool]): Ne garder que les réponses justes (True) ou fausses (False).
+        tri (str): Une clé de `TRIS`, précédée de '-' pour l'ordre décroissant.
+        curseur (Optional[str]): Le `curseur_suivant` de la page précédente.
+        taille (int): Nombre de lignes (borné à `TAILLE_PAGE_MAX`).
+
+    Returns:
+        PageResultats: Les lignes et le curseur de la page suivante.
+
+    Raises:
+        ValueError: Si le tri ou le curseur est invalide.
+    """
+    decroissant: bool = tri.startswith("-")
+    champs: Optional[Tuple[str, str]] = TRIS.get(tri.lstrip("-"))
+    if champs is None:
+        raise ValueError(f"Tri inconnu : {tri}")
+    taille = max(1, min(taille, TAILLE_PAGE_MAX))
+
+    user_exercices = _filtrer(epreuve, exercice_id, groupe_id, participant_id, correct)
+    if curseur:
+        user_exercices = user_exercices.filter(_apres(champs, _decoder_curseur(curseur, champs), decroissant))
+
+    prefixe: str = "-" if decroissant else ""
+    lignes: List[Dict[str, Any]] = list(
+        user_exercices
+        .order_by(*(prefixe + champ for champ in champs))
+        .values(
+            "id", "participant_id", "participant__username", "exercice_id", "exercice__titre",
+            "solution_instance_participant", "jeu_de_test__reponse", "reponse_correcte", "nb_soumissions",
+        )[:taille + 1]
+    )
+
+    curseur_suivant: Optional[str] = None
+    if len(lignes) > taille:
+        lignes = lignes[:taille]
+        derniere: Dict[str, Any] = lignes[-1]
+        curseur_suivant = _encoder_curseur([derniere[champ] for champ in champs])
+
+    return PageResultats(
+        lignes=[
+            {
+                "id": ligne["id"],
+                "participantId": ligne["participant_id"],
+                "username": ligne["participant__username"],
+                "exerciceId": ligne["exercice_id"],
+                "exerciceTitre": ligne["exercice__titre"],
+                "solution": ligne["solution_instance_participant"] or "N/A",
+                "expected": ligne["jeu_de_test__reponse"] or "N/A",
+                "correct": ligne["reponse_correcte"],
+                "nbSoumissions": ligne["nb_soumissions"],
+            }
+            for ligne in lignes
+        ],
+        curseur_suivant=curseur_suivant,
+    )
+
+
+def detail_resultat(epreuve: Epreuve, user_exercice_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Renvoie le code soumis et l'instance du jeu de test d'une ligne de résultats.
+
+    Returns:
+        Optional[Dict[str, Any]]: Le détail, ou None si la ligne n'appartient pas à l'épreuve.
+    """
+    ligne: Optional[Dict[str, Any]] = (
+        UserExercice.objects
+        .filter(id=user_exercice_id, exercice__epreuve=epreuve)
+        .values("id", "code_participant", "jeu_de_test__instance")
+        .first()
+    )
+    if ligne is None:
+        return None
+    return {
+        "id": ligne["id"],
+        "code": ligne["code_participant"] or "N/A",
+        "test": ligne["jeu_de_test__instance"] or "N/A",
+    }
@@ -0,0 +1,126 @@
+"""
+Scores des participants, maintenus au fil des soumissions.
+
+Chaque `UserExercice` porte `reponse_correcte` (la dernière réponse soumise est-elle juste pour
+le jeu de test attribué ?) et chaque `UserEpreuve` porte `nb_bonnes_reponses`, le nombre de ses
+exercices corrects. La soumission met à jour les deux ; les pages organisateur et les exports
+lisent directement ces colonnes au lieu de revalider toutes les réponses.
+
+Les fonctions de ce module recalculent ces valeurs quand elles ne peuvent pas l'être au fil de
+l'eau : modification des jeux de test d'un exercice, vidage du journal write-behind,
+reconstruction d'épreuves existantes (commande `reconstruire_scores`).
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.db.models import Count, IntegerField, OuterRef, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from epreuve.models import Epreuve, JeuDeTest, UserEpreuve, UserExercice
+from epreuve.utils import invalider_donnees_export
+
+TAILLE_LOT: int = 1000
+
+
+def est_reponse_correcte(avec_jeu_de_test: bool, jeu_de_test: Optional[JeuDeTest], solution: Optional[str]) -> bool:
+    """
+    Indique si une réponse soumise compte comme bonne réponse.
+
+    Args:
+        avec_jeu_de_test (bool): L'exercice attend-il une réponse à un jeu de test ?
+        jeu_de_test (Optional[JeuDeTest]): Le jeu de test attribué au participant.
+        solution (Optional[str]): La dernière réponse soumise.
+
+    Returns:
+        bool: Vrai si la réponse est non vide et valide pour le jeu de test.
+    """
+    return bool(avec_jeu_de_test and jeu_de_test is not None and solution
+                and jeu_de_test.est_reponse_valide(solution))
+
+
+def recompter_bonnes_reponses(epreuve_id: int, participant_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recalcule `nb_bonnes_reponses` à partir des `UserExercice`, en une seule requête.
+
+    Args:
+        epreuve_id (int): L'épreuve concernée.
+        participant_ids (Optional[Iterable[int]]): Les participants à recompter (tous par défaut).
+
+    Returns:
+        int: Le nombre de UserEpreuve mis à jour.
+    """
+    nb_correctes = (
+        UserExercice.objects
+        .filter(participant_id=OuterRef("participant_id"), exercice__epreuve_id=epreuve_id, reponse_correcte=True)
+        .order_by()
+        .values("participant_id")
+        .annotate(nb=Count("id"))
+        .values("nb")
+    )
+    user_epreuves: QuerySet[UserEpreuve] = UserEpreuve.objects.filter(epreuve_id=epreuve_id)
+    if participant_ids is not None:
+        user_epreuves = user_epreuves.filter(participant_id__in=list(participant_ids))
+    nb_maj: int = user_epreuves.update(
+        nb_bonnes_reponses=Coalesce(Subquery(nb_correctes, output_field=IntegerField()), Value(0))
+    )
+    invalider_donnees_export(epreuve_id)
+    return nb_maj
+
+
+def recalculer_reponses_correctes(user_exercices: QuerySet[UserExercice]) -> int:
+    """
+    Recalcule `reponse_correcte` des UserExercice fournis, puis `nb_bonnes_reponses`
+    des participants dont au moins un exercice a changé.
+
+    Args:
+        user_exercices (QuerySet[UserExercice]): Les lignes à vérifier.
+
+    Returns:
+        int: Le nombre de UserExercice modifiés.
+    """
+    a_modifier: List[UserExercice] = []
+    participants_par_epreuve: Dict[int, Set[int]] = defaultdict(set)
+    lignes = (
+        user_exercices
+        .select_related("exercice", "jeu_de_test")
+        .only("id", "participant", "solution_instance_participant", "reponse_correcte",
+              "exercice__avec_jeu_de_test", "exercice__epreuve",
+              "jeu_de_test__reponse", "jeu_de_test__empreinte")
+    )
+    for ue in lignes.iterator(chunk_size=TAILLE_LOT):
+        correcte: bool = est_reponse_correcte(ue.exercice.avec_jeu_de_test, ue.jeu_de_test,
+                                              ue.solution_instance_participant)
+        if correcte != ue.reponse_correcte:
+            ue.reponse_correcte = correcte
+            a_modifier.append(ue)
+            participants_par_epreuve[ue.exercice.epreuve_id].add(ue.participant_id)
+
+    UserExercice.objects.bulk_update(a_modifier, ["reponse_correcte"], batch_size=TAILLE_LOT)
+    for epreuve_id, participant_ids in participants_par_epreuve.items():
+        recompter_bonnes_reponses(epreuve_id, participant_ids)
+    return len(a_modifier)
+
+
+def recalculer_scores_exercice(exercice_id: int) -> int:
+    """
+    Recalcule les scores après modification des jeux de test (ou de `avec_jeu_de_test`) d'un exercice.
+
+    Returns:
+        int: Le nombre de UserExercice modifiés.
+    """
+    return recalculer_reponses_correctes(UserExercice.objects.filter(exercice_id=exercice_id))
+
+
+def reconstruire_scores_epreuve(epreuve: Epreuve) -> int:
+    """
+    Recalcule entièrement les scores d'une épreuve (reprise de données existantes).
+
+    Returns:
+        int: Le nombre de UserExercice modifiés.
+    """
+    nb_modifies: int = recalculer_reponses_correctes(UserExercice.objects.filter(exercice__epreuve=epreuve))
+    recompter_bonnes_reponses(epreuve.id)
+    return nb_modifies
+
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, UserEpreuve, UserExercice
+from epreuve.services.journal_soumissions import get_journal, write_behind_actif
+
+# Statuts possibles d'une soumission
+SOUMISSION_ENREGISTREE = "enregistree"
+SOUMISSION_EXERCICE_INTROUVABLE = "exercice_introuvable"
+SOUMISSION_HORS_DELAI = "hors_delai"
+SOUMISSION_MAX_ATTEINT = "max_atteint"
+
+
+@dataclass(frozen=True)
+class ResultatSoumission:
+    """
+    Résultat du traitement d'une soumission, indépendant de la réponse HTTP.
+    """
+    statut: str
+    exercice: Optional[Exercice] = None
+    nb_soumissions_restantes: int = 0
+    reponse_valide: Optional[bool] = None
+
+
+def _charger_user_exercice(participant: User, epreuve_id: int, exercice_id: Any) -> Optional[UserExercice]:
+    """
+    Charge en une seule requête le UserExercice du participant, avec son exercice,
+    l'épreuve de l'exercice, le jeu de test attribué et la date de début du participant
+    (annotée depuis UserEpreuve).
+
+    Returns:
+        Optional[UserExercice]: L'objet chargé, ou None si l'exercice n'existe pas dans cette
+        épreuve ou si le participant n'y est pas associé.
+    """
+    try:
+        exercice_id = int(exercice_id)
+    except (TypeError, ValueError):
+        return None
+
+    debut_epreuve = UserEpreuve.objects.filter(
+        participant_id=OuterRef("participant_id"),
+        epreuve_id=OuterRef("exercice__epreuve_id"),
+    ).values("debut_epreuve")[:1]
+
+    return (
+        UserExercice.objects
+        .select_related("exercice__epreuve", "jeu_de_test")
+        .annotate(debut_epreuve=Subquery(debut_epreuve))
+        .filter(participant=participant, exercice_id=exercice_id, exercice__epreuve_id=epreuve_id)
+        .first()
+    )
+
+
+def _demarrer_chrono_si_necessaire(participant: User, epreuve: Epreuve) -> UserEpreuve:
+    """
+    Fixe la date de début du participant si elle n'est pas encore définie (cas rare :
+    soumission sans passage préalable par la page de l'épreuve).
+    """
+    maintenant = timezone.now()
+    nb_maj: int = UserEpreuve.objects.filter(
+        participant=participant, epreuve=epreuve, debut_epreuve__isnull=True
+    ).update(debut_epreuve=maintenant)
+    if nb_maj:
+        return UserEpreuve(participant=participant, epreuve=epreuve, debut_epreuve=maintenant)
+
+    # Ligne absente, ou date fixée entre-temps par un autre onglet
+    user_epreuve, _ = UserEpreuve.objects.get_or_create(
+        participant=participant, epreuve=epreuve, defaults={"debut_epreuve": maintenant}
+    )
+    user_epreuve.epreuve = epreuve
+    return user_epreuve
+
+
+# Une seule instruction : écriture conditionnelle du UserExercice et, si la réponse passe de juste
+# à fausse ou inversement, ajustement de UserEpreuve.nb_bonnes_reponses. L'ancienne valeur de
+# `reponse_correcte` est lue sous verrou de ligne, ce qui reste exact face à un onglet concurrent.
+_SQL_ECRITURE_SOUMISSION: str = """
+WITH ancien AS (
+    SELECT id, reponse_correcte FROM "User_Exercice"
+    WHERE id = %(id)s AND nb_soumissions < %(nb_max)s
+    FOR UPDATE
+), maj AS (
+    UPDATE "User_Exercice" ue
+    SET code_participant = %(code)s, solution_instance_participant = %(solution)s,
+        nb_soumissions = ue.nb_soumissions + 1, reponse_correcte = %(correcte)s
+    FROM ancien WHERE ue.id = ancien.id
+    RETURNING ancien.reponse_correcte AS ancienne
+), score AS (
+    UPDATE "UserEpreuve"
+    SET nb_bonnes_reponses = nb_bonnes_reponses + CASE WHEN %(correcte)s THEN 1 ELSE -1 END
+    WHERE participant_id = %(participant_id)s AND epreuve_id = %(epreuve_id)s
+      AND EXISTS (SELECT 1 FROM maj WHERE maj.ancienne <> %(correcte)s)
+)
+SELECT COUNT(*) FROM maj
+"""
+
+
+def _ecrire_soumission(
+        user_exercice: UserExercice,
+        epreuve_id: int,
+        nb_max: int,
+        code_soumis: str,
+        solution_instance: str,
+        reponse_correcte: bool,
+) -> bool:
+    """
+    Enregistre la soumission si le maximum n'est pas atteint et tient le score à jour.
+
+    Returns:
+        bool: False si le nombre maximal de soumissions est déjà atteint.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_SQL_ECRITURE_SOUMISSION, {
+            "id": user_exercice.pk,
+            "nb_max": nb_max,
+            "code": code_soumis,
+            "solution": solution_instance,
+            "correcte": reponse_correcte,
+            "participant_id": user_exercice.participant_id,
+            "epreuve_id": epreuve_id,
+        })
+        return cursor.fetchone()[0] > 0
+
+
+def enregistrer_soumission(
+        participant: User,
+        epreuve_id: int,
+        exercice_id: Any,
+        code_soumis: str,
+        solution_instance: str,
+) -> ResultatSoumission:
+    """
+    Enregistre la soumission d'un participant pour un exercice.
+
+    Le chemin nominal coûte deux requêtes : une lecture jointe (exercice, épreuve, début
+    du participant, UserExercice et jeu de test) puis une écriture conditionnelle
+    `nb_soumissions = nb_soumissions + 1 WHERE nb_soumissions < max`. La condition est
+    évaluée par la base, ce qui empêche deux onglets concurrents de dépasser le maximum
+    ou d'écraser mutuellement le compteur.
+
+    La même instruction enregistre `reponse_correcte` et ajuste le total
+    `UserEpreuve.nb_bonnes_reponses` (voir `_SQL_ECRITURE_SOUMISSION`).
+
+    En mode write-behind (`SOUMISSIONS_WRITE_BEHIND`), l'écriture est remplacée par un
+    ajout au journal local, qui applique la même condition sur son propre compteur.
+
+    Args:
+        participant (User): Le participant qui soumet.
+        epreuve_id (int): L'épreuve ciblée par l'URL.
+        exercice_id: L'identifiant d'exercice envoyé par le client (non validé).
+        code_soumis (str): Le code soumis, déjà nettoyé.
+        solution_instance (str): La réponse au jeu de test.
+
+    Returns:
+        ResultatSoumission: Le statut de la soumission et les informations à renvoyer au client.
+    """
+    user_exercice: Optional[UserExercice] = _charger_user_exercice(participant, epreuve_id, exercice_id)
+    if user_exercice is None:
+        return ResultatSoumission(statut=SOUMISSION_EXERCICE_INTROUVABLE)
+
+    exercice: Exercice = user_exercice.exercice
+    epreuve: Epreuve = exercice.epreuve
+
+    if epreuve.pas_commencee() or epreuve.est_close():
+        return ResultatSoumission(statut=SOUMISSION_HORS_DELAI, exercice=exercice)
+
+    if epreuve.temps_limite:
+        if user_exercice.debut_epreuve is None:
+            user_epreuve = _demarrer_chrono_si_necessaire(participant, epreuve)
+        else:
+            user_epreuve = UserEpreuve(participant=participant, epreuve=epreuve,
+                                       debut_epreuve=user_exercice.debut_epreuve)
+        temps_restant: Optional[int] = user_epreuve.temps_restant()
+        if temps_restant is not None and temps_restant < 1:
+            return ResultatSoumission(statut=SOUMISSION_HORS_DELAI, exercice=exercice)
+
+    reponse_valide: Optional[bool] = None
+    if exercice.avec_jeu_de_test:
+        jeu_de_test = user_exercice.jeu_de_test
+        reponse_valide = jeu_de_test is not None and jeu_de_test.est_reponse_valide(solution_instance)
+    reponse_correcte: bool = bool(reponse_valide and solution_instance)
+
+    nb_max: int = exercice.nombre_max_soumissions
+    if write_behind_actif():
+        # Écriture différée : le journal local tient le compteur, la base est mise à jour par lots.
+        nb_soumissions: Optional[int] = get_journal().ajouter(user_exercice, nb_max, code_soumis, solution_instance)
+        if nb_soumissions is None:
+            return ResultatSoumission(statut=SOUMISSION_MAX_ATTEINT, exercice=exercice)
+    else:
+        if not _ecrire_soumission(user_exercice, epreuve.id, nb_max, code_soumis, solution_instance,
+                                  reponse_correcte):
+            return ResultatSoumission(statut=SOUMISSION_MAX_ATTEINT, exercice=exercice)
+        nb_soumissions = user_exercice.nb_soumissions + 1
+
+    return ResultatSoumission(
+        statut=SOUMISSION_ENREGISTREE,
+        exercice=exercice,
+        nb_soumissions_restantes=max(0, nb_max - nb_soumissions),
+        reponse_valide=reponse_valide,
+    )
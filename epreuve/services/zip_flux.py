@@ -0,0 +1,277 @@
+"""
+Écriture d'archives ZIP en flux, avec compression éventuellement répartie sur plusieurs processus.
+
+`iterer_zip` émet chaque entrée (en-tête local puis données compressées) dès qu'elle est
+produite. Le répertoire central, qui ne peut être écrit qu'à la fin, est sérialisé au fur et à
+mesure dans un fichier temporaire plutôt que conservé sous forme d'objets `ZipInfo` comme le
+fait `zipfile` : la mémoire consommée ne dépend pas du nombre de fichiers. Les extensions
+ZIP64 sont utilisées au-delà de 65 535 fichiers ou de 4 Go.
+
+Le contenu d'une entrée est soit un bloc (`str` ou `bytes`), compressé d'un coup, soit un
+itérable de morceaux `bytes`, compressé au fil de l'eau : sa taille n'étant pas connue à
+l'avance, elle est écrite après les données, dans un descripteur de données.
+
+Avec `processus > 1`, les blocs sont compressés par lots dans un pool de processus ; les
+lots sont réassemblés dans l'ordre et leur nombre en vol est borné. Les entrées trop petites
+pour gagner quoi que ce soit à la compression sont stockées telles quelles.
+
+Ce module n'importe pas Django : les processus du pool peuvent le charger seul, quelle que
+soit la méthode de démarrage de `multiprocessing`.
+"""
+from __future__ import annotations
+
+import struct
+import tempfile
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import IO, Deque, Iterable, Iterator, List, Optional, Tuple, Union
+
+Entree = Tuple[str, Union[str, bytes, Iterable[bytes]]]
+
+# Méthode de compression, CRC-32 et données (éventuellement compressées) d'une entrée
+EntreeCompressee = Tuple[int, int, bytes]
+
+# Entrée prête à écrire : nom encodé, puis taille et bloc compressé, ou None et morceaux à compresser
+_EntreePrete = Tuple[bytes, Optional[int], Union[EntreeCompressee, Iterable[bytes]]]
+
+# Taille du répertoire central gardée en mémoire avant de basculer sur disque
+TAILLE_INDEX_EN_MEMOIRE: int = 1024 * 1024
+
+# En deçà, une entrée est stockée sans compression (en-têtes deflate plus coûteux que le gain)
+TAILLE_MIN_COMPRESSION: int = 128
+
+# Nombre d'entrées confiées à la fois à un processus du pool
+TAILLE_LOT_COMPRESSION: int = 256
+
+# Structures du format ZIP (APPNOTE.TXT, sections 4.3.7 à 4.3.16)
+_EN_TETE_LOCAL = struct.Struct("<IHHHHHIIIHH")
+_DESCRIPTEUR = struct.Struct("<IIII")
+_DESCRIPTEUR_ZIP64 = struct.Struct("<IIQQ")
+_EN_TETE_CENTRAL = struct.Struct("<IHHHHHHIIIHHHHHII")
+_FIN_ZIP64 = struct.Struct("<IQHHIIQQQQ")
+_LOCALISATEUR_ZIP64 = struct.Struct("<IIQI")
+_FIN_REPERTOIRE = struct.Struct("<IHHHHIIH")
+
+_VERSION = 20
+_VERSION_ZIP64 = 45
+_DRAPEAU_UTF8 = 0x800
+_DRAPEAU_DESCRIPTEUR = 0x08  # tailles et CRC écrits après les données
+_FICHIER_UNIX = (3 << 8)  # système de création : Unix, pour que les droits ci-dessous soient lus
+_DROITS = 0o100644 << 16
+_MAX_16 = 0xFFFF
+_MAX_32 = 0xFFFFFFFF
+
+
+def _date_dos(instant: float) -> Tuple[int, int]:
+    t = time.localtime(instant)
+    return (t.tm_hour << 11 | t.tm_min << 5 | t.tm_sec // 2,
+            (t.tm_year - 1980) << 9 | t.tm_mon << 5 | t.tm_mday)
+
+
+def compresser(donnees: bytes, compression: int) -> EntreeCompressee:
+    """
+    Compresse le contenu d'une entrée, ou le garde tel quel s'il est trop petit ou incompressible.
+
+    Args:
+        donnees (bytes): Le contenu de l'entrée.
+        compression (int): `zipfile.ZIP_DEFLATED` ou `zipfile.ZIP_STORED`.
+
+    Returns:
+        EntreeCompressee: La méthode retenue, le CRC-32 du contenu et les données à écrire.
+    """
+    crc: int = zlib.crc32(donnees)
+    if compression == zipfile.ZIP_DEFLATED and len(donnees) >= TAILLE_MIN_COMPRESSION:
+        compresseur = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        donnees_compressees: bytes = compresseur.compress(donnees) + compresseur.flush()
+        if len(donnees_compressees) < len(donnees):
+            return zipfile.ZIP_DEFLATED, crc, donnees_compressees
+    return zipfile.ZIP_STORED, crc, donnees
+
+
+def _compresser_lot(lot: List[bytes], compression: int) -> List[EntreeCompressee]:
+    return [compresser(donnees, compression) for donnees in lot]
+
+
+def _est_bloc(contenu: object) -> bool:
+    return isinstance(contenu, (str, bytes))
+
+
+def _encoder(entree: Entree) -> Tuple[bytes, bytes]:
+    chemin, contenu = entree
+    return chemin.encode(), contenu.encode() if isinstance(contenu, str) else contenu
+
+
+def _compresser_en_serie(entrees: Iterable[Entree], compression: int) -> Iterator[_EntreePrete]:
+    for entree in entrees:
+        if not _est_bloc(entree[1]):
+            yield entree[0].encode(), None, entree[1]
+            continue
+        nom, donnees = _encoder(entree)
+        yield nom, len(donnees), compresser(donnees, compression)
+
+
+def _compresser_en_parallele(entrees: Iterable[Entree], compression: int, processus: int) -> Iterator[_EntreePrete]:
+    en_vol: Deque[Tuple[List[bytes], List[int], Future]] = deque()
+
+    with ProcessPoolExecutor(max_workers=processus) as pool:
+        lot: List[Tuple[bytes, bytes]] = []
+
+        def soumettre_lot() -> None:
+            contenus: List[bytes] = [donnees for _, donnees in lot]
+            en_vol.append(([nom for nom, _ in lot], [len(donnees) for donnees in contenus],
+                           pool.submit(_compresser_lot, contenus, compression)))
+            lot.clear()
+
+        def sortir_lot() -> Iterator[_EntreePrete]:
+            noms, tailles, resultat = en_vol.popleft()
+            yield from zip(noms, tailles, resultat.result())
+
+        for entree in entrees:
+            if not _est_bloc(entree[1]):
+                # Entrée en flux : compressée ici, après les lots qui la précèdent dans l'archive
+                if lot:
+                    soumettre_lot()
+                while en_vol:
+                    yield from sortir_lot()
+                yield entree[0].encode(), None, entree[1]
+                continue
+            lot.append(_encoder(entree))
+            if len(lot) >= TAILLE_LOT_COMPRESSION:
+                soumettre_lot()
+                # Deux lots par processus suffisent à les occuper ; au-delà, on ne ferait que consommer de la mémoire
+                if len(en_vol) >= 2 * processus:
+                    yield from sortir_lot()
+        if lot:
+            soumettre_lot()
+        while en_vol:
+            yield from sortir_lot()
+
+
+class _EcrivainZip:
+    """
+    Produit les octets de l'archive entrée par entrée et tient le répertoire central à jour.
+    """
+
+    def __init__(self, repertoire: IO[bytes]):
+        self._repertoire = repertoire
+        self._heure, self._date = _date_dos(time.time())
+        self.position: int = 0
+        self.nb_fichiers: int = 0
+
+    def _indexer(self, nom: bytes, drapeaux: int, methode: int, crc: int, taille_compressee: int,
+                 taille: int, decalage: int) -> None:
+        # Champs ZIP64 dans l'ordre imposé ; le champ 32 bits correspondant vaut alors 0xFFFFFFFF
+        champs_zip64: List[int] = [valeur for valeur in (taille, taille_compressee, decalage) if valeur >= _MAX_32]
+        extra: bytes = struct.pack(f"<HH{len(champs_zip64)}Q", 0x0001, 8 * len(champs_zip64),
+                                   *champs_zip64) if champs_zip64 else b""
+        version: int = _VERSION_ZIP64 if extra else _VERSION
+        self._repertoire.write(_EN_TETE_CENTRAL.pack(
+            0x02014b50, _FICHIER_UNIX | version, version, drapeaux, methode, self._heure, self._date,
+            crc, min(taille_compressee, _MAX_32), min(taille, _MAX_32), len(nom), len(extra), 0, 0, 0, _DROITS,
+            min(decalage, _MAX_32),
+        ) + nom + extra)
+        self.nb_fichiers += 1
+
+    def bloc(self, nom: bytes, taille: int, methode: int, crc: int, donnees: bytes) -> bytes:
+        """Écrit une entrée dont le contenu compressé est déjà connu."""
+        en_tete: bytes = _EN_TETE_LOCAL.pack(
+            0x04034b50, _VERSION, _DRAPEAU_UTF8, methode, self._heure, self._date,
+            crc, len(donnees), taille, len(nom), 0,
+        ) + nom
+        self._indexer(nom, _DRAPEAU_UTF8, methode, crc, len(donnees), taille, self.position)
+        self.position += len(en_tete) + len(donnees)
+        return en_tete + donnees
+
+    def flux(self, nom: bytes, morceaux: Iterable[bytes], compression: int) -> Iterator[bytes]:
+        """Écrit une entrée en compressant ses morceaux au fur et à mesure qu'ils arrivent."""
+        drapeaux: int = _DRAPEAU_UTF8 | _DRAPEAU_DESCRIPTEUR
+        decalage: int = self.position
+        en_tete: bytes = _EN_TETE_LOCAL.pack(
+            0x04034b50, _VERSION, drapeaux, compression, self._heure, self._date, 0, 0, 0, len(nom), 0,
+        ) + nom
+        self.position += len(en_tete)
+        yield en_tete
+
+        compresseur = (zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+                       if compression == zipfile.ZIP_DEFLATED else None)
+        crc: int = 0
+        taille: int = 0
+        taille_compressee: int = 0
+        for morceau in morceaux:
+            crc = zlib.crc32(morceau, crc)
+            taille += len(morceau)
+            sortie: bytes = compresseur.compress(morceau) if compresseur else morceau
+            if sortie:
+                taille_compressee += len(sortie)
+                yield sortie
+        if compresseur:
+            sortie = compresseur.flush()
+            taille_compressee += len(sortie)
+            yield sortie
+
+        if taille >= _MAX_32 or taille_compressee >= _MAX_32:
+            descripteur: bytes = _DESCRIPTEUR_ZIP64.pack(0x08074b50, crc, taille_compressee, taille)
+        else:
+            descripteur = _DESCRIPTEUR.pack(0x08074b50, crc, taille_compressee, taille)
+        self._indexer(nom, drapeaux, compression, crc, taille_compressee, taille, decalage)
+        self.position += taille_compressee + len(descripteur)
+        yield descripteur
+
+    def fin(self) -> Iterator[bytes]:
+        """Écrit le répertoire central et les enregistrements de fin d'archive."""
+        debut_repertoire: int = self.position
+        taille_repertoire: int = self._repertoire.tell()
+        self._repertoire.seek(0)
+        while morceau := self._repertoire.read(64 * 1024):
+            yield morceau
+
+        fin: bytes = b""
+        if self.nb_fichiers >= _MAX_16 or debut_repertoire >= _MAX_32 or taille_repertoire >= _MAX_32:
+            fin += _FIN_ZIP64.pack(
+                0x06064b50, _FIN_ZIP64.size - 12, _VERSION_ZIP64, _VERSION_ZIP64, 0, 0,
+                self.nb_fichiers, self.nb_fichiers, taille_repertoire, debut_repertoire,
+            )
+            fin += _LOCALISATEUR_ZIP64.pack(0x07064b50, 0, debut_repertoire + taille_repertoire, 1)
+        fin += _FIN_REPERTOIRE.pack(
+            0x06054b50, 0, 0, min(self.nb_fichiers, _MAX_16), min(self.nb_fichiers, _MAX_16),
+            min(taille_repertoire, _MAX_32), min(debut_repertoire, _MAX_32), 0,
+        )
+        yield fin
+
+
+def iterer_zip(entrees: Iterable[Entree], compression: int = zipfile.ZIP_DEFLATED,
+               processus: int = 1) -> Iterator[bytes]:
+    """
+    Produit une archive ZIP morceau par morceau à partir de couples (chemin, contenu).
+
+    Un contenu `str` ou `bytes` est compressé d'un bloc, ce qui permet d'écrire les tailles
+    dans l'en-tête local ; il doit donc tenir en mémoire. Un itérable de `bytes` est
+    compressé au fil de l'eau et entièrement consommé avant l'entrée suivante.
+
+    Args:
+        entrees (Iterable[Entree]): Les fichiers de l'archive, consommés au fur et à mesure.
+        compression (int): `zipfile.ZIP_DEFLATED` ou `zipfile.ZIP_STORED`.
+        processus (int): Nombre de processus de compression des blocs (1 : dans le processus courant).
+
+    Yields:
+        bytes: Les octets de l'archive, dans l'ordre.
+    """
+    if compression not in (zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED):
+        raise ValueError(f"Méthode de compression non prise en charge : {compression}")
+    pretes: Iterator[_EntreePrete] = (
+        _compresser_en_parallele(entrees, compression, processus) if processus > 1
+        else _compresser_en_serie(entrees, compression)
+    )
+
+    with tempfile.SpooledTemporaryFile(max_size=TAILLE_INDEX_EN_MEMOIRE) as repertoire:
+        ecrivain = _EcrivainZip(repertoire)
+        for nom, taille, contenu in pretes:
+            if taille is None:
+                yield from ecrivain.flux(nom, contenu, compression)
+            else:
+                methode, crc, donnees_compressees = contenu
+                yield ecrivain.bloc(nom, taille, methode, crc, donnees_compressees)
+        yield from ecrivain.fin()
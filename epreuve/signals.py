@@ -3,17 +3,18 @@ from __future__ import annotations
 from typing import Iterable, List, Optional, Set, Type
 
 from django.apps import apps
+from django.contrib.auth.models import User
 from django.core.cache import cache
 from django.db import models
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
-
-def _cle_cache_nb_participants(epreuve_id: int) -> str:
-    """
-    Clé de cache utilisée par `Epreuve.compte_participants_inscrits()`.
-    """
-    return f"epreuve_{epreuve_id}_nombre_participants"
+from epreuve.utils import (
+    get_cache_key_nombre_participants,
+    invalider_contenu_exercices,
+    invalider_donnees_export,
+)
+from olympiadesnsi.autorisations import invalider_contextes_autorisation
 
 
 def _modele_groupe_participe_a_epreuve() -> Type[models.Model]:
@@ -53,7 +54,7 @@ def _invalider_cache_epreuves(epreuve_ids: Iterable[int]) -> None:
     if not ids_uniques:
         return
 
-    cles: List[str] = [_cle_cache_nb_participants(epreuve_id) for epreuve_id in ids_uniques]
+    cles: List[str] = [get_cache_key_nombre_participants(epreuve_id) for epreuve_id in ids_uniques]
     cache.delete_many(cles)
 
 
@@ -76,7 +77,7 @@ def invalider_cache_apres_inscription_groupe_a_epreuve(
     epreuve_id: Optional[int] = getattr(instance, "epreuve_id", None)
     if epreuve_id is None:
         return
-    cache.delete(_cle_cache_nb_participants(epreuve_id))
+    cache.delete(get_cache_key_nombre_participants(epreuve_id))
 
 
 @receiver(post_delete, sender=_modele_groupe_participe_a_epreuve())
@@ -92,7 +93,7 @@ def invalider_cache_apres_desinscription_groupe_a_epreuve(
     epreuve_id: Optional[int] = getattr(instance, "epreuve_id", None)
     if epreuve_id is None:
         return
-    cache.delete(_cle_cache_nb_participants(epreuve_id))
+    cache.delete(get_cache_key_nombre_participants(epreuve_id))
 
 
 # ------------------------------------------------------------
@@ -135,3 +136,157 @@ def invalider_cache_apres_retrait_membre_dans_groupe(
 
     epreuve_ids: List[int] = _epreuve_ids_pour_groupe(groupe_id)
     _invalider_cache_epreuves(epreuve_ids)
+
+
+# ------------------------------------------------------------
+# 3) Invalidation du contenu des exercices affiché aux participants
+# ------------------------------------------------------------
+
+@receiver(post_save, sender="epreuve.Exercice")
+@receiver(post_delete, sender="epreuve.Exercice")
+def invalider_contenu_exercices_apres_modification(
+        sender,
+        instance: models.Model,
+        **kwargs,
+) -> None:
+    """
+    Change la version du contenu des exercices de l'épreuve lorsqu'un exercice
+    est créé, modifié ou supprimé.
+    """
+    epreuve_id: Optional[int] = getattr(instance, "epreuve_id", None)
+    if epreuve_id is None:
+        return
+    invalider_contenu_exercices(epreuve_id)
+
+
+# ------------------------------------------------------------
+# 4) Invalidation des contextes d'autorisation (olympiadesnsi.autorisations)
+# ------------------------------------------------------------
+
+def _membres_du_groupe(groupe_id: int) -> List[int]:
+    """
+    Retourne les IDs des utilisateurs membres du groupe.
+    """
+    return list(
+        _modele_participant_est_dans_groupe().objects.filter(groupe_id=groupe_id)
+        .values_list("utilisateur_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=_modele_groupe_participe_a_epreuve())
+@receiver(post_delete, sender=_modele_groupe_participe_a_epreuve())
+def invalider_autorisations_apres_modification_inscription_groupe(
+        sender,
+        instance: models.Model,
+        **kwargs,
+) -> None:
+    """
+    L'inscription (ou la désinscription) d'un groupe change les épreuves accessibles
+    à tous ses membres.
+    """
+    groupe_id: Optional[int] = getattr(instance, "groupe_id", None)
+    if groupe_id is None:
+        return
+    invalider_contextes_autorisation(_membres_du_groupe(groupe_id))
+
+
+@receiver(post_save, sender=_modele_participant_est_dans_groupe())
+@receiver(post_delete, sender=_modele_participant_est_dans_groupe())
+def invalider_autorisations_apres_modification_appartenance(
+        sender,
+        instance: models.Model,
+        **kwargs,
+) -> None:
+    """
+    L'ajout (ou le retrait) d'un participant dans un groupe change ses épreuves accessibles.
+    """
+    utilisateur_id: Optional[int] = getattr(instance, "utilisateur_id", None)
+    if utilisateur_id is None:
+        return
+    invalider_contextes_autorisation([utilisateur_id])
+
+
+@receiver(post_save, sender="epreuve.MembreComite")
+@receiver(post_delete, sender="epreuve.MembreComite")
+def invalider_autorisations_apres_modification_comite(
+        sender,
+        instance: models.Model,
+        **kwargs,
+) -> None:
+    """
+    L'ajout (ou le retrait) d'un membre du comité change ses droits d'organisation.
+    """
+    membre_id: Optional[int] = getattr(instance, "membre_id", None)
+    if membre_id is None:
+        return
+    invalider_contextes_autorisation([membre_id])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalider_autorisations_apres_modification_roles(
+        sender,
+        instance: models.Model,
+        action: str,
+        reverse: bool,
+        pk_set: Optional[Set[int]],
+        **kwargs,
+) -> None:
+    """
+    Les rôles (groupes Django) d'un utilisateur ont changé, depuis l'utilisateur
+    (`user.groups.add(...)`) ou depuis le groupe (`groupe.user_set.add(...)`).
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalider_contextes_autorisation([instance.pk])
+    elif action == "pre_clear":
+        # Après le vidage, on ne saurait plus quels utilisateurs étaient dans le groupe.
+        invalider_contextes_autorisation(instance.user_set.values_list("id", flat=True))
+    elif action in ("post_add", "post_remove"):
+        invalider_contextes_autorisation(pk_set or [])
+
+
+# ------------------------------------------------------------
+# 5) Version des données exportées (epreuve.services.exports)
+# ------------------------------------------------------------
+
+@receiver(post_save, sender="epreuve.Epreuve")
+def invalider_exports_apres_modification_epreuve(
+        sender,
+        instance: models.Model,
+        **kwargs,
+) -> None:
+    """
+    Le nom et les paramètres de l'épreuve figurent dans ses exports.
+    """
+    invalider_donnees_export(instance.pk)
+
+
+@receiver(post_save, sender="epreuve.Exercice")
+@receiver(post_delete, sender="epreuve.Exercice")
+@receiver(post_save, sender="epreuve.UserEpreuve")
+def invalider_exports_apres_modification(
+        sender,
+        instance: models.Model,
+        **kwargs,
+) -> None:
+    """
+    Un exercice ou l'inscription d'un participant a changé : les exports de l'épreuve sont périmés.
+    Les recalculs de scores et les modifications de jeux de test appellent `invalider_donnees_export`
+    eux-mêmes ; les soumissions sont couvertes par les agrégats de `version_donnees`.
+    """
+    epreuve_id: Optional[int] = getattr(instance, "epreuve_id", None)
+    if epreuve_id is None:
+        return
+    invalider_donnees_export(epreuve_id)
+
+
+@receiver(post_delete, sender="epreuve.TacheExport")
+def supprimer_artefact_export(
+        sender,
+        instance: models.Model,
+        **kwargs,
+) -> None:
+    """
+    Efface l'artefact d'une tâche d'export supprimée (éviction, nouvelle version, épreuve supprimée).
+    """
+    instance.supprimer_fichier()
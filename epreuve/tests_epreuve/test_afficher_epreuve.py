@@ -0,0 +1,121 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, UserExercice
+from epreuve.services.contenu_exercices import fusionner_exercice_json, get_contenu_exercices
+from inscription.models import GroupeParticipeAEpreuve
+from intranet.models import GroupeParticipant, ParticipantEstDansGroupe
+from olympiadesnsi.utils import encode_id
+
+
+class AfficherEpreuveRequetesTests(TestCase):
+    """
+    Le nombre de requêtes de `afficher_epreuve` ne doit pas dépendre du nombre d'exercices.
+    """
+
+    def setUp(self):
+        self.referent = User.objects.create_user(username="referent")
+        Group.objects.get_or_create(name="Participant")
+        self.groupe = GroupeParticipant.objects.create(nom="Groupe", referent=self.referent, statut="VALIDE")
+
+    def _creer_epreuve(self, nom: str, nb_exercices: int) -> Epreuve:
+        epreuve = Epreuve.objects.create(
+            nom=nom, code="", date_debut=timezone.now() - timedelta(minutes=5),
+            date_fin=timezone.now() + timedelta(hours=1), referent=self.referent,
+        )
+        for i in range(nb_exercices):
+            exercice = Exercice.objects.create(epreuve=epreuve, auteur=self.referent, titre=f"Exercice {i}",
+                                               avec_jeu_de_test=True)
+            for j in range(3):
+                JeuDeTest.objects.create(exercice=exercice, instance=f"{i} {j}", reponse=f"{i + j}")
+        GroupeParticipeAEpreuve.objects.create(groupe=self.groupe, epreuve=epreuve)
+        return epreuve
+
+    def _nb_requetes(self, participant: User, epreuve: Epreuve) -> int:
+        self.client.force_login(participant)
+        url = reverse("afficher_epreuve", kwargs={"hash_epreuve_id": encode_id(epreuve.id)})
+        with CaptureQueriesContext(connection) as requetes:
+            reponse = self.client.get(url)
+        self.assertEqual(reponse.status_code, 200)
+        return len(requetes)
+
+    def _creer_participant(self, username: str) -> User:
+        participant = User.objects.create_user(username=username)
+        participant.groups.add(Group.objects.get(name="Participant"))
+        ParticipantEstDansGroupe.objects.create(utilisateur=participant, groupe=self.groupe)
+        return participant
+
+    def test_nombre_de_requetes_constant(self):
+        petite = self._creer_epreuve("Petite", 2)
+        grande = self._creer_epreuve("Grande", 6)
+        participant_petite = self._creer_participant("p1")
+        participant_grande = self._creer_participant("p2")
+
+        # Première visite : création des UserExercice et tirage des jeux de test
+        self.assertEqual(self._nb_requetes(participant_petite, petite),
+                         self._nb_requetes(participant_grande, grande))
+        # Visites suivantes
+        self.assertEqual(self._nb_requetes(participant_petite, petite),
+                         self._nb_requetes(participant_grande, grande))
+
+    def test_jeux_de_test_attribues(self):
+        epreuve = self._creer_epreuve("Epreuve", 3)
+        participant = self._creer_participant("p")
+
+        self._nb_requetes(participant, epreuve)
+
+        user_exercices = UserExercice.objects.filter(participant=participant, exercice__epreuve=epreuve)
+        self.assertEqual(user_exercices.count(), 3)
+        for ue in user_exercices:
+            self.assertEqual(ue.jeu_de_test.exercice_id, ue.exercice_id)
+
+
+class ContenuExercicesCacheTests(TestCase):
+    def setUp(self):
+        self.referent = User.objects.create_user(username="referent")
+        self.epreuve = Epreuve.objects.create(
+            nom="Epreuve", code="", date_debut=timezone.now(),
+            date_fin=timezone.now() + timedelta(hours=1), referent=self.referent,
+        )
+        self.ex1 = Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent, titre="Un")
+        self.ex2 = Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent, titre="Deux")
+
+    def test_contenu_en_cache(self):
+        get_contenu_exercices(self.epreuve)
+        with self.assertNumQueries(0):
+            contenu = get_contenu_exercices(self.epreuve)
+        self.assertEqual([c.id for c in contenu], [self.ex1.id, self.ex2.id])
+
+    def test_invalide_apres_modification(self):
+        get_contenu_exercices(self.epreuve)
+        self.ex1.titre = "Un bis"
+        self.ex1.save()
+
+        contenu = get_contenu_exercices(self.epreuve)
+
+        self.assertIn('"titre": "Un bis"', contenu[0].fragment_json)
+
+    def test_invalide_apres_suppression_et_reordonnancement(self):
+        ex3 = Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent, titre="Trois")
+        get_contenu_exercices(self.epreuve)
+
+        self.epreuve.reordonner_exercices([str(ex3.id), str(self.ex2.id), str(self.ex1.id)])
+        self.assertEqual([c.id for c in get_contenu_exercices(self.epreuve)], [ex3.id, self.ex2.id, self.ex1.id])
+
+        self.ex2.delete()
+        self.assertEqual([c.id for c in get_contenu_exercices(self.epreuve)], [ex3.id, self.ex1.id])
+
+    def test_fusion_produit_un_json_valide(self):
+        contenu = get_contenu_exercices(self.epreuve)[0]
+
+        exercice = json.loads(fusionner_exercice_json(contenu, {"code_enregistre": None}))
+
+        self.assertEqual(exercice["titre"], "Un")
+        self.assertIsNone(exercice["code_enregistre"])
@@ -0,0 +1,89 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, UserExercice
+from epreuve.services.attribution_jeux import attribuer_jeux_de_test
+
+
+class AttributionJeuxTests(TestCase):
+    def setUp(self):
+        self.referent = User.objects.create_user(username="referent")
+        self.epreuve = Epreuve.objects.create(
+            nom="Finale", code="", date_debut=timezone.now(), date_fin=timezone.now() + timedelta(hours=2),
+            referent=self.referent,
+        )
+        self.participants = User.objects.bulk_create([User(username=f"p{i}") for i in range(10)])
+
+    def _exercice(self, nb_jeux: int, avec_jeu_de_test: bool = True) -> Exercice:
+        exercice = Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent,
+                                           titre=f"Exo {Exercice.objects.count()}",
+                                           avec_jeu_de_test=avec_jeu_de_test)
+        JeuDeTest.objects.bulk_create([JeuDeTest(exercice=exercice, instance=str(j), reponse=str(j))
+                                       for j in range(nb_jeux)])
+        return exercice
+
+    def test_inscription_repartit_les_jeux_cycliquement(self):
+        exercice_3 = self._exercice(3)
+        exercice_4 = self._exercice(4)
+        sans_jeu = self._exercice(2, avec_jeu_de_test=False)
+
+        self.epreuve.inscrire_participants(self.participants)
+
+        for exercice, repartition in ((exercice_3, [4, 3, 3]), (exercice_4, [3, 3, 2, 2])):
+            jeux = Counter(UserExercice.objects.filter(exercice=exercice).values_list("jeu_de_test__exercice_id",
+                                                                                      "jeu_de_test_id"))
+            self.assertEqual(sorted(jeux.values(), reverse=True), repartition)
+            self.assertTrue(all(exercice_id == exercice.id for exercice_id, _ in jeux))
+        self.assertFalse(UserExercice.objects.filter(exercice=sans_jeu, jeu_de_test__isnull=False).exists())
+
+    def test_attributions_existantes_conservees(self):
+        exercice = self._exercice(3)
+        self.epreuve.inscrire_participants(self.participants[:4])
+        avant = dict(UserExercice.objects.values_list("id", "jeu_de_test_id"))
+
+        self.epreuve.inscrire_participants(self.participants)
+
+        apres = dict(UserExercice.objects.values_list("id", "jeu_de_test_id"))
+        self.assertEqual({ue_id: apres[ue_id] for ue_id in avant}, avant)
+        self.assertEqual(UserExercice.objects.filter(exercice=exercice, jeu_de_test__isnull=True).count(), 0)
+        self.assertEqual(attribuer_jeux_de_test(self.epreuve.id), 0)
+
+    def test_attribution_limitee_a_un_exercice(self):
+        exercice = self._exercice(2)
+        autre = self._exercice(2)
+        UserExercice.objects.bulk_create([UserExercice(participant=p, exercice=ex)
+                                          for p in self.participants for ex in (exercice, autre)])
+
+        self.assertEqual(exercice.assigner_jeux_de_test(), 10)
+
+        self.assertEqual(UserExercice.objects.filter(exercice=autre, jeu_de_test__isnull=True).count(), 10)
+
+    def test_nombre_de_requetes_independant_de_la_taille(self):
+        for nb_jeux in range(1, 6):
+            self._exercice(nb_jeux)
+
+        # savepoints, UserEpreuve, UserExercice, attribution, nombre de participants en cache
+        with self.assertNumQueries(6):
+            self.epreuve.inscrire_participants(self.participants)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.epreuve.assigner_jeux_tests_exercices(), 0)
+        self.assertEqual(UserExercice.objects.filter(jeu_de_test__isnull=True).count(), 0)
+
+    def test_nouvel_exercice_ouvert_aux_participants_existants(self):
+        self._exercice(2)
+        self.epreuve.inscrire_participants(self.participants)
+        nouveau = self._exercice(3)
+        UserExercice.objects.create(participant=self.participants[0], exercice=nouveau, nb_soumissions=2)
+
+        # insertion, attribution
+        with self.assertNumQueries(2):
+            self.assertEqual(nouveau.inscrire_utilisateurs_de_epreuve(), 9)
+
+        self.assertEqual(UserExercice.objects.get(participant=self.participants[0], exercice=nouveau).nb_soumissions,
+                         2)
+        self.assertEqual(UserExercice.objects.filter(exercice=nouveau, jeu_de_test__isnull=True).count(), 0)
+        self.assertEqual(nouveau.inscrire_utilisateurs_de_epreuve(), 0)
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, MembreComite
+from epreuve.services.copie_epreuve import dupliquer_epreuve
+from olympiadesnsi.utils import encode_id
+
+
+class CopieEpreuveTests(TestCase):
+    def setUp(self):
+        self.referent = User.objects.create_user(username="referent")
+        self.membre = User.objects.create_user(username="membre")
+        self.source = Epreuve.objects.create(
+            nom="Finale", code="", date_debut=timezone.now(), date_fin=timezone.now() + timedelta(hours=2),
+            duree=120, referent=self.referent, inscription_externe=True,
+        )
+        MembreComite.objects.create(epreuve=self.source, membre=self.membre)
+
+    def _ajouter_exercices(self, nb: int, nb_jeux: int) -> None:
+        for i in range(nb):
+            exercice = Exercice.objects.create(epreuve=self.source, auteur=self.referent, titre=f"Exo {i}",
+                                               avec_jeu_de_test=True)
+            JeuDeTest.objects.bulk_create([JeuDeTest(exercice=exercice, instance=f"{i}-{j}", reponse=str(j))
+                                           for j in range(nb_jeux)])
+
+    def test_copie_des_exercices_et_des_premiers_jeux(self):
+        self._ajouter_exercices(3, 8)
+        Exercice.objects.create(epreuve=self.source, auteur=self.referent, titre="Sans jeu")
+
+        resultat = dupliquer_epreuve(self.source, self.membre)
+
+        copie = resultat.epreuve
+        self.assertEqual((copie.nom, copie.referent, copie.inscription_externe), ("copie de Finale", self.referent,
+                                                                                   False))
+        self.assertEqual(list(copie.comite.all()), [self.membre])
+        self.assertEqual(list(copie.exercices.order_by("numero").values_list("numero", "titre", "auteur")),
+                         [(1, "Exo 0", self.membre.id), (2, "Exo 1", self.membre.id), (3, "Exo 2", self.membre.id),
+                          (4, "Sans jeu", self.membre.id)])
+        self.assertEqual(sorted(JeuDeTest.objects.filter(exercice__epreuve=copie, exercice__titre="Exo 1")
+                                .values_list("instance", flat=True)), [f"1-{j}" for j in range(5)])
+        self.assertEqual((resultat.nb_exercices, resultat.nb_jeux_de_test), (4, 15))
+        jeu = JeuDeTest.objects.filter(exercice__epreuve=copie).first()
+        self.assertTrue(jeu.est_reponse_valide(jeu.reponse))
+
+    def test_copie_de_tous_les_jeux(self):
+        self._ajouter_exercices(2, 8)
+
+        self.assertEqual(dupliquer_epreuve(self.source, self.membre, max_jeux_de_test=None).nb_jeux_de_test, 16)
+
+    def test_nombre_de_requetes_independant_du_nombre_d_exercices(self):
+        self._ajouter_exercices(30, 20)
+
+        # savepoints, nom, épreuve (+ code), comité, exercices (lecture, insertion), jeux (lecture, insertion)
+        with self.assertNumQueries(10):
+            resultat = dupliquer_epreuve(self.source, self.membre)
+        self.assertEqual((resultat.nb_exercices, resultat.nb_jeux_de_test), (30, 150))
+
+    def test_nom_de_copie_libre(self):
+        for nom in ("copie de Finale", "copie de Finale (2)", "copie de Finale (4)"):
+            Epreuve.objects.create(nom=nom, code="", date_debut=timezone.now(), date_fin=timezone.now(),
+                                   referent=self.referent)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(Epreuve.generer_nom_copie("Finale", self.referent), "copie de Finale (3)")
+        self.assertEqual(Epreuve.generer_nom_copie("Finale", self.membre), "copie de Finale")
+
+    def test_vue_copier_epreuve(self):
+        self._ajouter_exercices(1, 2)
+        self.client.force_login(self.membre)
+
+        reponse = self.client.get(reverse("copier_epreuve", kwargs={"hash_epreuve_id": encode_id(self.source.id)}))
+
+        self.assertRedirects(reponse, reverse("espace_organisateur"), fetch_redirect_response=False)
+        self.assertEqual(JeuDeTest.objects.filter(exercice__epreuve__nom="copie de Finale").count(), 2)
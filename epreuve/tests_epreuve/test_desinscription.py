@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, UserEpreuve, UserExercice
+from epreuve.services.desinscription import desinscrire_groupe
+from inscription.models import GroupeParticipeAEpreuve
+from intranet.models import GroupeParticipant, ParticipantEstDansGroupe
+
+
+class DesinscriptionGroupeTests(TestCase):
+    def setUp(self):
+        self.referent = User.objects.create_user(username="referent")
+        self.epreuve = Epreuve.objects.create(
+            nom="Finale", code="", date_debut=timezone.now(), date_fin=timezone.now() + timedelta(hours=2),
+            referent=self.referent,
+        )
+        for i in range(3):
+            Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent, titre=f"Exo {i}")
+        self.groupe = self._groupe("A", 7)
+        self.autre_groupe = self._groupe("B", 2)
+        self.epreuve.inscrire_groupe(self.groupe)
+        self.epreuve.inscrire_groupe(self.autre_groupe)
+
+    def _groupe(self, nom: str, nb_membres: int) -> GroupeParticipant:
+        groupe = GroupeParticipant.objects.create(nom=nom, referent=self.referent)
+        membres = User.objects.bulk_create([User(username=f"{nom}{i}") for i in range(nb_membres)])
+        ParticipantEstDansGroupe.objects.bulk_create([ParticipantEstDansGroupe(utilisateur=u, groupe=groupe)
+                                                      for u in membres])
+        return groupe
+
+    def test_desinscription_par_lots(self):
+        progression = []
+
+        resultat = desinscrire_groupe(self.epreuve.id, self.groupe.id, progression=lambda *p: progression.append(p),
+                                      taille_lot=3)
+
+        self.assertEqual((resultat.nb_participants, resultat.nb_user_exercices), (7, 21))
+        self.assertEqual(progression, [(3, 7), (6, 7), (7, 7)])
+        self.assertEqual(set(UserEpreuve.objects.values_list("participant__username", flat=True)), {"B0", "B1"})
+        self.assertEqual(UserExercice.objects.count(), 6)
+        self.assertFalse(GroupeParticipeAEpreuve.objects.filter(groupe=self.groupe).exists())
+        self.assertEqual(self.epreuve.compte_participants_inscrits(), 2)
+
+    def test_nombre_de_requetes_par_lot(self):
+        # membres, lien (lecture, suppression), signaux ; puis par lot : savepoint (2) et deux suppressions
+        with self.assertNumQueries(4 + 4):
+            desinscrire_groupe(self.epreuve.id, self.groupe.id, taille_lot=7)
+        self.epreuve.inscrire_groupe(self.groupe)
+        with self.assertNumQueries(4 + 4 + 4):
+            desinscrire_groupe(self.epreuve.id, self.groupe.id, taille_lot=4)
+
+    def test_methode_du_modele(self):
+        self.epreuve.desinscrire_groupe(self.autre_groupe)
+
+        self.assertEqual(UserEpreuve.objects.count(), 7)
+        self.assertEqual(list(self.epreuve.groupes_participants.all()), [self.groupe])
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest
+from epreuve.utils import (
+    empreinte_reponse,
+    est_valide_reponse_empreinte,
+    est_valide_reponse_jeu_de_test,
+    forme_canonique_reponse,
+)
+
+
+class EmpreinteReponseTests(SimpleTestCase):
+    CAS = [
+        ("3", "3"),
+        ("1\n2", "1\r\n2\r\n"),
+        ("  a  \n b", "a\nb"),
+        ("été", "été"),
+        ("1\n2", "1\n3"),
+        ("1\n2", "1 2"),
+        ("1\n\n2", "1\n2"),
+        ("", "   "),
+    ]
+
+    def test_meme_verdict_que_la_comparaison_ligne_a_ligne(self):
+        for attendue, soumise in self.CAS:
+            with self.subTest(attendue=attendue, soumise=soumise):
+                empreinte = empreinte_reponse(forme_canonique_reponse(attendue))
+                self.assertEqual(est_valide_reponse_empreinte(soumise, empreinte),
+                                 est_valide_reponse_jeu_de_test(attendue, soumise))
+
+
+class JeuDeTestEmpreinteTests(TestCase):
+    def setUp(self):
+        referent = User.objects.create_user(username="referent")
+        epreuve = Epreuve.objects.create(nom="Epreuve", code="", date_debut=timezone.now(),
+                                         date_fin=timezone.now() + timedelta(hours=1), referent=referent)
+        self.exercice = Exercice.objects.create(epreuve=epreuve, auteur=referent, titre="Exercice",
+                                                avec_jeu_de_test=True)
+
+    def test_empreinte_calculee_a_l_enregistrement(self):
+        jeu = JeuDeTest.objects.create(exercice=self.exercice, instance="1", reponse=" 4 \r\n5 ")
+        jeu.refresh_from_db()
+
+        self.assertEqual(jeu.empreinte, empreinte_reponse("4\n5"))
+        self.assertTrue(jeu.est_reponse_valide("4\n5\n"))
+        self.assertFalse(jeu.est_reponse_valide("4\n6"))
+
+    def test_jeu_sans_empreinte_compare_integralement(self):
+        jeu = JeuDeTest.objects.create(exercice=self.exercice, instance="1", reponse="4")
+        JeuDeTest.objects.filter(pk=jeu.pk).update(empreinte="")
+        jeu.refresh_from_db()
+
+        self.assertTrue(jeu.est_reponse_valide(" 4 "))
@@ -0,0 +1,131 @@
+import io
+import tempfile
+import zipfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, MembreComite, UserEpreuve, UserExercice
+from epreuve.services.export_zip import entrees_export
+from epreuve.services.zip_flux import iterer_zip
+from olympiadesnsi.utils import encode_id
+
+
+class ExportZipTests(TestCase):
+    def setUp(self):
+        self.referent = User.objects.create_user(username="referent")
+        self.epreuve = Epreuve.objects.create(
+            nom="Epreuve export", code="", date_debut=timezone.now() - timedelta(hours=1),
+            date_fin=timezone.now() + timedelta(hours=1), referent=self.referent,
+        )
+        MembreComite.objects.get_or_create(epreuve=self.epreuve, membre=self.referent)
+        self.avec_jeu = Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent, titre="Somme",
+                                                avec_jeu_de_test=True)
+        self.sans_jeu = Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent, titre="Libre")
+        jeu = JeuDeTest.objects.create(exercice=self.avec_jeu, instance="1 2", reponse="3")
+        for nom in ("alice", "bob"):
+            participant = User.objects.create_user(username=nom)
+            UserEpreuve.objects.create(participant=participant, epreuve=self.epreuve, nb_bonnes_reponses=1)
+            UserExercice.objects.create(participant=participant, exercice=self.avec_jeu, jeu_de_test=jeu,
+                                        solution_instance_participant=" 3 ", code_participant=f"print({nom!r})")
+            UserExercice.objects.create(participant=participant, exercice=self.sans_jeu)
+
+    def _archive(self, by: str) -> zipfile.ZipFile:
+        self.client.force_login(self.referent)
+        with tempfile.TemporaryDirectory() as dossier, override_settings(EXPORTS_CHEMIN=dossier):
+            reponse = self.client.get(reverse("export_data", kwargs={"hash_epreuve_id": encode_id(self.epreuve.id),
+                                                                     "by": by}))
+            self.assertEqual(reponse.status_code, 200)
+            self.assertTrue(reponse.streaming)
+            archive = zipfile.ZipFile(io.BytesIO(b"".join(reponse.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        return archive
+
+    def test_par_exercice(self):
+        archive = self._archive("exercice")
+        ex = self.avec_jeu.id
+        self.assertEqual(sorted(archive.namelist()), sorted([
+            "resume_epreuve.tsv",
+            f"Somme/alice/reponse_{ex}_alice.txt", f"Somme/alice/code_{ex}_alice.py",
+            f"Somme/bob/reponse_{ex}_bob.txt", f"Somme/bob/code_{ex}_bob.py",
+            f"Libre/alice/code_{self.sans_jeu.id}_alice.py", f"Libre/bob/code_{self.sans_jeu.id}_bob.py",
+        ]))
+        self.assertEqual(archive.read(f"Somme/alice/reponse_{ex}_alice.txt").decode(),
+                         "##### reponse_equipe :\n3\n\n##### reponse_attendue :\n3\n\n##### jeu_de_test :\n1 2")
+        self.assertEqual(archive.read(f"Somme/bob/code_{ex}_bob.py"), b"print('bob')")
+
+    def test_par_participant(self):
+        archive = self._archive("participant")
+        self.assertIn(f"alice/Somme/reponse_alice_{self.avec_jeu.id}.txt", archive.namelist())
+        self.assertIn(f"bob/Libre/code_bob_{self.sans_jeu.id}.py", archive.namelist())
+        self.assertIn("alice\tN/A\t1", archive.read("resume_epreuve.tsv").decode())
+
+    def test_resume_inclut_les_participants_sans_exercice(self):
+        inscrit = User.objects.create_user(username="carole")
+        UserEpreuve.objects.create(participant=inscrit, epreuve=self.epreuve)
+
+        entrees = dict(entrees_export(self.epreuve, "resume"))
+
+        self.assertEqual(list(entrees), ["resume_epreuve.tsv"])
+        self.assertEqual(entrees["resume_epreuve.tsv"].splitlines()[1:],
+                         ["alice\tN/A\t1", "bob\tN/A\t1", "carole\tN/A\t0"])
+
+    def test_nombre_de_requetes_independant_du_nombre_de_participants(self):
+        for by in ("exercice", "participant"):
+            # rendus, résumé
+            with self.assertNumQueries(2):
+                avant = list(entrees_export(self.epreuve, by))
+            for i in range(5):
+                participant = User.objects.create_user(username=f"equipe{i}")
+                UserEpreuve.objects.create(participant=participant, epreuve=self.epreuve)
+                UserExercice.objects.create(participant=participant, exercice=self.avec_jeu)
+                UserExercice.objects.create(participant=participant, exercice=self.sans_jeu)
+            with self.assertNumQueries(2):
+                apres = list(entrees_export(self.epreuve, by))
+            self.assertEqual(len(apres), len(avant) + 15)
+            UserEpreuve.objects.filter(participant__username__startswith="equipe").delete()
+            User.objects.filter(username__startswith="equipe").delete()
+
+    def test_archive_produite_par_morceaux(self):
+        morceaux = list(iterer_zip(entrees_export(self.epreuve, "participant")))
+
+        self.assertGreater(len(morceaux), 5)
+        self.assertEqual(len(zipfile.ZipFile(io.BytesIO(b"".join(morceaux))).namelist()), 7)
+
+    def test_zip64_au_dela_de_65535_fichiers(self):
+        entrees = ((f"f{i}.txt", b"x") for i in range(70000))
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(iterer_zip(entrees, compression=zipfile.ZIP_STORED))))
+
+        self.assertEqual(len(archive.infolist()), 70000)
+        self.assertEqual(archive.read("f69999.txt"), b"x")
+
+    def test_compression_parallele_identique_a_la_compression_en_serie(self):
+        entrees = [(f"f{i}.py", f"print({i})\n" * (i % 40)) for i in range(600)]
+        en_serie = zipfile.ZipFile(io.BytesIO(b"".join(iterer_zip(entrees))))
+        en_parallele = zipfile.ZipFile(io.BytesIO(b"".join(iterer_zip(entrees, processus=2))))
+
+        self.assertIsNone(en_parallele.testzip())
+        self.assertEqual([(info.filename, info.compress_type, info.CRC) for info in en_parallele.infolist()],
+                         [(info.filename, info.compress_type, info.CRC) for info in en_serie.infolist()])
+        self.assertEqual(en_parallele.read("f599.py"), b"print(599)\n" * 39)
+
+    def test_petites_entrees_stockees_sans_compression(self):
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(iterer_zip([("court.txt", "42"), ("long.txt", "a" * 1000)]))))
+
+        self.assertEqual(archive.getinfo("court.txt").compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(archive.getinfo("long.txt").compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(archive.read("long.txt"), b"a" * 1000)
+
+    def test_entree_en_flux_entre_deux_blocs(self):
+        morceaux = [f"ligne {i}\n".encode() for i in range(5000)]
+        for processus in (1, 2):
+            entrees = [("avant.txt", "a" * 500), ("flux.txt", iter(morceaux)), ("apres.txt", b"b")]
+            archive = zipfile.ZipFile(io.BytesIO(b"".join(iterer_zip(entrees, processus=processus))))
+
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.namelist(), ["avant.txt", "flux.txt", "apres.txt"])
+            self.assertEqual(archive.read("flux.txt"), b"".join(morceaux))
+            self.assertEqual(archive.read("apres.txt"), b"b")
@@ -0,0 +1,214 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, MembreComite, TacheExport, UserEpreuve, UserExercice
+from epreuve.services.export_epreuve import entrees_export_epreuve
+from epreuve.services.export_resultats import parquet_disponible
+from epreuve.services.exports import construire_sans_worker, demander_export, evincer_artefacts, version_donnees
+from epreuve.services.soumission import SOUMISSION_ENREGISTREE, enregistrer_soumission
+from epreuve.services.zip_flux import iterer_zip
+from olympiadesnsi.utils import encode_id
+
+
+class ExportsTests(TestCase):
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp(prefix="exports_tests_")
+        self.addCleanup(shutil.rmtree, self.dossier, ignore_errors=True)
+        reglages = override_settings(EXPORTS_CHEMIN=self.dossier)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+        self.referent = User.objects.create_user(username="referent")
+        self.epreuve = Epreuve.objects.create(
+            nom="Epreuve exports", code="", date_debut=timezone.now() - timedelta(hours=1),
+            date_fin=timezone.now() + timedelta(hours=1), referent=self.referent,
+        )
+        MembreComite.objects.get_or_create(epreuve=self.epreuve, membre=self.referent)
+        self.exercice = Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent, titre="Somme",
+                                                avec_jeu_de_test=True)
+        jeu = JeuDeTest.objects.create(exercice=self.exercice, instance="1 2", reponse="3")
+        self.participant = User.objects.create_user(username="equipe")
+        UserEpreuve.objects.create(participant=self.participant, epreuve=self.epreuve, anonymat="12|?|-")
+        UserExercice.objects.create(participant=self.participant, exercice=self.exercice, jeu_de_test=jeu)
+        self.url = reverse("export_data", kwargs={"hash_epreuve_id": encode_id(self.epreuve.id), "by": "exercice"})
+        self.client.force_login(self.referent)
+
+    def _noms(self, reponse) -> list:
+        return zipfile.ZipFile(io.BytesIO(b"".join(reponse.streaming_content))).namelist()
+
+    def _construire(self, type_export: str) -> TacheExport:
+        tache = demander_export(self.epreuve, type_export)
+        b"".join(construire_sans_worker(tache))
+        tache.refresh_from_db()
+        return tache
+
+    def test_artefact_diffuse_pendant_sa_construction_puis_reutilise(self):
+        reponse = self.client.get(self.url)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(TacheExport.objects.get().statut, TacheExport.EN_COURS)
+        contenu = b"".join(reponse.streaming_content)
+        tache = TacheExport.objects.get()
+        self.assertEqual(tache.statut, TacheExport.TERMINEE)
+        with open(tache.chemin_fichier(), "rb") as fichier:
+            self.assertEqual(fichier.read(), contenu)
+        date_fin = tache.date_fin
+
+        reponse = self.client.get(self.url)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertIn("resume_epreuve.tsv", self._noms(reponse))
+        tache.refresh_from_db()
+        self.assertEqual((TacheExport.objects.count(), tache.date_fin), (1, date_fin))
+        self.assertIsNotNone(tache.date_dernier_acces)
+
+    def test_telechargement_interrompu_remet_la_tache_en_attente(self):
+        flux = construire_sans_worker(demander_export(self.epreuve, TacheExport.RENDUS_EXERCICE))
+        next(flux)
+        flux.close()  # client parti avant la fin
+
+        tache = TacheExport.objects.get()
+        self.assertEqual(tache.statut, TacheExport.EN_ATTENTE)
+        self.assertEqual(os.listdir(os.path.join(self.dossier, str(self.epreuve.id))), [])
+        self.assertIn("resume_epreuve.tsv", self._noms(self.client.get(self.url)))
+
+    def test_suivi_construit_une_tache_en_attente_sans_worker(self):
+        tache = demander_export(self.epreuve, TacheExport.RENDUS_EXERCICE)
+        url = reverse("suivi_export", kwargs={"hash_epreuve_id": encode_id(self.epreuve.id), "tache_id": tache.id})
+
+        self.assertIn("resume_epreuve.tsv", self._noms(self.client.get(url)))
+        tache.refresh_from_db()
+        self.assertTrue(tache.est_terminee())
+
+    def test_tache_en_cours_inactive_reprise_sans_worker(self):
+        tache = demander_export(self.epreuve, TacheExport.RENDUS_EXERCICE)
+        il_y_a_dix_minutes = timezone.now() - timedelta(minutes=10)
+        # Requête tuée en pleine construction : la tâche ne donne plus signe de vie
+        TacheExport.objects.filter(id=tache.id).update(statut=TacheExport.EN_COURS, date_debut=il_y_a_dix_minutes,
+                                                        date_activite=il_y_a_dix_minutes)
+
+        self.assertIn("resume_epreuve.tsv", self._noms(self.client.get(self.url)))
+        tache.refresh_from_db()
+        self.assertTrue(tache.est_terminee())
+
+    def test_tache_en_cours_active_non_reprise(self):
+        tache = demander_export(self.epreuve, TacheExport.RENDUS_EXERCICE)
+        TacheExport.objects.filter(id=tache.id).update(statut=TacheExport.EN_COURS, date_debut=timezone.now(),
+                                                        date_activite=timezone.now())
+
+        self.assertIsNone(construire_sans_worker(tache))
+
+    def test_soumission_change_la_version(self):
+        ancienne = self._construire(TacheExport.RENDUS_EXERCICE)
+
+        resultat = enregistrer_soumission(self.participant, self.epreuve.id, self.exercice.id, "print(3)", "3")
+        self.assertEqual(resultat.statut, SOUMISSION_ENREGISTREE)
+        self._noms(self.client.get(self.url))
+
+        nouvelle = TacheExport.objects.get()  # l'ancienne version a été supprimée avec son fichier
+        self.assertNotEqual(nouvelle.version_donnees, ancienne.version_donnees)
+        self.assertFalse(os.path.exists(ancienne.chemin_fichier()))
+        with zipfile.ZipFile(nouvelle.chemin_fichier()) as archive:
+            self.assertEqual(archive.read(f"Somme/equipe/code_{self.exercice.id}_equipe.py"), b"print(3)")
+
+    def test_jeu_de_test_change_la_version(self):
+        avant = version_donnees(self.epreuve.id)
+        self.exercice.vider_jeux_de_test()
+
+        self.assertNotEqual(version_donnees(self.epreuve.id), avant)
+
+    @override_settings(EXPORTS_ASYNCHRONES=True)
+    def test_export_en_tache_de_fond(self):
+        reponse = self.client.get(reverse("exporter_epreuve", kwargs={"hash_epreuve_id": encode_id(self.epreuve.id)}))
+        tache = TacheExport.objects.get()
+        url_suivi = reverse("suivi_export", kwargs={"hash_epreuve_id": encode_id(self.epreuve.id),
+                                                    "tache_id": tache.id})
+        self.assertRedirects(reponse, url_suivi)
+        self.assertEqual(tache.statut, TacheExport.EN_ATTENTE)
+        self.assertContains(self.client.get(url_suivi), "En attente")
+
+        call_command("traiter_exports", stdout=io.StringIO())
+
+        tache.refresh_from_db()
+        self.assertEqual((tache.statut, tache.progression), (TacheExport.TERMINEE, 100))
+        self.assertContains(self.client.get(url_suivi), "Télécharger")
+        reponse = self.client.get(reverse("telecharger_export", kwargs={
+            "hash_epreuve_id": encode_id(self.epreuve.id), "tache_id": tache.id}))
+        self.assertEqual(sorted(self._noms(reponse)),
+                         ["epreuve-exports_complete.json", "epreuve-exports_light.json"])
+
+    def test_eviction_des_moins_recemment_utilises(self):
+        taches = [self._construire(type_export) for type_export in
+                  (TacheExport.RENDUS_EXERCICE, TacheExport.RENDUS_PARTICIPANT, TacheExport.EPREUVE_JSON)]
+        taille_totale = sum(tache.taille for tache in taches)
+        TacheExport.objects.filter(id=taches[0].id).update(date_dernier_acces=timezone.now())
+
+        self.assertEqual(evincer_artefacts(taille_totale - 1), 1)
+
+        restantes = set(TacheExport.objects.values_list("id", flat=True))
+        self.assertEqual(restantes, {taches[0].id, taches[2].id})
+        self.assertFalse(os.path.exists(taches[1].chemin_fichier()))
+
+    def _url_resultats(self, format_export: str) -> str:
+        return reverse("export_resultats", kwargs={"hash_epreuve_id": encode_id(self.epreuve.id),
+                                                   "format_export": format_export})
+
+    def test_resultats_ndjson(self):
+        enregistrer_soumission(self.participant, self.epreuve.id, self.exercice.id, "print(3)", "3")
+
+        reponse = self.client.get(self._url_resultats("ndjson"))
+
+        self.assertEqual(reponse["Content-Type"], "application/x-ndjson")
+        lignes = b"".join(reponse.streaming_content).decode().splitlines()
+        self.assertEqual(len(lignes), 1)
+        ligne = json.loads(lignes[0])
+        self.assertEqual(
+            {cle: ligne[cle] for cle in ("anonymat", "participant", "debut_epreuve", "exercice", "reponse",
+                                         "reponse_correcte", "nb_soumissions", "code")},
+            {"anonymat": "12|?|-", "participant": "equipe", "debut_epreuve": None, "exercice": self.exercice.id,
+             "reponse": "3", "reponse_correcte": True, "nb_soumissions": 1, "code": "print(3)"},
+        )
+
+    def test_format_de_resultats_inconnu(self):
+        self.assertEqual(self.client.get(self._url_resultats("csv")).status_code, 404)
+
+    @skipUnless(parquet_disponible(), "pyarrow n'est pas installé")
+    def test_resultats_parquet(self):
+        import pyarrow.parquet as pq
+
+        reponse = self.client.get(self._url_resultats("parquet"))
+
+        table = pq.read_table(io.BytesIO(b"".join(reponse.streaming_content)))
+        self.assertEqual(table.num_rows, 1)
+        self.assertEqual(table.column("participant").to_pylist(), ["equipe"])
+        self.assertEqual(table.column("reponse_correcte").to_pylist(), [False])
+
+    def test_export_epreuve_json_en_flux(self):
+        JeuDeTest.objects.bulk_create([JeuDeTest(exercice=self.exercice, instance=f"{i} {i}", reponse=f"« {2 * i} »")
+                                       for i in range(7)])
+        Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent, titre="QCM", type_exercice="qcm")
+
+        with self.assertNumQueries(2):  # exercices, jeux de test
+            archive = zipfile.ZipFile(io.BytesIO(b"".join(iterer_zip(entrees_export_epreuve(self.epreuve)))))
+
+        complete = archive.read("epreuve-exports_complete.json").decode()
+        donnees = json.loads(complete)
+        self.assertEqual(complete, json.dumps(donnees, ensure_ascii=False, indent=2))
+        self.assertEqual([exercice["titre"] for exercice in donnees["exercices"]], ["Somme", "QCM"])
+        self.assertEqual(len(donnees["exercices"][0]["jeux_de_test"]), 8)
+        self.assertEqual(donnees["exercices"][0]["jeux_de_test"][3], {"instance": "2 2", "reponse": "« 4 »"})
+        self.assertEqual(donnees["exercices"][1]["jeux_de_test"], [])
+
+        leger = json.loads(archive.read("epreuve-exports_light.json"))
+        self.assertEqual(leger["exercices"][0]["jeux_de_test"], donnees["exercices"][0]["jeux_de_test"][:5])
+        self.assertEqual({**leger, "exercices": []}, {**donnees, "exercices": []})
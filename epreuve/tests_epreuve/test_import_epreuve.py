@@ -0,0 +1,140 @@
+import io
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, MembreComite
+from epreuve.services import import_epreuve
+from epreuve.services.export_epreuve import entrees_export_epreuve
+from epreuve.services.import_epreuve import EpreuveJsonInvalide, importer_epreuve
+from epreuve.utils import empreinte_reponse
+from olympiadesnsi.constants import MAX_TAILLE_NOM
+
+
+class ImportEpreuveTests(TestCase):
+    def setUp(self):
+        self.organisateur = User.objects.create_user(username="organisateur", password="mdp")
+        self.epreuve = Epreuve.objects.create(
+            nom="Épreuve source", code="", date_debut=timezone.now(),
+            date_fin=timezone.now() + timedelta(hours=2), duree=90, referent=self.organisateur,
+        )
+        for i in range(3):
+            exercice = Exercice.objects.create(epreuve=self.epreuve, auteur=self.organisateur, titre=f"Exo {i}",
+                                               avec_jeu_de_test=True, bareme=i)
+            JeuDeTest.objects.bulk_create([JeuDeTest(exercice=exercice, instance=f"{i} {j}", reponse=f" {i + j} ")
+                                           for j in range(40)])
+        Exercice.objects.create(epreuve=self.epreuve, auteur=self.organisateur, titre="QCM", type_exercice="qcm")
+        entrees = entrees_export_epreuve(self.epreuve)
+        nom, contenu = next(entrees)
+        self.assertTrue(nom.endswith("_complete.json"))
+        self.contenu: bytes = b"".join(contenu)
+
+    def test_import_du_fichier_exporte(self):
+        # Petites lectures : les valeurs sont coupées entre deux lectures du fichier
+        with mock.patch.object(import_epreuve, "TAILLE_LECTURE", 7), mock.patch.object(import_epreuve, "TAILLE_LOT", 50):
+            resultat = importer_epreuve(io.BytesIO(self.contenu), self.organisateur)
+
+        self.assertEqual((resultat.nb_exercices, resultat.nb_jeux_de_test), (4, 120))
+        importee = resultat.epreuve
+        self.assertEqual((importee.nom, importee.duree), ("import de Épreuve source", 90))
+        self.assertTrue(MembreComite.objects.filter(epreuve=importee, membre=self.organisateur).exists())
+        self.assertEqual(list(importee.exercices.order_by("numero").values_list("numero", "titre", "bareme")),
+                         [(1, "Exo 0", 0), (2, "Exo 1", 1), (3, "Exo 2", 2), (4, "QCM", None)])
+        jeu = JeuDeTest.objects.get(exercice__epreuve=importee, exercice__titre="Exo 2", instance="2 5")
+        self.assertEqual((jeu.reponse, jeu.empreinte), (" 7 ", empreinte_reponse("7")))
+        self.assertTrue(jeu.est_reponse_valide("7"))
+
+    def test_nombre_de_requetes_independant_du_nombre_de_jeux(self):
+        with self.assertNumQueries(8):  # savepoints, nom, épreuve (+ code), comité, exercices, jeux de test
+            importer_epreuve(io.BytesIO(self.contenu), self.organisateur)
+
+    def test_fichier_invalide_refuse_avant_toute_ecriture(self):
+        donnees = json.loads(self.contenu)
+        donnees["exercices"][3]["titre"] = "Exo 0"
+
+        with self.assertNumQueries(0), self.assertRaisesMessage(EpreuveJsonInvalide, "déjà utilisé"):
+            importer_epreuve(io.BytesIO(json.dumps(donnees).encode()), self.organisateur)
+        with self.assertRaises(json.JSONDecodeError):
+            importer_epreuve(io.BytesIO(self.contenu[:-10]), self.organisateur)
+        self.assertEqual(Epreuve.objects.count(), 1)
+
+    def _refuser_exercice(self, modification, message):
+        donnees = json.loads(self.contenu)
+        donnees["exercices"][1].update(modification)
+
+        with self.assertNumQueries(0), self.assertRaisesMessage(EpreuveJsonInvalide, message):
+            importer_epreuve(io.BytesIO(json.dumps(donnees).encode()), self.organisateur)
+
+    def test_titre_trop_long_refuse(self):
+        self._refuser_exercice({"titre": "x" * (MAX_TAILLE_NOM + 1)}, f"dépasse {MAX_TAILLE_NOM} caractères")
+
+    def test_type_exercice_non_textuel_refuse(self):
+        self._refuser_exercice({"type_exercice": ["qcm"]}, "type d'exercice inconnu")
+
+    def test_code_a_soumettre_non_textuel_refuse(self):
+        self._refuser_exercice({"code_a_soumettre": {"python": True}}, "code à soumettre inconnu")
+
+    def test_bareme_booleen_refuse(self):
+        self._refuser_exercice({"bareme": True}, "« bareme » doit être un entier")
+
+    def test_nombre_max_soumissions_nul_refuse(self):
+        self._refuser_exercice({"nombre_max_soumissions": None}, "« nombre_max_soumissions » doit être un entier")
+
+    def test_nombre_max_soumissions_hors_bornes_refuse(self):
+        self._refuser_exercice({"nombre_max_soumissions": 2 ** 40}, "« nombre_max_soumissions » doit être un entier")
+
+    def test_retour_en_direct_nul_refuse(self):
+        self._refuser_exercice({"retour_en_direct": None}, "« retour_en_direct » doit être un booléen")
+
+    def test_avec_jeu_de_test_non_booleen_refuse(self):
+        self._refuser_exercice({"avec_jeu_de_test": "oui"}, "« avec_jeu_de_test » doit être un booléen")
+
+    def test_enonce_non_textuel_refuse(self):
+        self._refuser_exercice({"enonce": 42}, "« enonce » doit être une chaîne")
+
+    def _refuser_entete(self, modification, message):
+        donnees = json.loads(self.contenu)
+        donnees.update(modification)
+
+        with self.assertNumQueries(0), self.assertRaisesMessage(EpreuveJsonInvalide, message):
+            importer_epreuve(io.BytesIO(json.dumps(donnees).encode()), self.organisateur)
+
+    def test_nom_d_epreuve_trop_long_refuse(self):
+        self._refuser_entete({"nom": "x" * (MAX_TAILLE_NOM + 1)}, f"dépasse {MAX_TAILLE_NOM} caractères")
+
+    def test_duree_hors_bornes_refusee(self):
+        self._refuser_entete({"duree": 2 ** 31}, "« duree » doit être un entier")
+        self._refuser_entete({"duree": True}, "« duree » doit être un entier")
+
+    def test_temps_limite_non_booleen_refuse(self):
+        self._refuser_entete({"temps_limite": "non"}, "« temps_limite » doit être un booléen")
+
+    def test_exercices_un_par_un_nul_refuse(self):
+        self._refuser_entete({"exercices_un_par_un": None}, "« exercices_un_par_un » doit être un booléen")
+
+    def test_import_repete_choisit_un_nom_libre(self):
+        donnees = json.loads(self.contenu)
+        donnees["nom"] = "x" * MAX_TAILLE_NOM
+        contenu: bytes = json.dumps(donnees).encode()
+
+        premiere = importer_epreuve(io.BytesIO(contenu), self.organisateur).epreuve
+        seconde = importer_epreuve(io.BytesIO(contenu), self.organisateur).epreuve
+
+        self.assertEqual(premiere.nom, ("import de " + "x" * MAX_TAILLE_NOM)[:MAX_TAILLE_NOM])
+        self.assertEqual(seconde.nom, premiere.nom[:MAX_TAILLE_NOM - 4] + " (2)")
+
+    def test_vue_importer_epreuve_json(self):
+        self.organisateur.groups.add(Group.objects.get_or_create(name="Organisateur")[0])
+        self.client.force_login(self.organisateur)
+        fichier = io.BytesIO(self.contenu)
+        fichier.name = "epreuve.json"
+
+        reponse = self.client.post(reverse("importer_epreuve_json"), {"json_file": fichier})
+
+        self.assertRedirects(reponse, reverse("espace_organisateur"), fetch_redirect_response=False)
+        self.assertEqual(JeuDeTest.objects.filter(exercice__epreuve__nom="import de Épreuve source").count(), 120)
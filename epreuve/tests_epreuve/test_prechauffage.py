@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, UserEpreuve, UserExercice
+from epreuve.services.prechauffage import prechauffer_epreuve
+from epreuve.utils import get_cache_key_nombre_participants
+from inscription.models import GroupeParticipeAEpreuve
+from intranet.models import GroupeParticipant, ParticipantEstDansGroupe, get_cache_key_nombre_participants_groupe
+
+
+class PrechauffageTests(TestCase):
+    def setUp(self):
+        self.referent = User.objects.create_user(username="referent")
+        self.epreuve = Epreuve.objects.create(
+            nom="Epreuve", code="", date_debut=timezone.now() + timedelta(minutes=5),
+            date_fin=timezone.now() + timedelta(hours=2), referent=self.referent,
+        )
+        self.ex_avec_jeux = Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent, titre="Avec",
+                                                    avec_jeu_de_test=True)
+        self.ex_sans_jeux = Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent, titre="Sans")
+        for i in range(2):
+            JeuDeTest.objects.create(exercice=self.ex_avec_jeux, instance=str(i), reponse=str(i))
+
+        self.groupe = GroupeParticipant.objects.create(nom="Groupe", referent=self.referent, statut="VALIDE")
+        GroupeParticipeAEpreuve.objects.create(groupe=self.groupe, epreuve=self.epreuve)
+        self.participants = [User.objects.create_user(username=f"p{i}") for i in range(4)]
+        for participant in self.participants:
+            ParticipantEstDansGroupe.objects.create(utilisateur=participant, groupe=self.groupe)
+
+        # Un participant a déjà ouvert l'épreuve, sans jeu de test attribué
+        UserEpreuve.objects.create(participant=self.participants[0], epreuve=self.epreuve)
+        UserExercice.objects.create(participant=self.participants[0], exercice=self.ex_avec_jeux)
+
+    def test_cree_les_lignes_manquantes(self):
+        rapport = prechauffer_epreuve(self.epreuve)
+
+        self.assertEqual(rapport.nb_participants, 4)
+        self.assertEqual(rapport.user_epreuves_crees, 3)
+        self.assertEqual(rapport.user_exercices_crees, 7)
+        self.assertEqual(rapport.jeux_de_test_attribues, 4)
+        self.assertEqual(UserEpreuve.objects.filter(epreuve=self.epreuve).count(), 4)
+        self.assertEqual(UserExercice.objects.filter(exercice__epreuve=self.epreuve).count(), 8)
+        self.assertFalse(UserExercice.objects.filter(exercice=self.ex_avec_jeux, jeu_de_test__isnull=True).exists())
+        self.assertEqual(cache.get(get_cache_key_nombre_participants(self.epreuve.id)), 4)
+        self.assertEqual(cache.get(get_cache_key_nombre_participants_groupe(self.groupe.id)), 4)
+
+    def test_idempotent(self):
+        prechauffer_epreuve(self.epreuve)
+        jeux_avant = dict(UserExercice.objects.values_list("id", "jeu_de_test_id"))
+
+        rapport = prechauffer_epreuve(self.epreuve)
+
+        self.assertEqual((rapport.user_epreuves_crees, rapport.user_exercices_crees,
+                          rapport.jeux_de_test_attribues), (0, 0, 0))
+        self.assertEqual(dict(UserExercice.objects.values_list("id", "jeu_de_test_id")), jeux_avant)
@@ -0,0 +1,111 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, MembreComite, UserExercice
+from epreuve.services.resultats import lister_resultats
+from intranet.models import GroupeParticipant, ParticipantEstDansGroupe
+from olympiadesnsi.utils import encode_id
+
+
+class ResultatsParticipantsTests(TestCase):
+    def setUp(self):
+        self.referent = User.objects.create_user(username="referent")
+        self.epreuve = Epreuve.objects.create(
+            nom="Epreuve résultats", code="", date_debut=timezone.now() - timedelta(hours=1),
+            date_fin=timezone.now() + timedelta(hours=1), referent=self.referent,
+        )
+        MembreComite.objects.get_or_create(epreuve=self.epreuve, membre=self.referent)
+        self.groupe = GroupeParticipant.objects.create(nom="Groupe A", referent=self.referent, statut="VALIDE")
+        self.exercices = []
+        for i in range(3):
+            exercice = Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent, titre=f"Exercice {i}",
+                                               avec_jeu_de_test=True)
+            JeuDeTest.objects.create(exercice=exercice, instance=f"instance {i}", reponse=str(i))
+            self.exercices.append(exercice)
+        for p in range(7):
+            participant = User.objects.create_user(username=f"equipe{p:02d}")
+            if p < 3:
+                ParticipantEstDansGroupe.objects.create(utilisateur=participant, groupe=self.groupe)
+            for i, exercice in enumerate(self.exercices):
+                UserExercice.objects.create(participant=participant, exercice=exercice,
+                                            jeu_de_test=exercice.jeux_de_test.first(),
+                                            solution_instance_participant=str(i), code_participant=f"code {p} {i}",
+                                            reponse_correcte=(p + i) % 2 == 0)
+        self.url = reverse("resultats_participants", kwargs={"hash_epreuve_id": encode_id(self.epreuve.id)})
+
+    def _toutes_les_pages(self, **filtres):
+        lignes, curseur, nb_pages = [], None, 0
+        while True:
+            page = lister_resultats(self.epreuve, curseur=curseur, taille=4, **filtres)
+            lignes += page.lignes
+            nb_pages += 1
+            if page.curseur_suivant is None:
+                return lignes, nb_pages
+            curseur = page.curseur_suivant
+
+    def test_pagination_par_curseur(self):
+        for tri in ("equipe", "-equipe", "exercice", "-exercice"):
+            lignes, nb_pages = self._toutes_les_pages(tri=tri)
+            self.assertEqual(len(lignes), 21)
+            self.assertEqual(len({ligne["id"] for ligne in lignes}), 21)
+            self.assertEqual(nb_pages, 6)
+
+        lignes, _ = self._toutes_les_pages(tri="exercice")
+        self.assertEqual([ligne["exerciceId"] for ligne in lignes[:7]], [self.exercices[0].id] * 7)
+
+    def test_curseur_mal_forme_refuse(self):
+        for valeurs in (["equipe00", 1], [[1], 2], [None, 2], [1, 2], [True, "equipe00"], {"a": 1}):
+            curseur = base64.urlsafe_b64encode(json.dumps(valeurs).encode()).decode()
+            with self.subTest(valeurs=valeurs), self.assertRaises(ValueError):
+                lister_resultats(self.epreuve, tri="exercice", curseur=curseur)
+
+    def test_filtres(self):
+        lignes, _ = self._toutes_les_pages(groupe_id=self.groupe.id, correct=True)
+        self.assertTrue(lignes)
+        self.assertTrue(all(ligne["correct"] and ligne["username"] < "equipe03" for ligne in lignes))
+
+        lignes, _ = self._toutes_les_pages(exercice_id=self.exercices[1].id)
+        self.assertEqual(len(lignes), 7)
+
+    def test_une_requete_par_page(self):
+        premiere = lister_resultats(self.epreuve, taille=4)
+        with self.assertNumQueries(1):
+            lister_resultats(self.epreuve, taille=4, curseur=premiere.curseur_suivant)
+
+    def test_vues_json(self):
+        self.client.force_login(self.referent)
+        reponse = self.client.get(self.url, {"taille": 5, "tri": "exercice", "correct": "1"})
+        self.assertEqual(reponse.status_code, 200)
+        donnees = reponse.json()
+        self.assertEqual(len(donnees["lignes"]), 5)
+        self.assertNotIn("code", donnees["lignes"][0])
+
+        ligne_id = donnees["lignes"][0]["id"]
+        detail = self.client.get(f"{self.url}{ligne_id}/").json()
+        self.assertEqual(detail["code"], UserExercice.objects.get(id=ligne_id).code_participant)
+
+        self.assertEqual(self.client.get(self.url, {"apres": "pas-un-curseur"}).status_code, 400)
+
+    def test_detail_d_une_autre_epreuve_refuse(self):
+        autre = Epreuve.objects.create(nom="Autre", code="", date_debut=timezone.now(),
+                                       date_fin=timezone.now() + timedelta(hours=1), referent=self.referent)
+        MembreComite.objects.get_or_create(epreuve=autre, membre=self.referent)
+        self.client.force_login(self.referent)
+        ligne_id = UserExercice.objects.filter(exercice__epreuve=self.epreuve).first().id
+        url = reverse("resultat_participant_detail",
+                      kwargs={"hash_epreuve_id": encode_id(autre.id), "user_exercice_id": ligne_id})
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_page_sans_donnees_detaillees(self):
+        self.client.force_login(self.referent)
+        reponse = self.client.get(reverse("rendus_participants", kwargs={"hash_epreuve_id": encode_id(self.epreuve.id)}))
+
+        self.assertEqual(reponse.status_code, 200)
+        self.assertNotContains(reponse, "code 0 0")
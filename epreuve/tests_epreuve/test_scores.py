@@ -0,0 +1,111 @@
+import io
+import os
+import tempfile
+import zipfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, MembreComite, UserEpreuve, UserExercice
+from epreuve.services.journal_soumissions import get_journal
+from epreuve.services.scores import reconstruire_scores_epreuve, recalculer_scores_exercice
+from epreuve.services.soumission import _ecrire_soumission, enregistrer_soumission
+from olympiadesnsi.utils import encode_id
+
+
+class ScoresTests(TestCase):
+    def setUp(self):
+        self.referent = User.objects.create_user(username="referent")
+        self.participant = User.objects.create_user(username="participant")
+        now = timezone.now()
+        self.epreuve = Epreuve.objects.create(
+            nom="Epreuve scores", code="", date_debut=now - timedelta(minutes=10),
+            date_fin=now + timedelta(hours=2), referent=self.referent,
+        )
+        MembreComite.objects.get_or_create(epreuve=self.epreuve, membre=self.referent)
+        self.user_epreuve = UserEpreuve.objects.create(participant=self.participant, epreuve=self.epreuve,
+                                                       debut_epreuve=now)
+        self.user_exercices = []
+        for i in range(2):
+            exercice = Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent, titre=f"Exercice {i}",
+                                               avec_jeu_de_test=True, nombre_max_soumissions=10)
+            jeu = JeuDeTest.objects.create(exercice=exercice, instance=str(i), reponse=str(i + 1))
+            self.user_exercices.append(UserExercice.objects.create(participant=self.participant, exercice=exercice,
+                                                                   jeu_de_test=jeu))
+
+    def _soumettre(self, indice: int, reponse: str) -> None:
+        exercice_id = self.user_exercices[indice].exercice_id
+        enregistrer_soumission(self.participant, self.epreuve.id, exercice_id, "code", reponse)
+
+    def _score(self) -> int:
+        self.user_epreuve.refresh_from_db()
+        return self.user_epreuve.nb_bonnes_reponses
+
+    def test_score_mis_a_jour_par_les_soumissions(self):
+        self._soumettre(0, "1")
+        self._soumettre(1, "2")
+        self.assertEqual(self._score(), 2)
+
+        self._soumettre(0, "faux")
+        self.assertEqual(self._score(), 1)
+        self.assertFalse(UserExercice.objects.get(pk=self.user_exercices[0].pk).reponse_correcte)
+
+    def test_score_inchange_sans_requete_supplementaire(self):
+        self._soumettre(0, "faux")
+        with self.assertNumQueries(2):
+            self._soumettre(0, "encore faux")
+        self.assertEqual(self._score(), 0)
+
+    def test_onglet_concurrent(self):
+        # Objet lu avant qu'un autre onglet n'enregistre une bonne réponse : la base fait foi
+        lu_avant = UserExercice.objects.get(pk=self.user_exercices[0].pk)
+        self._soumettre(0, "1")
+        self.assertEqual(self._score(), 1)
+
+        self.assertTrue(_ecrire_soumission(lu_avant, self.epreuve.id, 10, "code", "faux", False))
+
+        self.assertEqual(self._score(), 0)
+
+    def test_modification_du_jeu_de_test(self):
+        self._soumettre(0, "1")
+        JeuDeTest.objects.filter(exercice_id=self.user_exercices[0].exercice_id).update(reponse="autre", empreinte="")
+
+        recalculer_scores_exercice(self.user_exercices[0].exercice_id)
+
+        self.assertEqual(self._score(), 0)
+
+    def test_reconstruction(self):
+        UserExercice.objects.filter(pk=self.user_exercices[0].pk).update(solution_instance_participant="1")
+        UserExercice.objects.filter(pk=self.user_exercices[1].pk).update(solution_instance_participant="2")
+
+        self.assertEqual(reconstruire_scores_epreuve(self.epreuve), 2)
+        self.assertEqual(self._score(), 2)
+
+    def test_vidage_du_journal(self):
+        with tempfile.TemporaryDirectory() as dossier, override_settings(
+                SOUMISSIONS_WRITE_BEHIND=True,
+                SOUMISSIONS_JOURNAL_CHEMIN=os.path.join(dossier, "journal.sqlite3")):
+            self._soumettre(0, "1")
+            self.assertEqual(self._score(), 0)
+            get_journal().vider()
+        self.assertEqual(self._score(), 1)
+
+    def test_pages_organisateur(self):
+        self._soumettre(0, "1")
+        self.client.force_login(self.referent)
+        hash_epreuve_id = encode_id(self.epreuve.id)
+
+        reponse = self.client.get(reverse("rendus_participants", kwargs={"hash_epreuve_id": hash_epreuve_id}))
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual([p.bonnes_reponses for p in reponse.context["participants"]], [1])
+
+        with tempfile.TemporaryDirectory() as dossier, override_settings(EXPORTS_CHEMIN=dossier):
+            reponse = self.client.get(reverse("export_data", kwargs={"hash_epreuve_id": hash_epreuve_id,
+                                                                     "by": "participant"}))
+            with zipfile.ZipFile(io.BytesIO(b"".join(reponse.streaming_content))) as archive:
+                resume = archive.read("resume_epreuve.tsv").decode()
+        self.assertIn("participant\t", resume)
+        self.assertTrue(resume.strip().endswith("\t1"))
@@ -0,0 +1,167 @@
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, UserEpreuve, UserExercice
+from epreuve.services.journal_soumissions import MARGE_PURGE_COMPTEURS, appliquer_etats_en_attente, get_journal
+from epreuve.services.soumission import (
+    SOUMISSION_ENREGISTREE,
+    SOUMISSION_EXERCICE_INTROUVABLE,
+    SOUMISSION_MAX_ATTEINT,
+    enregistrer_soumission,
+)
+
+
+class SoumissionTestsMixin:
+    """Garanties communes aux deux modes d'enregistrement des soumissions."""
+
+    def setUp(self):
+        self.referent = User.objects.create_user(username="referent")
+        self.participant = User.objects.create_user(username="participant")
+        now = timezone.now()
+        self.epreuve = Epreuve.objects.create(
+            nom="Epreuve soumission",
+            code="",
+            date_debut=now - timedelta(minutes=10),
+            date_fin=now + timedelta(hours=2),
+            duree=60,
+            temps_limite=True,
+            referent=self.referent,
+        )
+        self.exercice = Exercice.objects.create(
+            epreuve=self.epreuve,
+            auteur=self.referent,
+            titre="Exercice 1",
+            avec_jeu_de_test=True,
+            nombre_max_soumissions=2,
+        )
+        self.jeu = JeuDeTest.objects.create(exercice=self.exercice, instance="1 2", reponse="3")
+        UserEpreuve.objects.create(participant=self.participant, epreuve=self.epreuve,
+                                   debut_epreuve=now - timedelta(minutes=5))
+        self.user_exercice = UserExercice.objects.create(participant=self.participant, exercice=self.exercice,
+                                                         jeu_de_test=self.jeu)
+
+    def test_maximum_de_soumissions_respecte(self):
+        for _ in range(2):
+            enregistrer_soumission(self.participant, self.epreuve.id, self.exercice.id, "code", "4")
+
+        resultat = enregistrer_soumission(self.participant, self.epreuve.id, self.exercice.id, "code", "3")
+
+        self.assertEqual(resultat.statut, SOUMISSION_MAX_ATTEINT)
+        self.user_exercice.refresh_from_db()
+        self.assertEqual(self.user_exercice.nb_soumissions, 2)
+        self.assertEqual(self.user_exercice.solution_instance_participant, "4")
+
+    def test_compteur_concurrent_non_ecrase(self):
+        # Un autre onglet a soumis entre la lecture et l'écriture : la base fait foi.
+        UserExercice.objects.filter(pk=self.user_exercice.pk).update(nb_soumissions=2)
+
+        resultat = enregistrer_soumission(self.participant, self.epreuve.id, self.exercice.id, "code", "3")
+
+        self.assertEqual(resultat.statut, SOUMISSION_MAX_ATTEINT)
+
+    def test_exercice_d_une_autre_epreuve_refuse(self):
+        autre_epreuve = Epreuve.objects.create(
+            nom="Autre", code="", date_debut=timezone.now(), date_fin=timezone.now() + timedelta(hours=1),
+            referent=self.referent,
+        )
+        resultat = enregistrer_soumission(self.participant, autre_epreuve.id, self.exercice.id, "code", "3")
+
+        self.assertEqual(resultat.statut, SOUMISSION_EXERCICE_INTROUVABLE)
+
+    def test_identifiant_exercice_invalide(self):
+        resultat = enregistrer_soumission(self.participant, self.epreuve.id, "abc", "code", "3")
+
+        self.assertEqual(resultat.statut, SOUMISSION_EXERCICE_INTROUVABLE)
+
+
+class EnregistrerSoumissionTests(SoumissionTestsMixin, TestCase):
+    def test_chemin_nominal_en_deux_requetes(self):
+        with self.assertNumQueries(2):
+            resultat = enregistrer_soumission(self.participant, self.epreuve.id, self.exercice.id, "print(3)", "3")
+
+        self.assertEqual(resultat.statut, SOUMISSION_ENREGISTREE)
+        self.assertTrue(resultat.reponse_valide)
+        self.assertEqual(resultat.nb_soumissions_restantes, 1)
+
+        self.user_exercice.refresh_from_db()
+        self.assertEqual(self.user_exercice.nb_soumissions, 1)
+        self.assertEqual(self.user_exercice.code_participant, "print(3)")
+        self.assertEqual(self.user_exercice.solution_instance_participant, "3")
+
+
+class JournalSoumissionsTests(SoumissionTestsMixin, TestCase):
+    """Mêmes garanties en mode write-behind, avec application différée par le journal."""
+
+    def setUp(self):
+        super().setUp()
+        self.dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dossier.cleanup)
+        reglages = override_settings(SOUMISSIONS_WRITE_BEHIND=True,
+                                     SOUMISSIONS_JOURNAL_CHEMIN=os.path.join(self.dossier.name, "journal.sqlite3"))
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+    def test_chemin_nominal_en_une_requete(self):
+        with self.assertNumQueries(1):
+            resultat = enregistrer_soumission(self.participant, self.epreuve.id, self.exercice.id, "print(3)", "3")
+
+        self.assertEqual(resultat.statut, SOUMISSION_ENREGISTREE)
+        self.assertEqual(resultat.nb_soumissions_restantes, 1)
+        self.user_exercice.refresh_from_db()
+        self.assertEqual(self.user_exercice.nb_soumissions, 0)
+
+        self.assertEqual(get_journal().vider(), 1)
+        self.user_exercice.refresh_from_db()
+        self.assertEqual(self.user_exercice.nb_soumissions, 1)
+        self.assertEqual(self.user_exercice.code_participant, "print(3)")
+        self.assertEqual(get_journal().nb_en_attente(), 0)
+
+    def test_maximum_de_soumissions_respecte(self):
+        for _ in range(2):
+            enregistrer_soumission(self.participant, self.epreuve.id, self.exercice.id, "code", "4")
+
+        resultat = enregistrer_soumission(self.participant, self.epreuve.id, self.exercice.id, "code", "3")
+
+        self.assertEqual(resultat.statut, SOUMISSION_MAX_ATTEINT)
+        get_journal().vider()
+        self.user_exercice.refresh_from_db()
+        self.assertEqual(self.user_exercice.nb_soumissions, 2)
+        self.assertEqual(self.user_exercice.solution_instance_participant, "4")
+
+    def test_vidage_pendant_une_soumission_ne_reinitialise_pas_le_compteur(self):
+        enregistrer_soumission(self.participant, self.epreuve.id, self.exercice.id, "code", "4")
+        # Une requête lit le UserExercice avant le vidage...
+        perime = UserExercice.objects.select_related("exercice__epreuve").get(pk=self.user_exercice.pk)
+        get_journal().vider()
+
+        # ... et journalise après : le compteur du journal fait toujours foi
+        self.assertEqual(get_journal().ajouter(perime, 2, "code", "3"), 2)
+        self.assertIsNone(get_journal().ajouter(perime, 2, "code", "5"))
+        get_journal().vider()
+        self.user_exercice.refresh_from_db()
+        self.assertEqual(self.user_exercice.nb_soumissions, 2)
+
+    def test_compteurs_purges_apres_la_fin_de_l_epreuve(self):
+        enregistrer_soumission(self.participant, self.epreuve.id, self.exercice.id, "code", "4")
+        get_journal().vider()
+        self.assertEqual(get_journal().nb_compteurs(), 1)
+
+        fin = self.epreuve.date_fin + MARGE_PURGE_COMPTEURS + timedelta(seconds=1)
+        with mock.patch("django.utils.timezone.now", return_value=fin):
+            get_journal().vider()
+
+        self.assertEqual(get_journal().nb_compteurs(), 0)
+
+    def test_etat_en_attente_visible_avant_vidage(self):
+        enregistrer_soumission(self.participant, self.epreuve.id, self.exercice.id, "print(3)", "3")
+
+        appliquer_etats_en_attente([self.user_exercice])
+
+        self.assertEqual(self.user_exercice.nb_soumissions, 1)
+        self.assertEqual(self.user_exercice.solution_instance_participant, "3")
@@ -25,7 +25,15 @@ urlpatterns = [
     path("<str:hash_epreuve_id>/exercice/<str:hash_exercice_id>/supprimer/", views.supprimer_exercice, name="supprimer_exercice"),
     path("<str:hash_epreuve_id>/exercice/<str:hash_exercice_id>/supprimer-jeux-de-test/", views.supprimer_jeux_de_test, name="supprimer_jeux_de_test"),
     path("<str:hash_epreuve_id>/correction/", views.rendus_participants, name="rendus_participants"),
+    path("<str:hash_epreuve_id>/correction/resultats/", views.resultats_participants, name="resultats_participants"),
+    path("<str:hash_epreuve_id>/correction/resultats/<int:user_exercice_id>/", views.resultat_participant_detail,
+         name="resultat_participant_detail"),
 
     # Export spécifique
     path("<str:hash_epreuve_id>/export/<str:by>/", views.export_data, name="export_data"),
+    path("<str:hash_epreuve_id>/export/resultats/<str:format_export>/", views.export_resultats,
+         name="export_resultats"),
+    path("<str:hash_epreuve_id>/exports/<int:tache_id>/", views.suivi_export, name="suivi_export"),
+    path("<str:hash_epreuve_id>/exports/<int:tache_id>/telecharger/", views.telecharger_export,
+         name="telecharger_export"),
 ]
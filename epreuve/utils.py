@@ -1,6 +1,9 @@
+import hashlib
 import logging
 import unicodedata
 
+from django.core.cache import cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,9 +40,93 @@ def est_valide_reponse_jeu_de_test(rep1: str, rep2: str) -> bool:
     return True
 
 
+def forme_canonique_reponse(reponse: str) -> str:
+    """
+    Renvoie la forme normalisée d'une réponse : même normalisation que
+    `est_valide_reponse_jeu_de_test`, appliquée au texte entier puis à chaque ligne.
+    Deux réponses sont équivalentes si et seulement si leurs formes canoniques sont égales.
+
+    Args:
+        reponse (str): La réponse brute.
+
+    Returns:
+        str: Les lignes normalisées, séparées par '\n'.
+    """
+    return '\n'.join(normalize(ligne) for ligne in normalize(str(reponse)).split('\n'))
+
+
+def empreinte_reponse(reponse_normalisee: str) -> str:
+    """
+    Calcule l'empreinte (SHA-256, hexadécimale) d'une réponse déjà mise sous forme canonique.
+    """
+    return hashlib.sha256(reponse_normalisee.encode('utf-8')).hexdigest()
+
+
+def est_valide_reponse_empreinte(reponse_soumise: str, empreinte_attendue: str) -> bool:
+    """
+    Compare une réponse soumise à l'empreinte précalculée de la réponse attendue.
+    Seule la réponse soumise est normalisée.
+
+    Args:
+        reponse_soumise (str): Réponse soumise par le participant.
+        empreinte_attendue (str): Empreinte stockée sur le jeu de test.
+
+    Returns:
+        bool: True si les deux réponses sont équivalentes, False sinon.
+    """
+    return empreinte_reponse(forme_canonique_reponse(reponse_soumise)) == empreinte_attendue
+
+
 def get_cache_key_liste_epreuves_publiques() -> str:
     """
     Renvoie la clé de cache utilisée pour la liste des épreuves publiques.
     """
     return "cache_liste_epreuves_publiques"
 
+
+def get_cache_key_nombre_participants(epreuve_id: int) -> str:
+    """
+    Renvoie la clé de cache du nombre de participants inscrits à une épreuve.
+    """
+    return f"epreuve_{epreuve_id}_nombre_participants"
+
+
+def get_cache_key_version_contenu_exercices(epreuve_id: int) -> str:
+    """
+    Renvoie la clé de cache du numéro de version du contenu des exercices d'une épreuve.
+    """
+    return f"epreuve_{epreuve_id}_version_contenu_exercices"
+
+
+def invalider_contenu_exercices(epreuve_id: int) -> None:
+    """
+    Rend obsolète le contenu des exercices d'une épreuve mis en cache, en changeant de version :
+    une lecture concurrente qui reconstruirait l'ancien contenu l'écrirait sous l'ancienne
+    version, devenue inaccessible.
+    """
+    cle: str = get_cache_key_version_contenu_exercices(epreuve_id)
+    try:
+        cache.incr(cle)
+    except ValueError:
+        # Clé absente (jamais lue ou expirée) : la prochaine lecture en créera une nouvelle.
+        pass
+
+
+def get_cache_key_version_donnees_export(epreuve_id: int) -> str:
+    """
+    Renvoie la clé de cache du compteur de modifications des données exportées d'une épreuve.
+    """
+    return f"epreuve_{epreuve_id}_version_donnees_export"
+
+
+def invalider_donnees_export(epreuve_id: int) -> None:
+    """
+    Signale une modification des données d'une épreuve (édition, score) : les
+    exports déjà construits ne correspondent plus à la version courante (voir
+    epreuve.services.exports).
+    """
+    try:
+        cache.incr(get_cache_key_version_donnees_export(epreuve_id))
+    except ValueError:
+        # Clé absente : la prochaine lecture en créera une nouvelle, différente de toutes les précédentes.
+        pass
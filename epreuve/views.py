@@ -1,25 +1,37 @@
-import csv
-import io
 import logging
-import zipfile
-from collections import defaultdict
-from io import BytesIO, StringIO
 from django.contrib.auth.models import User
 from django.db import transaction
-from django.db.models import QuerySet, Count, Prefetch, Case, When, IntegerField, Value, Q, F, Max
+from django.db.models import QuerySet, Count, Q, F, Max
 from django.shortcuts import get_object_or_404
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponseRedirect, HttpRequest, HttpResponse
+from django.http import (
+    FileResponse, Http404, JsonResponse, HttpResponseRedirect, HttpRequest, HttpResponse, StreamingHttpResponse,
+)
+from django.utils.http import content_disposition_header
 from django.utils.text import slugify
 from django.views.decorators.csrf import csrf_protect
 from django.utils import timezone
-from django_ratelimit.decorators import ratelimit
 from django.contrib import messages
 from django.urls import reverse
-from epreuve.models import Epreuve, Exercice, JeuDeTest, MembreComite, UserEpreuve, UserExercice
+from epreuve.models import Epreuve, Exercice, JeuDeTest, MembreComite, TacheExport, UserEpreuve, UserExercice
 from epreuve.forms import ExerciceForm, AjoutOrganisateurForm
-from epreuve.utils import est_valide_reponse_jeu_de_test
+from epreuve.services.contenu_exercices import ContenuExercice, fusionner_exercice_json, get_contenu_exercices
+from epreuve.services.copie_epreuve import dupliquer_epreuve
+from epreuve.services.export_resultats import parquet_disponible
+from epreuve.services.exports import construire_sans_worker, demander_export, marquer_acces
+from epreuve.services.journal_soumissions import appliquer_etats_en_attente
+from epreuve.services.participation import charger_user_exercices
+from epreuve.services.resultats import PageResultats, TAILLE_PAGE_DEFAUT, detail_resultat, lister_resultats
+from epreuve.services.scores import recalculer_scores_exercice, recompter_bonnes_reponses
+from epreuve.services.soumission import (
+    ResultatSoumission,
+    SOUMISSION_EXERCICE_INTROUVABLE,
+    SOUMISSION_HORS_DELAI,
+    SOUMISSION_MAX_ATTEINT,
+    enregistrer_soumission,
+)
+from epreuve.utils import invalider_donnees_export
 from inscription.models import GroupeParticipeAEpreuve
 from intranet.models import GroupeParticipant
 import olympiadesnsi.decorators as decorators
@@ -27,6 +39,7 @@ import json
 from typing import List, Optional, Dict, Set, Tuple, cast, Any, Union
 
 from olympiadesnsi.constants import MAX_CODE_LENGTH, MAX_REPONSE_LENGTH
+from olympiadesnsi.limitation_debit import limiter_debit
 from olympiadesnsi.utils import encode_id
 
 logger = logging.getLogger(__name__)
@@ -35,8 +48,7 @@ logger = logging.getLogger(__name__)
 @csrf_protect
 @login_required
 @decorators.participant_inscrit_a_epreuve_required
-@ratelimit(key='user', rate='10/m', block=True)
-@ratelimit(key='user', rate='2/s', block=True)
+@limiter_debit(key='user', rates=['10/m', '2/s'])
 def soumettre(request: HttpRequest, epreuve_id=None) -> Union[JsonResponse, HttpResponseRedirect, HttpResponse]:
     """
     Gère la soumission d'une réponse à un exercice par un participant.
@@ -71,62 +83,43 @@ def soumettre(request: HttpRequest, epreuve_id=None) -> Union[JsonResponse, Http
         if len(code_soumis) > MAX_CODE_LENGTH or len(solution_instance) > MAX_REPONSE_LENGTH:
             context = {'message': "La taille des données envoyées est trop importante."}
             return render(request, 'olympiadesnsi/erreur.html', context, status=413)
-        # Récupération de l'exercice
-        try:
-            exercice: Exercice = Exercice.objects.get(id=exercice_id)
-        except Exercice.DoesNotExist:
-            return JsonResponse({'success': False, 'error': 'Exercice introuvable'}, status=404)
-
-        # Récupération de l'épreuve associée
-        epreuve: Epreuve = exercice.epreuve
 
-        # Vérification de l'état de l'épreuve
-        if epreuve.pas_commencee() or epreuve.est_close():
-            return redirect(reverse('afficher_epreuve', kwargs={'hash_epreuve_id': encode_id(epreuve.id)}))
-
-        # Gestion du temps limite de l'épreuve
-        if epreuve.temps_limite:
-            user_epreuve: UserEpreuve = UserEpreuve.objects.get(participant=request.user, epreuve=epreuve)
-            if not user_epreuve.debut_epreuve:
-                user_epreuve.debut_epreuve = timezone.now()
-                user_epreuve.save()
+        # Lecture jointe + écriture conditionnelle (voir epreuve.services.soumission)
+        resultat: ResultatSoumission = enregistrer_soumission(
+            participant=cast(User, request.user),
+            epreuve_id=epreuve_id,
+            exercice_id=exercice_id,
+            code_soumis=code_soumis,
+            solution_instance=solution_instance,
+        )
 
-            temps_restant: int = user_epreuve.temps_restant()
-            if temps_restant < 1:
-                return redirect(reverse('afficher_epreuve', kwargs={'hash_epreuve_id': encode_id(epreuve.id)}))
+        if resultat.statut == SOUMISSION_EXERCICE_INTROUVABLE:
+            return JsonResponse({'success': False, 'error': 'Exercice introuvable'}, status=404)
 
-        # Récupération ou création de l'association UserExercice
-        user_exercice: UserExercice = UserExercice.objects.get(participant=request.user, exercice=exercice)
+        # Épreuve non ouverte, close, ou temps du participant écoulé
+        if resultat.statut == SOUMISSION_HORS_DELAI:
+            return redirect(reverse('afficher_epreuve', kwargs={'hash_epreuve_id': encode_id(epreuve_id)}))
 
-        # Vérification du nombre de soumissions
-        if user_exercice.nb_soumissions >= exercice.nombre_max_soumissions:
+        if resultat.statut == SOUMISSION_MAX_ATTEINT:
             return JsonResponse({'success': False, 'error': 'Nombre maximum de soumissions atteint'}, status=403)
 
-        # Mise à jour des données de soumission
-        user_exercice.code_participant = code_soumis
-        user_exercice.solution_instance_participant = solution_instance
-        user_exercice.nb_soumissions += 1
-        user_exercice.save()
+        exercice: Exercice = resultat.exercice
 
         # Traitement spécifique pour les exercices sans jeu de test
         if not exercice.avec_jeu_de_test:
             return JsonResponse({
                 'success': True,
-                'nb_soumissions_restantes': exercice.nombre_max_soumissions - user_exercice.nb_soumissions,
-                'code_enregistre': user_exercice.code_participant,
-                'reponse_jeu_de_test_enregistree': user_exercice.solution_instance_participant
+                'nb_soumissions_restantes': resultat.nb_soumissions_restantes,
+                'code_enregistre': code_soumis,
+                'reponse_jeu_de_test_enregistree': solution_instance
             })
 
-        # Vérification de la solution pour les exercices avec jeu de test
-        jeu_de_test: Optional[JeuDeTest] = user_exercice.jeu_de_test
-        reponse_valide: bool = (jeu_de_test is not None and est_valide_reponse_jeu_de_test(solution_instance, jeu_de_test.reponse))
-
         return JsonResponse({
             'success': True,
-            'reponse_valide': reponse_valide,
-            'nb_soumissions_restantes': exercice.nombre_max_soumissions - user_exercice.nb_soumissions,
-            'code_enregistre': user_exercice.code_participant,
-            'reponse_jeu_de_test_enregistree': user_exercice.solution_instance_participant,
+            'reponse_valide': resultat.reponse_valide,
+            'nb_soumissions_restantes': resultat.nb_soumissions_restantes,
+            'code_enregistre': code_soumis,
+            'reponse_jeu_de_test_enregistree': solution_instance,
             'code_requis': exercice.code_a_soumettre != 'aucun',
         })
 
@@ -222,51 +215,39 @@ def afficher_epreuve(request: HttpRequest, epreuve_id: int) -> HttpResponse:
         if temps_restant < 1:
             return render(request, 'epreuve/erreurs/temps_ecoule.html')
 
-    # Sélection de tous les exercices associés à l'épreuve, ordonnés par leur numéro.
-    exercices: List[Exercice] = list(Exercice.objects.filter(epreuve=epreuve).order_by('numero'))
-    exercice_a_traiter_si_un_par_un: Optional[Exercice] = None
+    # Partie statique des exercices (commune à tous les participants, en cache), dans l'ordre de leur numéro.
+    exercices: List[ContenuExercice] = get_contenu_exercices(epreuve)
+    user_exercices: Dict[int, UserExercice] = charger_user_exercices(user, exercices)
+    appliquer_etats_en_attente(user_exercices.values())
+
+    exercice_a_traiter_si_un_par_un: Optional[ContenuExercice] = None
     for exercice in exercices:
-        user_exercice, _ = UserExercice.objects.get_or_create(exercice=exercice, participant=user)
+        user_exercice = user_exercices[exercice.id]
         if not user_exercice.solution_instance_participant or not user_exercice.code_participant:
             exercice_a_traiter_si_un_par_un = exercice
-        if exercice.avec_jeu_de_test and not user_exercice.jeu_de_test:
-            user_exercice.jeu_de_test = exercice.pick_jeu_de_test()
-            user_exercice.save()
 
     # Si l'épreuve impose de passer les exercices un par un, filtrer pour ne garder que le premier non complété.
     if epreuve and epreuve.exercices_un_par_un:
         exercices = [exercice_a_traiter_si_un_par_un]
 
-    # Préparation des données des exercices pour le frontend.
-    exercices_json_list: List[Dict[str, object]] = []
+    # Seules les données propres au participant sont sérialisées ici.
+    exercices_json_list: List[str] = []
     for ex in exercices:
-        user_exercice, _ = UserExercice.objects.get_or_create(exercice=ex, participant=user)
+        user_exercice = user_exercices[ex.id]
         jeu_de_test: Optional[JeuDeTest] = user_exercice.jeu_de_test
 
-        exercice_dict: Dict[str, object] = {
-            'id': ex.id,
-            'titre': ex.titre,
-            'bareme': ex.bareme,
-            'enonce': ex.enonce,
-            'enonce_code': ex.enonce_code,
-            'type_exercice': ex.type_exercice,
-            'avec_jeu_de_test': ex.avec_jeu_de_test,
+        donnees_participant: Dict[str, object] = {
             'reponse_jeu_de_test_enregistree': user_exercice.solution_instance_participant,
             'code_enregistre': user_exercice.code_participant,
-            'code_a_soumettre': ex.code_a_soumettre,
             'nb_soumissions_restantes': ex.nombre_max_soumissions - user_exercice.nb_soumissions,
-            'nb_max_soumissions': ex.nombre_max_soumissions,
-            'retour_en_direct': ex.retour_en_direct,
             'instance_de_test': jeu_de_test.instance if jeu_de_test else "",
             'reponse_valide': str(user_exercice.solution_instance_participant).split() == (
                 str(jeu_de_test.reponse).split() if jeu_de_test else ""),
-            "lecture_seule": False,
         }
 
-        exercices_json_list.append(exercice_dict)
+        exercices_json_list.append(fusionner_exercice_json(ex, donnees_participant))
 
-    # Conversion des données des exercices en JSON pour utilisation côté client.
-    exercices_json: str = json.dumps(exercices_json_list)
+    exercices_json: str = "[" + ", ".join(exercices_json_list) + "]"
     return render(request, 'epreuve/afficher_epreuve.html', {
         'epreuve': epreuve,
         'exercices_json': exercices_json,
@@ -484,7 +465,8 @@ def desinscrire_groupe_epreuve(request: HttpRequest, epreuve_id: int, groupe_id:
     - supprime également les liens entre chaque membre et l’épreuve (`UserEpreuve`) ;
     - met à jour le cache du nombre de participants.
 
-    Elle est effectuée de manière atomique pour garantir l'intégrité des données.
+    Les participants sont supprimés par lots, chacun dans sa propre transaction, et le lien
+    en dernier : une désinscription interrompue peut simplement être relancée.
 
     Args:
         request (HttpRequest): La requête HTTP Django.
@@ -501,9 +483,7 @@ def desinscrire_groupe_epreuve(request: HttpRequest, epreuve_id: int, groupe_id:
     # Récupère le groupe concerné (ou 404 si non trouvé)
     groupe: GroupeParticipant = get_object_or_404(GroupeParticipant, pk=groupe_id)
 
-    # L’ensemble de la désinscription est encapsulé dans une transaction unique
-    with transaction.atomic():
-        epreuve.desinscrire_groupe(groupe)
+    epreuve.desinscrire_groupe(groupe)
 
     # Message de confirmation à l’utilisateur
     messages.success(
@@ -540,8 +520,9 @@ def supprimer_exercice(request: HttpRequest, epreuve_id: int, id_exercice: int)
     titre_exercice: str = exercice.titre
     nom_epreuve: str = exercice.epreuve.nom
 
-    # Procède à la suppression de l'exercice
+    # Procède à la suppression de l'exercice, puis recompte les bonnes réponses restantes
     exercice.delete()
+    recompter_bonnes_reponses(exercice.epreuve_id)
 
     # Affiche un message de succès incluant le titre de l'exercice et le nom de l'épreuve
     messages.success(request, f"L'exercice '{titre_exercice}' de l'épreuve '{nom_epreuve}' a été supprimé.")
@@ -575,6 +556,7 @@ def supprimer_jeux_de_test(request: HttpRequest, epreuve_id: int, id_exercice: i
     # Parcourt chaque jeu de test et le supprime
     for jdt in jdts:
         jdt.delete()
+    recalculer_scores_exercice(id_exercice)
 
     # Après la suppression, redirige vers la vue d'édition de l'exercice pour refléter les changements
     return redirect('editer_exercice',
@@ -663,18 +645,26 @@ def _creer_ou_editer_exercice(
                 for jeu in jeux_de_test:
                     jdt_anciens.add((jeu.instance, jeu.reponse))
 
+                jeux_modifies: bool = False
                 for jeu, res in zip(jeux, resultats):
                     jeu_tuple = (jeu.strip(), res.strip())
                     if all(jeu_tuple) and jeu_tuple not in jdt_anciens:
                         JeuDeTest.objects.create(exercice=exercice, instance=jeu_tuple[0], reponse=jeu_tuple[1])
+                        jeux_modifies = True
                     nouveaux_jdt.add(jeu_tuple)
 
                 for jeu in jeux_de_test:
                     if (jeu.instance.strip(), jeu.reponse.strip()) not in nouveaux_jdt:
                         jeu.delete()
+                        jeux_modifies = True
+
+                if jeux_modifies:
+                    # Les jeux de test figurent dans les exports (rendus et épreuve JSON)
+                    invalider_donnees_export(epreuve.id)
             else:
                 exercice.vider_jeux_de_test()
             exercice.assigner_jeux_de_test()
+            recalculer_scores_exercice(exercice.id)
             messages.success(request,
                              f"L'exercice {exercice.titre} a été {action} avec succès pour l'épreuve {epreuve.nom}.")
             return redirect('espace_organisateur')
@@ -710,39 +700,18 @@ def _creer_ou_editer_exercice(
 def rendus_participants(request: HttpRequest, epreuve_id: int) -> HttpResponse:
     epreuve: Epreuve = getattr(request, 'epreuve', None)  # Épreuve récupérée par le décorateur.
 
-    exercices = epreuve.exercices.prefetch_related(
-        'jeux_de_test',
-        Prefetch('user_exercices', queryset=UserExercice.objects.select_related('participant', 'jeu_de_test'))
-    ).all()
-
-    # Récupération des UserExercice avec les informations nécessaires
-    user_exercices: QuerySet[UserExercice] = UserExercice.objects.filter(
-        exercice__epreuve=epreuve,
-        exercice__avec_jeu_de_test=True
-    ).select_related('jeu_de_test')
-
-    au_moins_un_exo_avec_jeu_test: bool = False
-
-    # Création d'un dictionnaire pour compter les bonnes réponses pour chaque participant
-    bonnes_reponses_par_participant = defaultdict(int)
-    for ue in user_exercices:
-        if ue.exercice.avec_jeu_de_test:
-            au_moins_un_exo_avec_jeu_test = True
-            if ue.solution_instance_participant:
-                if est_valide_reponse_jeu_de_test(ue.solution_instance_participant, ue.jeu_de_test.reponse):
-                    bonnes_reponses_par_participant[ue.participant_id] += 1
-
-    # Ajout des informations de bonnes réponses aux participants
+    exercices = epreuve.exercices.only('id', 'titre', 'avec_jeu_de_test')
+
+    # Le rendu détaillé est chargé page par page par le navigateur (voir resultats_participants)
+    au_moins_un_exo_avec_jeu_test: bool = any(exercice.avec_jeu_de_test for exercice in exercices)
+
+    # Les bonnes réponses sont tenues à jour à chaque soumission (epreuve.services.scores)
     participants: QuerySet[User] = User.objects.filter(
         user_epreuves__epreuve=epreuve
     ).distinct().annotate(
         debut_epreuve=F('user_epreuves__debut_epreuve'),
         groupe_id=Max('appartenances__groupe_id'),
-        bonnes_reponses=Case(
-            *[When(id=k, then=Value(v)) for k, v in bonnes_reponses_par_participant.items()],
-            default=Value(0),
-            output_field=IntegerField()
-        )
+        bonnes_reponses=F('user_epreuves__nb_bonnes_reponses'),
     )
 
     # Statistiques
@@ -761,34 +730,138 @@ def rendus_participants(request: HttpRequest, epreuve_id: int) -> HttpResponse:
         )
     ).filter(debut_non_null__gt=0).count()
 
-    data_for_js = [
-        {
-            'exerciceId': ue.exercice.id,
-            'exerciceTitre': ue.exercice.titre,
-            'participantId': ue.participant.id,
-            'username': ue.participant.username,
-            'solution': ue.solution_instance_participant if ue.solution_instance_participant else "N/A",
-            'expected': ue.jeu_de_test.reponse if ue.jeu_de_test else "N/A",
-            'code': ue.code_participant if ue.code_participant else "N/A",
-            'test': ue.jeu_de_test.instance if ue.jeu_de_test else "N/A"
-        }
-        for ue in user_exercices
-    ]
     context = {
         'epreuve': epreuve,
         'exercices': exercices,
         'participants': participants,
+        'groupes': groupes.only('id', 'nom'),
         'total_inscrits': total_inscrits,
         'total_participants': total_participants,
         'total_groupes_inscrits': total_groupes_inscrits,
         'au_moins_un_exo_avec_jeu_test': au_moins_un_exo_avec_jeu_test,
         'total_groupes_avec_participation': total_groupes_avec_participation,
-        'data_for_js': data_for_js
+        'parquet_disponible': parquet_disponible(),
     }
 
     return render(request, 'epreuve/rendus_participants.html', context)
 
 
+def _parametre_entier(request: HttpRequest, nom: str) -> Optional[int]:
+    """
+    Lit un paramètre GET entier facultatif ('all' ou absent : pas de filtre).
+
+    Raises:
+        ValueError: Si la valeur n'est pas un entier.
+    """
+    valeur: Optional[str] = request.GET.get(nom)
+    if valeur in (None, '', 'all'):
+        return None
+    return int(valeur)
+
+
+@login_required
+@decorators.membre_comite_required
+def resultats_participants(request: HttpRequest, epreuve_id: int) -> JsonResponse:
+    """
+    Renvoie une page du rendu détaillé de l'épreuve (colonnes de synthèse), au format JSON.
+
+    Paramètres GET : `exercice`, `groupe`, `participant`, `correct` ('1' ou '0'), `tri`
+    ('equipe', 'exercice', préfixés de '-' pour l'ordre décroissant), `apres` (curseur
+    renvoyé par la page précédente) et `taille`.
+
+    Args:
+        request (HttpRequest): La requête HTTP.
+        epreuve_id (int): L'identifiant de l'épreuve.
+
+    Returns:
+        JsonResponse: `{"lignes": [...], "suivant": curseur ou null}`, ou une erreur 400.
+    """
+    epreuve: Epreuve = getattr(request, 'epreuve', None)  # Épreuve récupérée par le décorateur.
+    correct: Optional[str] = request.GET.get('correct')
+    try:
+        page: PageResultats = lister_resultats(
+            epreuve,
+            exercice_id=_parametre_entier(request, 'exercice'),
+            groupe_id=_parametre_entier(request, 'groupe'),
+            participant_id=_parametre_entier(request, 'participant'),
+            correct=None if correct in (None, '', 'all') else correct == '1',
+            tri=request.GET.get('tri', 'equipe'),
+            curseur=request.GET.get('apres') or None,
+            taille=_parametre_entier(request, 'taille') or TAILLE_PAGE_DEFAUT,
+        )
+    except ValueError as erreur:
+        return JsonResponse({'success': False, 'error': str(erreur)}, status=400)
+
+    return JsonResponse({'success': True, 'lignes': page.lignes, 'suivant': page.curseur_suivant})
+
+
+@login_required
+@decorators.membre_comite_required
+def resultat_participant_detail(request: HttpRequest, epreuve_id: int, user_exercice_id: int) -> JsonResponse:
+    """
+    Renvoie le code soumis et l'instance du jeu de test d'une ligne du rendu détaillé.
+    """
+    epreuve: Epreuve = getattr(request, 'epreuve', None)  # Épreuve récupérée par le décorateur.
+    detail: Optional[Dict[str, Any]] = detail_resultat(epreuve, user_exercice_id)
+    if detail is None:
+        return JsonResponse({'success': False, 'error': 'Résultat introuvable'}, status=404)
+    return JsonResponse({'success': True, **detail})
+
+
+# Types d'export des rendus, selon le critère d'organisation de l'archive
+_EXPORTS_RENDUS: Dict[str, str] = {
+    'exercice': TacheExport.RENDUS_EXERCICE,
+    'participant': TacheExport.RENDUS_PARTICIPANT,
+}
+
+_EXPORTS_RESULTATS: Dict[str, str] = {
+    'ndjson': TacheExport.RESULTATS_NDJSON,
+    'parquet': TacheExport.RESULTATS_PARQUET,
+}
+
+
+def _nom_archive_export(tache: TacheExport) -> str:
+    """
+    Nom proposé au téléchargement de l'archive d'une tâche d'export.
+    """
+    epreuve: Epreuve = tache.epreuve
+    if tache.type_export == TacheExport.EPREUVE_JSON:
+        return f"epreuve_{slugify(epreuve.nom)}.zip"
+    if tache.type_export in _EXPORTS_RESULTATS.values():
+        return f"resultats_{slugify(epreuve.nom)}_{epreuve.id}.{tache.extension()}"
+    by: str = next(by for by, type_export in _EXPORTS_RENDUS.items() if type_export == tache.type_export)
+    return f"{epreuve.nom[:30]}_{by}_data_export_{epreuve.id}.zip"
+
+
+def _diffusion_sans_worker(tache: TacheExport) -> Optional[StreamingHttpResponse]:
+    """
+    Sans worker, réserve la tâche et transmet l'artefact pendant sa construction.
+    Renvoie None si la tâche est prise par un autre (ou déjà construite, pour Parquet).
+    """
+    flux = construire_sans_worker(tache)
+    if flux is None:
+        return None
+    return StreamingHttpResponse(flux, content_type=tache.type_mime(), headers={
+        'Content-Disposition': content_disposition_header(True, _nom_archive_export(tache)),
+    })
+
+
+def _reponse_tache_export(tache: TacheExport) -> HttpResponse:
+    """
+    Envoie l'artefact s'il est prêt. Sinon, sans worker, le transmet pendant sa construction ;
+    avec un worker (ou s'il est déjà en construction), redirige vers la page de suivi de la tâche.
+    """
+    if not tache.est_terminee():
+        reponse = _diffusion_sans_worker(tache)
+        if reponse is not None:
+            return reponse
+    if tache.est_terminee():
+        marquer_acces(tache)
+        return FileResponse(open(tache.chemin_fichier(), 'rb'), as_attachment=True,
+                            filename=_nom_archive_export(tache), content_type=tache.type_mime())
+    return redirect('suivi_export', hash_epreuve_id=encode_id(tache.epreuve_id), tache_id=tache.id)
+
+
 @login_required
 @decorators.membre_comite_required
 def export_data(request, epreuve_id: int, by: str) -> HttpResponse:
@@ -796,115 +869,80 @@ def export_data(request, epreuve_id: int, by: str) -> HttpResponse:
     Génère et retourne une archive zip des données des utilisateurs, organisées par exercice ou par participant,
     pour une épreuve donnée.
 
+    L'archive est construite une fois par version des données de l'épreuve (voir
+    epreuve.services.exports) : tant qu'aucune soumission ni modification n'a eu lieu, les
+    demandes suivantes renvoient le même fichier. Si elle est construite en tâche de fond,
+    l'organisateur est redirigé vers la page de suivi ; sinon, elle lui est transmise pendant
+    sa construction.
+
     Args:
         request (HttpRequest): L'objet HttpRequest.
         epreuve_id (int): ID de l'épreuve pour laquelle les données doivent être exportées.
         by (str): Critère d'organisation de l'exportation ('exercice' ou 'participant').
 
     Returns:
-        HttpResponse: Une réponse HTTP avec l'archive zip en pièce jointe.
+        HttpResponse: L'archive zip en pièce jointe, ou une redirection vers le suivi de l'export.
     """
     epreuve: Epreuve = getattr(request, 'epreuve', None)  # Épreuve récupérée par le décorateur.
+    type_export: Optional[str] = _EXPORTS_RENDUS.get(by)
+    if type_export is None:
+        raise Http404("Critère d'export inconnu")
 
-    user_exercices = (UserExercice.objects.filter(exercice__epreuve=epreuve).
-                      select_related('exercice', 'participant', 'jeu_de_test'))
-
-    user_epreuves = UserEpreuve.objects.filter(epreuve=epreuve).select_related('participant')
-
-    # Calculer les bonnes réponses
-    bonnes_reponses_dict = {}
-    for ue in user_exercices:
-        # Comparaison en tenant compte de strip()
-        is_correct = est_valide_reponse_jeu_de_test(ue.solution_instance_participant, ue.jeu_de_test.reponse) if ue.jeu_de_test and ue.solution_instance_participant else False
-        bonnes_reponses_dict.setdefault(ue.participant.username, 0)
-        if is_correct:
-            bonnes_reponses_dict[ue.participant.username] += 1
-
-    # Préparation du fichier CSV
-    csv_output = StringIO()
-    writer = csv.writer(csv_output, delimiter='\t')
-    writer.writerow(['username', 'date/heure de debut', 'nombre de bonnes reponses'])
-
-    for user_epreuve in UserEpreuve.objects.filter(epreuve=epreuve).select_related('participant'):
-        username = user_epreuve.participant.username
-        debut = user_epreuve.debut_epreuve.strftime('%Y-%m-%d %H:%M:%S') if user_epreuve.debut_epreuve else 'N/A'
-        bonnes_reponses = bonnes_reponses_dict.get(username, 0)
-        writer.writerow([username, debut, bonnes_reponses])
-
-    au_moins_un_exo_avec_jeu_test: bool = False
-
-    # Création d'un dictionnaire pour compter les bonnes réponses pour chaque participant
-    bonnes_reponses_par_participant = defaultdict(int)
-    for ue in user_exercices:
-        if ue.exercice.avec_jeu_de_test:
-            au_moins_un_exo_avec_jeu_test = True
-            if ue.solution_instance_participant:
-                if est_valide_reponse_jeu_de_test(ue.solution_instance_participant, ue.jeu_de_test.reponse):
-                    bonnes_reponses_par_participant[ue.participant_id] += 1
-
-    # Ajout des informations de bonnes réponses aux participants
-    participants: QuerySet[User] = User.objects.filter(
-        user_epreuves__epreuve=epreuve
-    ).distinct().annotate(
-        bonnes_reponses=Case(
-            *[When(id=k, then=Value(v)) for k, v in bonnes_reponses_par_participant.items()],
-            default=Value(0),
-            output_field=IntegerField()
-        )
-    )
+    return _reponse_tache_export(demander_export(epreuve, type_export, demandeur=request.user))
+
+
+@login_required
+@decorators.membre_comite_required
+def export_resultats(request: HttpRequest, epreuve_id: int, format_export: str) -> HttpResponse:
+    """
+    Exporte les résultats de l'épreuve dans un seul fichier tabulaire, une ligne par exercice
+    de chaque participant, pour les scripts de correction (voir epreuve.services.export_resultats).
 
-    # Création du fichier zip en mémoire
-    zip_buffer = BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'a', zipfile.ZIP_DEFLATED, False) as zip_file:
-        zip_file.writestr('resume_epreuve.tsv', csv_output.getvalue())
-        if by == 'exercice':
-            for exercice in epreuve.exercices.all().prefetch_related('user_exercices'):
-                for user_exercice in exercice.user_exercices.all():
-                    user = user_exercice.participant
-                    nom_participant: str = user.username
-                    exercice_titre: str = exercice.titre
-                    exercice_id: int = exercice.id
-                    user_folder = f"{exercice_titre}/{nom_participant}"
-                    if exercice.avec_jeu_de_test:
-                        solution = user_exercice.solution_instance_participant.strip() if user_exercice.solution_instance_participant else ""
-                        expected = user_exercice.jeu_de_test.reponse.strip() if user_exercice.jeu_de_test and user_exercice.jeu_de_test.reponse else ""
-                        jeu_test_instance: str = "N/A"
-                        if user_exercice.jeu_de_test:
-                            jeu_test_instance = user_exercice.jeu_de_test.instance
-                        zip_file.writestr(f"{user_folder}/reponse_{exercice_id}_{nom_participant}.txt",
-                                          f"##### reponse_equipe :\n{solution}\n\n"
-                                          f"##### reponse_attendue :\n{expected}\n\n"
-                                          f"##### jeu_de_test :\n{jeu_test_instance}")
-
-                    code = user_exercice.code_participant if user_exercice.code_participant else ""
-                    zip_file.writestr(f"{user_folder}/code_{exercice_id}_{nom_participant}.py", code)
-        elif by == 'participant':
-            for user in User.objects.filter(user_exercices__exercice__epreuve=epreuve).distinct():
-                nom_participant: str = user.username
-                for user_exercice in user_exercices.filter(participant=user):
-                    exercice: Exercice = user_exercice.exercice
-                    exercice_folder = f"{nom_participant}/{exercice.titre}"
-                    if exercice.avec_jeu_de_test:
-                        solution = user_exercice.solution_instance_participant.strip() if user_exercice.solution_instance_participant else ""
-                        expected = user_exercice.jeu_de_test.reponse.strip() if user_exercice.jeu_de_test and user_exercice.jeu_de_test.reponse else ""
-                        jeu_test_instance: str = "N/A"
-                        if user_exercice.jeu_de_test:
-                            jeu_test_instance = user_exercice.jeu_de_test.instance
-                        zip_file.writestr(f"{exercice_folder}/reponse_{nom_participant}_{exercice.id}.txt",
-                                          f"##### reponse_equipe :\n{solution}\n\n"
-                                          f"##### reponse_attendue :\n{expected}\n\n"
-                                          f"##### jeu_de_test :\n{jeu_test_instance}")
-
-                    code = user_exercice.code_participant if user_exercice.code_participant else ""
-                    zip_file.writestr(f"{exercice_folder}/code_{nom_participant}_{exercice.id}.py", code)
-
-    # Réinitialiser le curseur du fichier en mémoire
-    zip_buffer.seek(0)
-
-    # Créer la réponse HTTP avec le fichier zip en pièce jointe
-    response = HttpResponse(zip_buffer, content_type='application/zip')
-    response['Content-Disposition'] = f'attachment; filename={epreuve.nom[:30]}_{by}_data_export_{epreuve_id}.zip'
-    return response
+    Args:
+        request (HttpRequest): L'objet HttpRequest.
+        epreuve_id (int): ID de l'épreuve exportée.
+        format_export (str): 'ndjson', ou 'parquet' si pyarrow est installé.
+
+    Returns:
+        HttpResponse: Le fichier en pièce jointe, ou une redirection vers le suivi de l'export.
+    """
+    type_export: Optional[str] = _EXPORTS_RESULTATS.get(format_export)
+    if type_export is None or (type_export == TacheExport.RESULTATS_PARQUET and not parquet_disponible()):
+        raise Http404("Format d'export indisponible")
+
+    return _reponse_tache_export(demander_export(request.epreuve, type_export, demandeur=request.user))
+
+
+@login_required
+@decorators.membre_comite_required
+def suivi_export(request: HttpRequest, epreuve_id: int, tache_id: int) -> HttpResponse:
+    """
+    Affiche l'avancement d'une tâche d'export (la page se recharge tant qu'elle n'est pas terminée).
+
+    Sans worker, personne d'autre ne construira une tâche remise en attente (téléchargement
+    interrompu) : la page la réserve et la transmet elle-même.
+    """
+    tache: TacheExport = get_object_or_404(TacheExport, id=tache_id, epreuve_id=epreuve_id)
+    if not tache.est_terminee() and tache.statut != TacheExport.ECHEC:
+        reponse = _diffusion_sans_worker(tache)
+        if reponse is not None:
+            return reponse
+    return render(request, 'epreuve/suivi_export.html', {
+        'epreuve': request.epreuve,
+        'tache': tache,
+        'nom_archive': _nom_archive_export(tache),
+    })
+
+
+@login_required
+@decorators.membre_comite_required
+def telecharger_export(request: HttpRequest, epreuve_id: int, tache_id: int) -> HttpResponse:
+    """
+    Envoie l'archive d'une tâche d'export terminée.
+    """
+    tache: TacheExport = get_object_or_404(TacheExport, id=tache_id, epreuve_id=epreuve_id,
+                                           statut=TacheExport.TERMINEE)
+    return _reponse_tache_export(tache)
 
 
 @login_required
@@ -918,8 +956,8 @@ def copier_epreuve(request: HttpRequest, epreuve_id: int):
     qui commence par "copie de".
     Les exercices associés à l'épreuve sont également copiés.
     Les jeux de données associés aux exercices sont également copiés, dans la limite
-     de 5 par exercice.  
-    
+    de 5 par exercice (voir epreuve.services.copie_epreuve).
+
     Args:
         request (HttpRequest): L'objet requête HTTP.
         epreuve_id (int): L'identifiant de l'épreuve à copier
@@ -927,42 +965,7 @@ def copier_epreuve(request: HttpRequest, epreuve_id: int):
     Returns:
         HttpResponse: La réponse HTTP rendue.
     """
-    epreuve_originale: Epreuve = request.epreuve
-
-    nom_unique: str = Epreuve.generer_nom_copie(epreuve_originale.nom, epreuve_originale.referent)
-    # Création de la copie
-    nouvelle_epreuve: Epreuve = Epreuve(
-        nom=nom_unique,
-        date_debut=epreuve_originale.date_debut,
-        date_fin=epreuve_originale.date_fin,
-        duree=epreuve_originale.duree,
-        referent=epreuve_originale.referent,
-        exercices_un_par_un=epreuve_originale.exercices_un_par_un,
-        temps_limite=epreuve_originale.temps_limite,
-        inscription_externe=False,  # forcé à False
-    )
-    nouvelle_epreuve.save()  # génère l'ID et le code automatiquement via save()
-
-    # Ajout de request.user au comité de la nouvelle épreuve
-    MembreComite.objects.create(epreuve=nouvelle_epreuve, membre=request.user)
-    cinq_jeux_de_test: Optional[QuerySet[JeuDeTest]] = None
-    for exercice in epreuve_originale.get_exercices():
-        if exercice.avec_jeu_de_test:
-            cinq_jeux_de_test = exercice.get_jeux_de_test()[:5]
-        exercice.pk = None  # on crée un nouvel objet
-        exercice.epreuve = nouvelle_epreuve
-        exercice.auteur = request.user
-        exercice.save()
-
-        # Copie jusqu’à 5 jeux de tests_epreuve, s’il y en a
-        if exercice.avec_jeu_de_test:
-            for jeu in cinq_jeux_de_test:
-                # Création d’un nouveau jeu de test lié à l’exercice copié
-                JeuDeTest.objects.create(
-                    exercice=exercice,  # le nouvel exercice
-                    instance=jeu.instance,
-                    reponse=jeu.reponse
-                )
+    dupliquer_epreuve(request.epreuve, cast(User, request.user))
 
     messages.success(request, f"L'épreuve a été copiée avec succès.")
     return redirect('espace_organisateur')
@@ -976,96 +979,14 @@ def exporter_epreuve(request: HttpRequest, epreuve_id: int) -> HttpResponse:
     - une version complète avec tous les jeux de test,
     - une version allégée avec seulement les 5 premiers jeux de test par exercice.
 
-    Cette vue utilise une stratégie optimisée pour réduire les requêtes à la base de données,
-    en préchargeant tous les exercices et leurs jeux de test associés.
+    Le contenu est produit par epreuve.services.export_epreuve ; comme pour `export_data`,
+    l'archive est réutilisée tant que les données de l'épreuve ne changent pas.
 
     Args:
         request (HttpRequest): La requête HTTP envoyée par l'utilisateur.
         epreuve_id (int): Identifiant de l'épreuve à exporter.
 
     Returns:
-        HttpResponse: Une réponse contenant une archive ZIP prête à être téléchargée.
+        HttpResponse: L'archive ZIP, ou une redirection vers le suivi de l'export.
     """
-
-    # Récupération de l'épreuve ou 404 si elle n'existe pas
-    epreuve: Epreuve = request.epreuve
-    epreuve_id: int = epreuve.id
-
-    # Préchargement de tous les exercices et jeux de test associés
-    exercices_qs: List[Exercice] = (
-        Epreuve.objects
-        .prefetch_related(
-            Prefetch("exercices", queryset=Exercice.objects.prefetch_related("jeux_de_test"))
-        )
-        .get(id=epreuve.id)
-        .exercices.all()  # .exercices grâce au related_name
-    )
-
-    def construire_dictionnaire_export(max_tests: Optional[int] = None) -> Dict[str, Any]:
-        """
-        Construit un dictionnaire représentant l'épreuve et ses exercices,
-        avec une option pour limiter le nombre de jeux de test.
-
-        Args:
-            max_tests (Optional[int]): Nombre maximal de jeux de test par exercice.
-                Si None, inclut tous les jeux.
-
-        Returns:
-            Dict[str, Any]: Dictionnaire structuré pour export JSON.
-        """
-        dictionnaire_epreuve: Dict[str, Any] = {
-            "nom": epreuve.nom,
-            "date_debut": epreuve.date_debut.isoformat(),
-            "date_fin": epreuve.date_fin.isoformat(),
-            "duree": epreuve.duree,
-            "exercices_un_par_un": epreuve.exercices_un_par_un,
-            "temps_limite": epreuve.temps_limite,
-            "exercices": []
-        }
-
-        for exercice in exercices_qs:
-            dictionnaire_exercice: Dict[str, Any] = {
-                "titre": exercice.titre,
-                "auteur_username": exercice.auteur.username if exercice.auteur else None,
-                "bareme": exercice.bareme,
-                "type_exercice": exercice.type_exercice,
-                "enonce": exercice.enonce,
-                "enonce_code": exercice.enonce_code,
-                "avec_jeu_de_test": exercice.avec_jeu_de_test,
-                "separateur_jeu_test": exercice.separateur_jeu_test,
-                "separateur_reponse_jeudetest": exercice.separateur_reponse_jeudetest,
-                "retour_en_direct": exercice.retour_en_direct,
-                "code_a_soumettre": exercice.code_a_soumettre,
-                "nombre_max_soumissions": exercice.nombre_max_soumissions,
-                "jeux_de_test": []
-            }
-
-            if exercice.avec_jeu_de_test:
-                jeux_de_test: List[JeuDeTest] = list(exercice.get_jeux_de_test())
-                if max_tests is not None:
-                    jeux_de_test = jeux_de_test[:max_tests]
-                dictionnaire_exercice["jeux_de_test"] = [
-                    {"instance": jeu.instance, "reponse": jeu.reponse}
-                    for jeu in jeux_de_test
-                ]
-
-            dictionnaire_epreuve["exercices"].append(dictionnaire_exercice)
-
-        return dictionnaire_epreuve
-
-    # Génération des deux versions JSON
-    nom_slugifie: str = slugify(epreuve.nom)
-    json_complet: str = json.dumps(construire_dictionnaire_export(), ensure_ascii=False, indent=2)
-    json_light: str = json.dumps(construire_dictionnaire_export(max_tests=5), ensure_ascii=False, indent=2)
-
-    # Création de l’archive ZIP en mémoire
-    buffer_zip: io.BytesIO = io.BytesIO()
-    with zipfile.ZipFile(buffer_zip, "w", zipfile.ZIP_DEFLATED) as archive:
-        archive.writestr(f"{nom_slugifie}_complete.json", json_complet)
-        archive.writestr(f"{nom_slugifie}_light.json", json_light)
-
-    # Préparation de la réponse HTTP
-    buffer_zip.seek(0)
-    response: HttpResponse = HttpResponse(buffer_zip, content_type="application/zip")
-    response["Content-Disposition"] = f'attachment; filename="epreuve_{nom_slugifie}.zip"'
-    return response
+    return _reponse_tache_export(demander_export(request.epreuve, TacheExport.EPREUVE_JSON, demandeur=request.user))
@@ -0,0 +1,130 @@
+"""
+Création en masse des comptes participants d'un groupe.
+
+Les comptes, leur appartenance au groupe d'autorisations « Participant » et au groupe de
+participants sont écrits dans la transaction de l'appelant, sans relire les utilisateurs
+créés :
+
+- en dessous de `SEUIL_COPY` comptes, par `bulk_create` (PostgreSQL renvoie les
+  identifiants insérés, `INSERT ... RETURNING id`) ;
+- au-delà, sur PostgreSQL, les identifiants sont réservés d'un coup sur la séquence de
+  `auth_user`, puis les trois tables sont remplies par `COPY ... FROM STDIN`, qui évite la
+  construction de requêtes `INSERT` géantes par l'ORM.
+
+Les comptes sont créés sans mot de passe utilisable : chaque équipe choisit le sien à la
+première connexion.
+"""
+from __future__ import annotations
+
+import io
+import secrets
+from datetime import date, datetime
+from typing import Any, Iterable, List, Sequence
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.utils import timezone
+
+from intranet.models import GroupeParticipant, ParticipantEstDansGroupe
+
+# Nombre de comptes à partir duquel les insertions passent par COPY
+SEUIL_COPY: int = 1000
+
+_SQL_RESERVATION_IDS_UTILISATEURS: str = """
+SELECT nextval(pg_get_serial_sequence('auth_user', 'id')) FROM generate_series(1, %(nb)s)
+"""
+
+
+def _mot_de_passe_inutilisable() -> str:
+    # Même forme que make_password(None), sans tirer 40 caractères un par un
+    return UNUSABLE_PASSWORD_PREFIX + secrets.token_urlsafe(30)
+
+
+def copy_disponible() -> bool:
+    """
+    Indique si la base courante accepte `COPY ... FROM STDIN` (PostgreSQL avec psycopg2).
+    """
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        return hasattr(cursor.cursor, "copy_expert")
+
+
+def _valeur_copy(valeur: Any) -> str:
+    if valeur is None:
+        return "\\N"
+    if isinstance(valeur, bool):
+        return "t" if valeur else "f"
+    if isinstance(valeur, (datetime, date)):
+        return valeur.isoformat()
+    return (str(valeur).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _copier(table: str, colonnes: Sequence[str], lignes: Iterable[Sequence[Any]]) -> None:
+    """
+    Insère des lignes par `COPY` au format texte de PostgreSQL.
+    """
+    tampon = io.StringIO()
+    for ligne in lignes:
+        tampon.write("\t".join(_valeur_copy(valeur) for valeur in ligne))
+        tampon.write("\n")
+    tampon.seek(0)
+    liste_colonnes: str = ", ".join(f'"{colonne}"' for colonne in colonnes)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY "{table}" ({liste_colonnes}) FROM STDIN', tampon)
+
+
+def _creer_par_copy(groupe: GroupeParticipant, groupe_participant: Group, usernames: List[str]) -> List[User]:
+    with connection.cursor() as cursor:
+        cursor.execute(_SQL_RESERVATION_IDS_UTILISATEURS, {"nb": len(usernames)})
+        ids: List[int] = [ligne[0] for ligne in cursor.fetchall()]
+
+    maintenant: datetime = timezone.now()
+    users: List[User] = [
+        User(id=user_id, username=username, password=_mot_de_passe_inutilisable(), is_active=True,
+             date_joined=maintenant)
+        for user_id, username in zip(ids, usernames)
+    ]
+    _copier(User._meta.db_table,
+            ("id", "password", "is_superuser", "username", "first_name", "last_name", "email", "is_staff",
+             "is_active", "date_joined"),
+            ((u.id, u.password, False, u.username, "", "", "", False, True, maintenant) for u in users))
+    _copier(User.groups.through._meta.db_table, ("user_id", "group_id"),
+            ((user_id, groupe_participant.id) for user_id in ids))
+    _copier(ParticipantEstDansGroupe._meta.db_table, ("utilisateur_id", "groupe_id", "date_ajout"),
+            ((user_id, groupe.id, maintenant.date()) for user_id in ids))
+    return users
+
+
+def _creer_par_bulk_create(groupe: GroupeParticipant, groupe_participant: Group,
+                           usernames: List[str]) -> List[User]:
+    users: List[User] = User.objects.bulk_create(
+        [User(username=username, password=_mot_de_passe_inutilisable(), is_active=True) for username in usernames]
+    )
+    relations = User.groups.through
+    relations.objects.bulk_create([relations(user_id=user.id, group_id=groupe_participant.id) for user in users])
+    ParticipantEstDansGroupe.objects.bulk_create([ParticipantEstDansGroupe(utilisateur=user, groupe=groupe)
+                                                  for user in users])
+    return users
+
+
+def creer_comptes_participants(groupe: GroupeParticipant, usernames: List[str]) -> List[User]:
+    """
+    Crée les comptes participants d'un groupe (sans mot de passe utilisable), les ajoute au
+    groupe d'autorisations « Participant » et au groupe de participants.
+
+    À appeler dans une transaction : un nom d'utilisateur déjà pris fait échouer l'ensemble.
+
+    Args:
+        groupe (GroupeParticipant): Le groupe de participants des nouveaux comptes.
+        usernames (List[str]): Les noms d'utilisateurs à créer.
+
+    Returns:
+        List[User]: Les utilisateurs créés, avec leur identifiant, dans l'ordre de `usernames`.
+    """
+    groupe_participant: Group = Group.objects.get(name="Participant")
+    if len(usernames) >= SEUIL_COPY and copy_disponible():
+        return _creer_par_copy(groupe, groupe_participant, usernames)
+    return _creer_par_bulk_create(groupe, groupe_participant, usernames)
@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+
+from inscription.models import CompteurParticipantsAssocies
+from inscription.services import comptes
+from inscription.services.comptes import creer_comptes_participants
+from intranet.models import GroupeParticipant, ParticipantEstDansGroupe
+from login.utils import genere_participants_uniques
+
+
+class CreationComptesTests(TestCase):
+    def setUp(self):
+        self.referent = User.objects.create_user(username="referent")
+        self.groupe = GroupeParticipant.objects.create(nom="Groupe", referent=self.referent)
+        self.participant = Group.objects.get_or_create(name="Participant")[0]
+
+    def _verifier_comptes(self, users, usernames):
+        self.assertEqual([user.username for user in users], usernames)
+        self.assertEqual(sorted(User.objects.filter(username__in=usernames).values_list("id", "username")),
+                         sorted((user.id, user.username) for user in users))
+        self.assertEqual(self.participant.user_set.count(), len(usernames))
+        self.assertEqual(ParticipantEstDansGroupe.objects.filter(groupe=self.groupe).count(), len(usernames))
+        self.assertFalse(User.objects.get(username=usernames[0]).has_usable_password())
+
+    def test_creation_sans_relecture(self):
+        usernames = [f"equipe{i}" for i in range(5)]
+
+        # groupe « Participant », comptes, relations de groupe, appartenances
+        with self.assertNumQueries(4):
+            users = creer_comptes_participants(self.groupe, usernames)
+
+        self._verifier_comptes(users, usernames)
+
+    def test_creation_par_copy(self):
+        if not comptes.copy_disponible():
+            self.skipTest("COPY indisponible sur cette base")
+        usernames = [f"equipe\t{i}" for i in range(5)]
+
+        with mock.patch.object(comptes, "SEUIL_COPY", 3):
+            users = creer_comptes_participants(self.groupe, usernames)
+
+        self._verifier_comptes(users, usernames)
+        # La séquence a avancé : les comptes suivants ne réutilisent pas les identifiants
+        self.assertGreater(User.objects.create_user(username="suivant").id, max(user.id for user in users))
+
+    def test_reservation_de_plages_disjointes(self):
+        premiers = genere_participants_uniques(self.referent, 3)
+        suivants = genere_participants_uniques(self.referent, 2)
+
+        faux_id = str(2 * self.referent.id + 100)
+        self.assertEqual([nom[4:] for nom in premiers + suivants], [f"{faux_id}{i:03d}" for i in range(1, 6)])
+        self.assertEqual(CompteurParticipantsAssocies.objects.get(organisateur=self.referent)
+                         .nb_participants_associes, 5)
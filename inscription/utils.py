@@ -4,8 +4,7 @@ from datetime import datetime
 from io import StringIO
 from typing import List, Optional
 
-from django.contrib.auth.hashers import make_password
-from django.contrib.auth.models import User, Group
+from django.contrib.auth.models import User
 from django.core.mail import EmailMessage
 from django.db import transaction
 from django.db.models import QuerySet
@@ -14,8 +13,8 @@ from django.utils.crypto import get_random_string
 from epreuve.models import Epreuve
 
 from inscription.models import InscriptionExterne, InscripteurExterne
+from inscription.services.comptes import creer_comptes_participants
 from intranet.models import GroupeParticipant
-from intranet.models import ParticipantEstDansGroupe
 from olympiadesnsi import settings
 from olympiadesnsi.constants import TOKEN_LENGTH
 
@@ -95,33 +94,8 @@ def save_users(groupe_id: int, usernames: List[str],
 
             groupe.save()
 
-            # Création des objets User sans les sauvegarder immédiatement dans la base de données
-
-            users: List[User] = [
-                User(
-                    username=username,
-                    password=make_password(None),
-                    is_active=True,
-                )
-                for username in usernames
-            ]
-            # Enregistrement en masse des objets User créés
-            User.objects.bulk_create(users)
-
-            # Mise à jour des instances User avec leurs ID après la création
-            users: QuerySet[User] = User.objects.filter(username__in=[user.username for user in users])
-
-            # Association des utilisateurs au groupe "Participant" standard
-            groupe_participant: Group = Group.objects.get(name="Participant")
-            UserGroupRelations = User.groups.through
-            user_group_relations = [UserGroupRelations(user_id=user.id, group_id=groupe_participant.id) for user in
-                                    users]
-            UserGroupRelations.objects.bulk_create(user_group_relations)
-
-            # Association des utilisateurs au groupe de participants personnalisé
-            membres: List[ParticipantEstDansGroupe] = [ParticipantEstDansGroupe(utilisateur=user, groupe=groupe)
-                                                       for user in users]
-            ParticipantEstDansGroupe.objects.bulk_create(membres)
+            # Comptes, groupe « Participant » et appartenance au groupe, sans relecture des comptes
+            users: List[User] = creer_comptes_participants(groupe, usernames)
 
             email: Optional[str] = None
             epreuve_nom: Optional[str] = None
@@ -1,11 +1,18 @@
 from django.db import models
 from django.contrib.auth.models import User, Group
-from django.core.cache import cache
 # from inscription.models import InscriptionExterne
 import olympiadesnsi.constants as constantes
+from olympiadesnsi.calcul_unique import obtenir_ou_calculer
 from olympiadesnsi.utils import encode_id
 
 
+def get_cache_key_nombre_participants_groupe(groupe_id: int) -> str:
+    """
+    Renvoie la clé de cache du nombre de participants d'un groupe.
+    """
+    return f'nombre_participants_{groupe_id}'
+
+
 class GroupeParticipant(models.Model):
     def get_nombre_participants(self) -> int:
         """
@@ -13,12 +20,8 @@ class GroupeParticipant(models.Model):
 
         :return: Le nombre de participants dans le groupe.
         """
-        cache_key = f'nombre_participants_{self.id}'
-        nombre_participants = cache.get(cache_key)
-        if nombre_participants is None:
-            nombre_participants = self.membres.count()
-            cache.set(cache_key, nombre_participants, timeout=300)  # Cache pour 5 minutes
-        return nombre_participants
+        cache_key = get_cache_key_nombre_participants_groupe(self.id)
+        return obtenir_ou_calculer(cache_key, self.membres.count, timeout=300)  # Cache pour 5 minutes
 
     def participants(self):
         """
@@ -0,0 +1,101 @@
+"""
+Suppression d'un groupe de participants et des comptes qui n'appartiennent qu'à lui.
+
+Les comptes orphelins sont trouvés en une requête d'agrégat, puis supprimés par lots : chaque
+lot est une seule passe de cascade de l'ORM (`UserEpreuve`, `UserExercice`, relations de
+groupe...), dans sa propre transaction.
+
+Les appartenances au groupe sont supprimées directement en SQL, avant les comptes : leurs
+signaux `post_delete` feraient sinon quelques requêtes par membre. Leur effet (invalidation
+des autorisations des membres) est appliqué une seule fois, à la fin. Le groupe lui-même est
+supprimé en dernier : une suppression interrompue peut être relancée.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count
+
+from intranet.models import GroupeParticipant, ParticipantEstDansGroupe
+from olympiadesnsi.autorisations import invalider_contextes_autorisation
+
+# Nombre de comptes supprimés par transaction
+TAILLE_LOT: int = 500
+
+# Callback de progression : (comptes supprimés, comptes à supprimer)
+Progression = Callable[[int, int], None]
+
+_SQL_SUPPRESSION_APPARTENANCES: str = """
+DELETE FROM "Participant_EstDansGroupe"
+WHERE groupe_id = %(groupe_id)s AND utilisateur_id = ANY(%(utilisateurs)s)
+"""
+
+_SQL_SUPPRESSION_GROUPE_APPARTENANCES: str = """
+DELETE FROM "Participant_EstDansGroupe" WHERE groupe_id = %(groupe_id)s
+"""
+
+
+@dataclass(frozen=True)
+class ResultatSuppressionGroupe:
+    nb_membres: int
+    nb_comptes_supprimes: int
+
+
+def utilisateurs_orphelins(groupe_id: int) -> List[int]:
+    """
+    Renvoie les membres du groupe qui n'appartiennent à aucun autre groupe.
+
+    Args:
+        groupe_id (int): Le groupe concerné.
+
+    Returns:
+        List[int]: Les identifiants de ces utilisateurs, triés.
+    """
+    return list(
+        ParticipantEstDansGroupe.objects.filter(utilisateur__appartenances__groupe_id=groupe_id)
+        .values("utilisateur_id")
+        .annotate(nb_groupes=Count("id"))
+        .filter(nb_groupes=1)
+        .order_by("utilisateur_id")
+        .values_list("utilisateur_id", flat=True)
+    )
+
+
+def supprimer_groupe(groupe_id: int, progression: Optional[Progression] = None,
+                     taille_lot: int = TAILLE_LOT) -> ResultatSuppressionGroupe:
+    """
+    Supprime un groupe et les comptes de ses membres qui n'appartiennent à aucun autre groupe.
+
+    Args:
+        groupe_id (int): Le groupe à supprimer.
+        progression (Optional[Progression]): Appelé après chaque lot de comptes supprimés.
+        taille_lot (int): Nombre de comptes supprimés par transaction.
+
+    Returns:
+        ResultatSuppressionGroupe: Le nombre de membres du groupe et de comptes supprimés.
+    """
+    membres: List[int] = list(
+        ParticipantEstDansGroupe.objects.filter(groupe_id=groupe_id).values_list("utilisateur_id", flat=True)
+    )
+    orphelins: List[int] = utilisateurs_orphelins(groupe_id)
+
+    for debut in range(0, len(orphelins), taille_lot):
+        lot: List[int] = orphelins[debut:debut + taille_lot]
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(_SQL_SUPPRESSION_APPARTENANCES, {"groupe_id": groupe_id, "utilisateurs": lot})
+            User.objects.filter(id__in=lot).delete()
+        if progression is not None:
+            progression(debut + len(lot), len(orphelins))
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(_SQL_SUPPRESSION_GROUPE_APPARTENANCES, {"groupe_id": groupe_id})
+        # Cascade sur les inscriptions du groupe aux épreuves, avec leurs signaux
+        GroupeParticipant.objects.filter(id=groupe_id).delete()
+
+    invalider_contextes_autorisation(membres)
+    return ResultatSuppressionGroupe(nb_membres=len(membres), nb_comptes_supprimes=len(orphelins))
@@ -3,7 +3,7 @@
 from django.db.models.signals import m2m_changed
 from django.dispatch import receiver
 from django.core.cache import cache
-from .models import ParticipantEstDansGroupe
+from .models import ParticipantEstDansGroupe, get_cache_key_nombre_participants_groupe
 
 
 @receiver(m2m_changed, sender=ParticipantEstDansGroupe)
@@ -20,5 +20,5 @@ def update_participant_count(sender, instance: ParticipantEstDansGroupe, action:
     # On ne réagit qu'aux actions post ajout, suppression ou vidage complet de la liste
     if action in ["post_add", "post_remove", "post_clear"]:
         groupe = instance.groupe if hasattr(instance, 'groupe') else instance
-        cache_key = f'nombre_participants_{groupe.id}'
+        cache_key = get_cache_key_nombre_participants_groupe(groupe.id)
         cache.delete(cache_key)
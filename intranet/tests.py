@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, UserEpreuve, UserExercice
+from inscription.models import GroupeParticipeAEpreuve
+from intranet.models import GroupeParticipant, ParticipantEstDansGroupe
+from intranet.services.groupes import supprimer_groupe, utilisateurs_orphelins
+
+
+class SuppressionGroupeTests(TestCase):
+    def setUp(self):
+        self.referent = User.objects.create_user(username="referent")
+        self.epreuve = Epreuve.objects.create(
+            nom="Finale", code="", date_debut=timezone.now(), date_fin=timezone.now() + timedelta(hours=2),
+            referent=self.referent,
+        )
+        Exercice.objects.create(epreuve=self.epreuve, auteur=self.referent, titre="Exo")
+        self.groupe = self._groupe("A", [f"a{i}" for i in range(7)] + ["partage"])
+        self.autre_groupe = self._groupe("B", ["b0", "partage"])
+        self.epreuve.inscrire_groupe(self.groupe)
+
+    def _groupe(self, nom: str, usernames: list) -> GroupeParticipant:
+        groupe = GroupeParticipant.objects.create(nom=nom, referent=self.referent)
+        for username in usernames:
+            membre, _ = User.objects.get_or_create(username=username)
+            ParticipantEstDansGroupe.objects.create(utilisateur=membre, groupe=groupe)
+        return groupe
+
+    def test_orphelins_en_une_requete(self):
+        with self.assertNumQueries(1):
+            orphelins = utilisateurs_orphelins(self.groupe.id)
+
+        self.assertEqual(orphelins, list(User.objects.filter(username__startswith="a").order_by("id")
+                                         .values_list("id", flat=True)))
+
+    def test_suppression_par_lots(self):
+        progression = []
+
+        resultat = supprimer_groupe(self.groupe.id, progression=lambda *p: progression.append(p), taille_lot=3)
+
+        self.assertEqual((resultat.nb_membres, resultat.nb_comptes_supprimes), (8, 7))
+        self.assertEqual(progression, [(3, 7), (6, 7), (7, 7)])
+        self.assertEqual(set(User.objects.values_list("username", flat=True)), {"referent", "b0", "partage"})
+        self.assertFalse(GroupeParticipant.objects.filter(id=self.groupe.id).exists())
+        self.assertFalse(GroupeParticipeAEpreuve.objects.exists())
+        self.assertEqual(list(ParticipantEstDansGroupe.objects.filter(utilisateur__username="partage")
+                              .values_list("groupe", flat=True)), [self.autre_groupe.id])
+        self.assertEqual(list(UserEpreuve.objects.values_list("participant__username", flat=True)), ["partage"])
+        self.assertEqual(UserExercice.objects.count(), 1)
+
+    def test_nombre_de_requetes_independant_du_nombre_de_membres(self):
+        # membres, orphelins, une passe de cascade pour l'unique lot, puis le groupe
+        with self.assertNumQueries(30):
+            supprimer_groupe(self.groupe.id, taille_lot=50)
+        groupe = self._groupe("C", [f"c{i}" for i in range(40)] + ["partage"])
+        self.epreuve.inscrire_groupe(groupe)
+        with self.assertNumQueries(30):
+            supprimer_groupe(groupe.id, taille_lot=50)
+
+    def test_vue_supprimer_groupe(self):
+        self.referent.groups.add(Group.objects.get_or_create(name="Organisateur")[0])
+        self.client.force_login(self.referent)
+
+        reponse = self.client.post(reverse("supprimer_groupe", kwargs={"groupe_id": self.groupe.id}))
+
+        self.assertRedirects(reponse, reverse("espace_organisateur"), fetch_redirect_response=False)
+        self.assertFalse(GroupeParticipant.objects.filter(id=self.groupe.id).exists())
+        self.assertFalse(User.objects.filter(username="a0").exists())
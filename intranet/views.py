@@ -4,25 +4,26 @@ from django.conf import settings as django_settings
 from django.contrib import messages
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
 from django.http import HttpRequest, HttpResponseForbidden
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.forms import PasswordChangeForm
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.http import HttpResponse
+from django.db import IntegrityError
 from django.db.models import Count, Prefetch, QuerySet
 from django.views.decorators.http import require_http_methods
 
 from epreuve.forms import EpreuveForm
-from epreuve.models import UserEpreuve, JeuDeTest, Epreuve, MembreComite, Exercice
+from epreuve.models import UserEpreuve, Epreuve, MembreComite, Exercice
+from epreuve.services.import_epreuve import EpreuveJsonInvalide, ResultatImport, importer_epreuve
 from inscription.models import InscriptionOlympiades
-from intranet.models import ParticipantEstDansGroupe, GroupeParticipant
+from intranet.models import GroupeParticipant
+from intranet.services.groupes import supprimer_groupe as supprimer_groupe_et_orphelins
 from inscription.utils import save_users
 from login.utils import genere_participants_uniques
 from olympiadesnsi import decorators, settings
 import olympiadesnsi.constants as constantes
-from .classesdict import EpreuveDict, ExerciceDict, JeuDeTestDict
 from django.conf import settings
 import io
 import json
@@ -162,25 +163,14 @@ def supprimer_groupe(request: HttpRequest, groupe_id: int) -> HttpResponse:
     Returns:
         HttpResponse: Redirection vers l'espace organisateur après traitement.
     """
-    # Récupère le groupe spécifié par l'ID.
-
     if request.method == "POST":
         # L'objet groupe est récupéré par le décorateur administrateur_groupe_required
         groupe: GroupeParticipant = getattr(request, 'groupe', None)
 
-        with transaction.atomic():
-            # Récupère tous les participants du groupe.
-            membres_du_groupe = [appartenance.utilisateur for appartenance in groupe.membres.all()]
-
-            for participant in membres_du_groupe:
-                # Vérifie si le participant appartient à d'autres groupes.
-                if ParticipantEstDansGroupe.objects.filter(utilisateur=participant).count() == 1:
-                    # Si le participant n'appartient à aucun autre groupe, le supprimer.
-                    participant.delete()
-
-            # Supprime le groupe.
-            groupe.delete()
-            messages.success(request, "Groupe supprimé avec succès.")
+        # Les comptes sont supprimés par lots (voir intranet.services.groupes) ; pour un très
+        # gros groupe, la commande `supprimer_groupe` fait la même chose hors requête HTTP.
+        supprimer_groupe_et_orphelins(groupe.id)
+        messages.success(request, "Groupe supprimé avec succès.")
         return redirect('espace_organisateur')
 
     messages.error(request, "Méthode non supportée pour cette action.")
@@ -335,11 +325,11 @@ def _creer_ou_editer_epreuve(
 
 @login_required
 @decorators.organisateur_required
-@transaction.atomic
 def importer_epreuve_json(request: HttpRequest) -> HttpResponse:
     """
     Permet à un organisateur d'importer une épreuve complète depuis un fichier JSON.
-    Crée l'épreuve, les exercices et les jeux de test associés dans une transaction atomique.
+    Le fichier est validé en entier, puis l'épreuve, les exercices et les jeux de test sont
+    créés par lots dans une transaction atomique (voir epreuve.services.import_epreuve).
 
     Args:
         request (HttpRequest): La requête HTTP POST avec un fichier JSON.
@@ -354,55 +344,20 @@ def importer_epreuve_json(request: HttpRequest) -> HttpResponse:
             return redirect('importer_epreuve_json')
 
         try:
-            data: EpreuveDict = json.load(json_file)
-        except json.JSONDecodeError:
+            resultat: ResultatImport = importer_epreuve(json_file, referent=cast(User, request.user))
+        except (json.JSONDecodeError, UnicodeDecodeError):
             messages.error(request, "Le fichier n’est pas un JSON valide.")
             return redirect('importer_epreuve_json')
+        except EpreuveJsonInvalide as erreur:
+            messages.error(request, f"Le fichier ne peut pas être importé : {erreur}")
+            return redirect('importer_epreuve_json')
+        except IntegrityError:
+            # Nom libre au moment du choix, pris entre-temps par un import concurrent du même fichier
+            messages.error(request, "Une épreuve du même nom vient d’être créée. Veuillez réessayer.")
+            return redirect('importer_epreuve_json')
 
-        # Création de l'épreuve
-        nouvelle_epreuve: Epreuve = Epreuve.objects.create(
-            nom=f"import de {data['nom']}",
-            date_debut=data['date_debut'],
-            date_fin=data['date_fin'],
-            duree=data.get('duree'),
-            referent=request.user,
-            exercices_un_par_un=data.get('exercices_un_par_un', False),
-            temps_limite=data.get('temps_limite', False),
-            inscription_externe=False,
-        )
-
-        # Ajout du créateur comme membre du comité
-        MembreComite.objects.create(epreuve=nouvelle_epreuve, membre=request.user)
-
-        # Création des exercices
-        exercices_importes: List[ExerciceDict] = data.get('exercices', [])
-        for exo_data in exercices_importes:
-            nouvel_exo: Exercice = Exercice.objects.create(
-                epreuve=nouvelle_epreuve,
-                auteur=request.user,
-                titre=exo_data['titre'],
-                bareme=exo_data.get('bareme'),
-                type_exercice=exo_data.get('type_exercice', 'programmation'),
-                enonce=exo_data.get('enonce'),
-                enonce_code=exo_data.get('enonce_code'),
-                avec_jeu_de_test=exo_data.get('avec_jeu_de_test', False),
-                separateur_jeu_test=exo_data.get('separateur_jeu_test'),
-                separateur_reponse_jeudetest=exo_data.get('separateur_reponse_jeudetest'),
-                retour_en_direct=exo_data.get('retour_en_direct', False),
-                code_a_soumettre=exo_data.get('code_a_soumettre', "python"),
-                nombre_max_soumissions=exo_data.get('nombre_max_soumissions', 50)
-            )
-
-            if nouvel_exo.avec_jeu_de_test:
-                jeux: List[JeuDeTestDict] = exo_data.get('jeux_de_test', [])
-                for jeu in jeux:
-                    JeuDeTest.objects.create(
-                        exercice=nouvel_exo,
-                        instance=jeu['instance'],
-                        reponse=jeu['reponse']
-                    )
-
-        messages.success(request, f"L’épreuve « {nouvelle_epreuve.nom} » a été importée avec succès.")
+        messages.success(request, f"L’épreuve « {resultat.epreuve.nom} » a été importée avec succès "
+                                  f"({resultat.nb_exercices} exercices, {resultat.nb_jeux_de_test} jeux de test).")
         return redirect('espace_organisateur')
 
     return render(request, 'intranet/importer_epreuve_json.html')
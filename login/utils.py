@@ -1,11 +1,21 @@
 from typing import List
 
 from django.contrib.auth.models import User
+from django.db import connection
 from django.utils.crypto import get_random_string
 
-from inscription.models import CompteurParticipantsAssocies
 import olympiadesnsi.constants as constantes
 
+# Réserve `nb` numéros sur le compteur du référent (créé au besoin) et renvoie le dernier
+_SQL_RESERVATION_NUMEROS: str = """
+INSERT INTO "Organisateur_CompteurParticipant" (organisateur_id, nb_participants_associes)
+VALUES (%(organisateur_id)s, %(nb)s)
+ON CONFLICT (organisateur_id) DO UPDATE
+SET nb_participants_associes = "Organisateur_CompteurParticipant".nb_participants_associes
+    + EXCLUDED.nb_participants_associes
+RETURNING nb_participants_associes
+"""
+
 
 def genere_mot_de_passe(taille: int = constantes.TAILLE_MDP) -> str:
     """
@@ -33,9 +43,11 @@ def genere_participants_uniques(referent: User, nb: int) -> List[str]:
     # Génération d'une partie aléatoire et du faux ID basé sur l'ID du référent
     faux_id = str(2 * referent.id + 100)
 
-    # Récupération du nombre de participants déjà administrés par le référent
-    compteur, _ = CompteurParticipantsAssocies.objects.get_or_create(organisateur=referent)
-    nb_participants_administres = compteur.nb_participants_associes
+    # Réservation atomique d'une plage de numéros : deux inscriptions simultanées du même
+    # référent obtiennent des plages disjointes
+    with connection.cursor() as cursor:
+        cursor.execute(_SQL_RESERVATION_NUMEROS, {"organisateur_id": referent.id, "nb": nb})
+        nb_participants_administres: int = cursor.fetchone()[0] - nb
 
     # Génération des noms d'utilisateurs et mots de passe
     utilisateurs: List[str] = [
@@ -45,8 +57,4 @@ def genere_participants_uniques(referent: User, nb: int) -> List[str]:
             f"{(nb_participants_administres + i + 1):03d}" for i in range(nb)
     ]
 
-    # Mise à jour du compteur de participants associés
-    compteur.nb_participants_associes += nb
-    compteur.save()
-
     return utilisateurs
@@ -0,0 +1,103 @@
+"""
+Contexte d'autorisation d'un utilisateur, partagé par les décorateurs de permissions.
+
+Les rôles de l'utilisateur (groupes Django) et les épreuves auxquelles il est inscrit ou dont il
+est membre du comité sont calculés en trois requêtes, puis mis en cache. Le cache est invalidé
+par les signaux de `epreuve.signals` lorsque ces informations changent ; la durée de vie ne sert
+que de filet de sécurité pour les écritures qui ne déclenchent pas de signal.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable, List, Optional
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from epreuve.models import MembreComite
+from inscription.models import GroupeParticipeAEpreuve
+
+# Durée de vie du contexte en cache, en secondes
+DUREE_CACHE_AUTORISATIONS: int = 600
+
+# Attribut utilisé pour ne calculer le contexte qu'une fois par requête
+_ATTRIBUT_CONTEXTE: str = "_contexte_autorisation"
+
+
+@dataclass(frozen=True)
+class ContexteAutorisation:
+    """
+    Ce qu'un utilisateur a le droit de faire : ses rôles et les épreuves qui le concernent.
+    """
+    roles: FrozenSet[str]
+    epreuves_inscrit: FrozenSet[int]
+    epreuves_comite: FrozenSet[int]
+
+    def a_le_role(self, nom_groupe: str) -> bool:
+        return nom_groupe in self.roles
+
+    def est_inscrit_a(self, epreuve_id: int) -> bool:
+        """Vrai si l'utilisateur est un participant dont un groupe est inscrit à l'épreuve."""
+        return self.a_le_role("Participant") and epreuve_id in self.epreuves_inscrit
+
+    def est_membre_comite(self, epreuve_id: int) -> bool:
+        return epreuve_id in self.epreuves_comite
+
+
+_CONTEXTE_VIDE: ContexteAutorisation = ContexteAutorisation(frozenset(), frozenset(), frozenset())
+
+
+def get_cache_key_contexte_autorisation(user_id: int) -> str:
+    """
+    Renvoie la clé de cache du contexte d'autorisation d'un utilisateur.
+    """
+    return f"autorisations_{user_id}"
+
+
+def _calculer_contexte(user: User) -> ContexteAutorisation:
+    roles: FrozenSet[str] = frozenset(user.groups.values_list("name", flat=True))
+    epreuves_inscrit: FrozenSet[int] = frozenset(
+        GroupeParticipeAEpreuve.objects.filter(groupe__membres__utilisateur=user)
+        .values_list("epreuve_id", flat=True)
+    )
+    epreuves_comite: FrozenSet[int] = frozenset(
+        MembreComite.objects.filter(membre=user).values_list("epreuve_id", flat=True)
+    )
+    return ContexteAutorisation(roles, epreuves_inscrit, epreuves_comite)
+
+
+def get_contexte_autorisation(user: User) -> ContexteAutorisation:
+    """
+    Renvoie le contexte d'autorisation de l'utilisateur, depuis l'objet lui-même (déjà calculé
+    pendant cette requête), depuis le cache, ou calculé à partir de la base.
+
+    Args:
+        user (User): L'utilisateur connecté (un utilisateur anonyme n'a aucun droit).
+
+    Returns:
+        ContexteAutorisation: Les rôles et épreuves de l'utilisateur.
+    """
+    if not user.is_authenticated:
+        return _CONTEXTE_VIDE
+
+    contexte: Optional[ContexteAutorisation] = getattr(user, _ATTRIBUT_CONTEXTE, None)
+    if contexte is not None:
+        return contexte
+
+    cle: str = get_cache_key_contexte_autorisation(user.id)
+    contexte = cache.get(cle)
+    if contexte is None:
+        contexte = _calculer_contexte(user)
+        cache.set(cle, contexte, timeout=DUREE_CACHE_AUTORISATIONS)
+
+    setattr(user, _ATTRIBUT_CONTEXTE, contexte)
+    return contexte
+
+
+def invalider_contextes_autorisation(user_ids: Iterable[int]) -> None:
+    """
+    Supprime du cache le contexte d'autorisation des utilisateurs donnés.
+    """
+    cles: List[str] = [get_cache_key_contexte_autorisation(user_id) for user_id in set(user_ids)]
+    if cles:
+        cache.delete_many(cles)
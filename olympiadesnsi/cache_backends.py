@@ -0,0 +1,506 @@
+"""
+Backend de cache à deux niveaux pour les workers gunicorn d'une même machine.
+
+- Niveau local : un LRU borné en mémoire du processus, avec une durée de vie courte
+  (`TTL_LOCAL`) qui borne le décalage entre workers après une écriture.
+- Niveau partagé : une base SQLite en mode WAL, commune à tous les workers.
+
+Chaque famille de clés (préfixe) a sa politique (`OPTIONS["FAMILLES"]`) : passage ou non par
+le niveau local, niveau local seul, ou stockage partagé « volatil » (base séparée sans fsync,
+pour les clés réécrites à chaque requête). Les compteurs de limitation de débit ont leur propre
+backend, `CacheCompteursLimitation`, branché sur l'alias `RATELIMIT_USE_CACHE`.
+
+Exemple de configuration :
+
+    CACHES = {
+        "default": {
+            "BACKEND": "olympiadesnsi.cache_backends.CacheHierarchise",
+            "LOCATION": "/chemin/vers/cache_django",
+            "OPTIONS": {
+                "MAX_ENTRIES": 20000,
+                "MAX_ENTREES_LOCALES": 5000,
+                "TTL_LOCAL": 2,
+                "FAMILLES": {"rl:": {"local": False, "durable": False}},
+            },
+        }
+    }
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Nombre d'écritures entre deux purges du niveau partagé
+_FREQUENCE_PURGE: int = 500
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS cache (
+    cle TEXT PRIMARY KEY,
+    valeur BLOB,
+    expiration REAL
+);
+CREATE INDEX IF NOT EXISTS cache_expiration ON cache (expiration);
+"""
+
+
+@dataclass(frozen=True)
+class PolitiqueCache:
+    """
+    Politique appliquée à une famille de clés.
+
+    Attributes:
+        local: Les lectures passent par le niveau en mémoire du processus.
+        partage: Les valeurs sont stockées dans le niveau partagé (sinon : propres au worker).
+        durable: Le niveau partagé synchronise ses écritures sur disque ; sinon la famille est
+            stockée dans une base séparée sans fsync (perdue en cas d'arrêt brutal de la machine).
+        ttl_local: Durée de vie maximale, en secondes, d'une copie dans le niveau local.
+    """
+    local: bool = True
+    partage: bool = True
+    durable: bool = True
+    ttl_local: float = 2.0
+
+
+def _encoder(valeur: Any) -> Any:
+    # Les entiers sont stockés tels quels pour que `incr` soit une seule requête SQL atomique.
+    if type(valeur) is int:
+        return valeur
+    return pickle.dumps(valeur, pickle.HIGHEST_PROTOCOL)
+
+
+def _decoder(valeur: Any) -> Any:
+    if isinstance(valeur, int):
+        return valeur
+    return pickle.loads(valeur)
+
+
+class _NiveauLocal:
+    """
+    LRU borné en mémoire, partagé par les threads d'un processus. Les valeurs sont stockées
+    sérialisées, comme dans `LocMemCache`, pour qu'une modification de l'objet renvoyé ne
+    modifie pas le cache.
+    """
+
+    def __init__(self, max_entrees: int) -> None:
+        self.max_entrees: int = max_entrees
+        self._donnees: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._verrou = threading.Lock()
+        self.compteurs: Counter = Counter()
+
+    def get(self, cle: str) -> Tuple[bool, Any]:
+        with self._verrou:
+            entree = self._donnees.get(cle)
+            if entree is None:
+                self.compteurs["local_echecs"] += 1
+                return False, None
+            expiration, valeur = entree
+            if expiration is not None and expiration <= time.time():
+                del self._donnees[cle]
+                self.compteurs["local_echecs"] += 1
+                return False, None
+            self._donnees.move_to_end(cle)
+            self.compteurs["local_succes"] += 1
+        return True, _decoder(valeur)
+
+    def set(self, cle: str, valeur: Any, expiration: Optional[float]) -> None:
+        encodee = _encoder(valeur)
+        with self._verrou:
+            self._donnees[cle] = (expiration, encodee)
+            self._donnees.move_to_end(cle)
+            while len(self._donnees) > self.max_entrees:
+                self._donnees.popitem(last=False)
+
+    def add(self, cle: str, valeur: Any, expiration: Optional[float]) -> bool:
+        with self._verrou:
+            entree = self._donnees.get(cle)
+            if entree is not None and (entree[0] is None or entree[0] > time.time()):
+                return False
+        self.set(cle, valeur, expiration)
+        return True
+
+    def incr(self, cle: str, delta: int) -> int:
+        with self._verrou:
+            entree = self._donnees.get(cle)
+            if entree is None or (entree[0] is not None and entree[0] <= time.time()):
+                raise ValueError(f"Key '{cle}' not found")
+            nouvelle: Any = _decoder(entree[1]) + delta
+            self._donnees[cle] = (entree[0], _encoder(nouvelle))
+        return nouvelle
+
+    def delete(self, cle: str) -> bool:
+        with self._verrou:
+            return self._donnees.pop(cle, None) is not None
+
+    def clear(self) -> None:
+        with self._verrou:
+            self._donnees.clear()
+
+
+class _NiveauPartage:
+    """
+    Stockage SQLite (WAL) partagé par les processus. Une connexion par thread et par processus.
+    """
+
+    def __init__(self, chemin: str, durable: bool) -> None:
+        self.chemin: str = chemin
+        self.durable: bool = durable
+        self._local = threading.local()
+
+    def _connexion(self) -> sqlite3.Connection:
+        connexion: Optional[sqlite3.Connection] = getattr(self._local, "connexion", None)
+        if connexion is not None and getattr(self._local, "pid", None) == os.getpid():
+            return connexion
+        os.makedirs(os.path.dirname(self.chemin), exist_ok=True)
+        connexion = sqlite3.connect(self.chemin, timeout=30, isolation_level=None, check_same_thread=False)
+        connexion.execute("PRAGMA journal_mode=WAL")
+        connexion.execute(f"PRAGMA synchronous={'NORMAL' if self.durable else 'OFF'}")
+        connexion.executescript(_SCHEMA)
+        self._local.connexion = connexion
+        self._local.pid = os.getpid()
+        return connexion
+
+    def get(self, cle: str) -> Tuple[bool, Any, Optional[float]]:
+        ligne = self._connexion().execute(
+            "SELECT valeur, expiration FROM cache WHERE cle = ? AND (expiration IS NULL OR expiration > ?)",
+            (cle, time.time()),
+        ).fetchone()
+        if ligne is None:
+            return False, None, None
+        return True, _decoder(ligne[0]), ligne[1]
+
+    def set(self, cle: str, valeur: Any, expiration: Optional[float]) -> None:
+        self._connexion().execute(
+            "INSERT OR REPLACE INTO cache (cle, valeur, expiration) VALUES (?, ?, ?)",
+            (cle, _encoder(valeur), expiration),
+        )
+
+    def add(self, cle: str, valeur: Any, expiration: Optional[float]) -> bool:
+        curseur = self._connexion().execute(
+            "INSERT INTO cache (cle, valeur, expiration) VALUES (?, ?, ?) "
+            "ON CONFLICT (cle) DO UPDATE SET valeur = excluded.valeur, expiration = excluded.expiration "
+            "WHERE cache.expiration IS NOT NULL AND cache.expiration <= ?",
+            (cle, _encoder(valeur), expiration, time.time()),
+        )
+        return curseur.rowcount > 0
+
+    def incr(self, cle: str, delta: int) -> int:
+        connexion = self._connexion()
+        lignes = connexion.execute(
+            "UPDATE cache SET valeur = valeur + ? "
+            "WHERE cle = ? AND typeof(valeur) = 'integer' AND (expiration IS NULL OR expiration > ?) "
+            "RETURNING valeur",
+            (delta, cle, time.time()),
+        ).fetchall()  # lecture complète : l'instruction (et son verrou) se termine ici
+        if lignes:
+            return lignes[0][0]
+
+        # Valeur non entière (cas rare) : lecture puis écriture dans une même transaction
+        connexion.execute("BEGIN IMMEDIATE")
+        try:
+            trouve, valeur, expiration = self.get(cle)
+            if not trouve:
+                raise ValueError(f"Key '{cle}' not found")
+            nouvelle: Any = valeur + delta
+            self.set(cle, nouvelle, expiration)
+            connexion.execute("COMMIT")
+        except BaseException:
+            connexion.execute("ROLLBACK")
+            raise
+        return nouvelle
+
+    def incrementer_fenetres(self, fenetres: Sequence[Tuple[str, Optional[float]]]) -> List[int]:
+        """
+        Incrémente plusieurs compteurs dans une seule transaction. Un compteur absent ou expiré
+        repart à 1 avec l'expiration fournie.
+
+        Args:
+            fenetres: Couples (clé, expiration absolue) des compteurs à incrémenter.
+
+        Returns:
+            List[int]: La valeur de chaque compteur après incrément, dans l'ordre fourni.
+        """
+        connexion = self._connexion()
+        maintenant: float = time.time()
+        valeurs: List[int] = []
+        connexion.execute("BEGIN IMMEDIATE")
+        try:
+            for cle, expiration in fenetres:
+                valeurs.append(connexion.execute(
+                    "INSERT INTO cache (cle, valeur, expiration) VALUES (?1, 1, ?2) "
+                    "ON CONFLICT (cle) DO UPDATE SET "
+                    "valeur = CASE WHEN cache.expiration <= ?3 OR typeof(cache.valeur) != 'integer' "
+                    "THEN 1 ELSE cache.valeur + 1 END, "
+                    "expiration = CASE WHEN cache.expiration <= ?3 THEN excluded.expiration "
+                    "ELSE cache.expiration END "
+                    "RETURNING valeur",
+                    (cle, expiration, maintenant),
+                ).fetchall()[0][0])
+            connexion.execute("COMMIT")
+        except BaseException:
+            connexion.execute("ROLLBACK")
+            raise
+        return valeurs
+
+    def touch(self, cle: str, expiration: Optional[float]) -> bool:
+        curseur = self._connexion().execute(
+            "UPDATE cache SET expiration = ? WHERE cle = ? AND (expiration IS NULL OR expiration > ?)",
+            (expiration, cle, time.time()),
+        )
+        return curseur.rowcount > 0
+
+    def delete(self, cle: str) -> bool:
+        return self._connexion().execute("DELETE FROM cache WHERE cle = ?", (cle,)).rowcount > 0
+
+    def clear(self) -> None:
+        self._connexion().execute("DELETE FROM cache")
+
+    def purger(self, max_entrees: int) -> None:
+        """
+        Supprime les entrées expirées puis, au-delà de `max_entrees`, celles qui expirent le plus tôt.
+        """
+        connexion = self._connexion()
+        connexion.execute("DELETE FROM cache WHERE expiration <= ?", (time.time(),))
+        nb: int = connexion.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if nb > max_entrees:
+            connexion.execute(
+                "DELETE FROM cache WHERE cle IN (SELECT cle FROM cache "
+                "ORDER BY expiration IS NULL, expiration LIMIT ?)",
+                (nb - max_entrees,),
+            )
+
+
+# Niveaux locaux par emplacement : Django crée une instance de backend par thread,
+# le niveau local doit être commun au processus.
+_niveaux_locaux: Dict[str, _NiveauLocal] = {}
+_verrou_niveaux = threading.Lock()
+
+
+class CacheHierarchise(BaseCache):
+    """
+    Cache à deux niveaux (mémoire du processus, puis SQLite partagé), configurable par famille de clés.
+    """
+
+    def __init__(self, location: str, params: Dict[str, Any]) -> None:
+        super().__init__(params)
+        options: Dict[str, Any] = params.get("OPTIONS", {})
+        self._location: str = location
+        ttl_local: float = float(options.get("TTL_LOCAL", 2))
+
+        with _verrou_niveaux:
+            niveau_local: Optional[_NiveauLocal] = _niveaux_locaux.get(location)
+            if niveau_local is None:
+                niveau_local = _NiveauLocal(int(options.get("MAX_ENTREES_LOCALES", 5000)))
+                _niveaux_locaux[location] = niveau_local
+        self._niveau_local: _NiveauLocal = niveau_local
+
+        self._partage: _NiveauPartage = _NiveauPartage(os.path.join(location, "cache.sqlite3"), durable=True)
+        self._volatil: _NiveauPartage = _NiveauPartage(os.path.join(location, "cache_volatil.sqlite3"),
+                                                       durable=False)
+
+        self._politique_defaut: PolitiqueCache = PolitiqueCache(ttl_local=ttl_local)
+        familles: Dict[str, Dict[str, Any]] = options.get("FAMILLES", {})
+        # Le préfixe le plus long l'emporte
+        self._familles: List[Tuple[str, PolitiqueCache]] = sorted(
+            ((prefixe, PolitiqueCache(**{"ttl_local": ttl_local, **reglages}))
+             for prefixe, reglages in familles.items()),
+            key=lambda famille: len(famille[0]),
+            reverse=True,
+        )
+        self._nb_ecritures: int = 0
+
+    # ------------------------------------------------------------------
+    # Outils internes
+    # ------------------------------------------------------------------
+
+    def _politique(self, key: str) -> PolitiqueCache:
+        for prefixe, politique in self._familles:
+            if key.startswith(prefixe):
+                return politique
+        return self._politique_defaut
+
+    def _stockage(self, politique: PolitiqueCache) -> _NiveauPartage:
+        return self._partage if politique.durable else self._volatil
+
+    @staticmethod
+    def _expiration_locale(politique: PolitiqueCache, expiration: Optional[float]) -> Optional[float]:
+        if not politique.partage:
+            return expiration
+        limite: float = time.time() + politique.ttl_local
+        return limite if expiration is None else min(expiration, limite)
+
+    def _apres_ecriture(self, stockage: _NiveauPartage) -> None:
+        self._nb_ecritures += 1
+        if self._nb_ecritures % _FREQUENCE_PURGE == 0:
+            stockage.purger(self._max_entries)
+
+    def _compter(self, nom: str) -> None:
+        with self._niveau_local._verrou:
+            self._niveau_local.compteurs[nom] += 1
+
+    # ------------------------------------------------------------------
+    # API BaseCache
+    # ------------------------------------------------------------------
+
+    def get(self, key: str, default: Any = None, version: Optional[int] = None) -> Any:
+        cle: str = self.make_and_validate_key(key, version=version)
+        politique: PolitiqueCache = self._politique(key)
+
+        if politique.local:
+            trouve, valeur = self._niveau_local.get(cle)
+            if trouve:
+                return valeur
+        if not politique.partage:
+            return default
+
+        trouve, valeur, expiration = self._stockage(politique).get(cle)
+        if not trouve:
+            self._compter("partage_echecs")
+            return default
+        self._compter("partage_succes")
+        if politique.local:
+            self._niveau_local.set(cle, valeur, self._expiration_locale(politique, expiration))
+        return valeur
+
+    def set(self, key: str, value: Any, timeout: Any = DEFAULT_TIMEOUT, version: Optional[int] = None) -> None:
+        cle: str = self.make_and_validate_key(key, version=version)
+        politique: PolitiqueCache = self._politique(key)
+        expiration: Optional[float] = self.get_backend_timeout(timeout)
+
+        if politique.partage:
+            stockage: _NiveauPartage = self._stockage(politique)
+            stockage.set(cle, value, expiration)
+            self._apres_ecriture(stockage)
+        if politique.local:
+            self._niveau_local.set(cle, value, self._expiration_locale(politique, expiration))
+        else:
+            self._niveau_local.delete(cle)
+
+    def add(self, key: str, value: Any, timeout: Any = DEFAULT_TIMEOUT, version: Optional[int] = None) -> bool:
+        cle: str = self.make_and_validate_key(key, version=version)
+        politique: PolitiqueCache = self._politique(key)
+        expiration: Optional[float] = self.get_backend_timeout(timeout)
+
+        if not politique.partage:
+            return self._niveau_local.add(cle, value, expiration)
+
+        stockage: _NiveauPartage = self._stockage(politique)
+        ajoute: bool = stockage.add(cle, value, expiration)
+        if ajoute:
+            self._apres_ecriture(stockage)
+            if politique.local:
+                self._niveau_local.set(cle, value, self._expiration_locale(politique, expiration))
+        return ajoute
+
+    def incr(self, key: str, delta: int = 1, version: Optional[int] = None) -> int:
+        cle: str = self.make_and_validate_key(key, version=version)
+        politique: PolitiqueCache = self._politique(key)
+
+        if not politique.partage:
+            return self._niveau_local.incr(cle, delta)
+        valeur: int = self._stockage(politique).incr(cle, delta)
+        # La copie locale de ce processus est périmée ; celles des autres expirent après `ttl_local`.
+        self._niveau_local.delete(cle)
+        return valeur
+
+    def touch(self, key: str, timeout: Any = DEFAULT_TIMEOUT, version: Optional[int] = None) -> bool:
+        cle: str = self.make_and_validate_key(key, version=version)
+        politique: PolitiqueCache = self._politique(key)
+        expiration: Optional[float] = self.get_backend_timeout(timeout)
+
+        if not politique.partage:
+            trouve, valeur = self._niveau_local.get(cle)
+            if trouve:
+                self._niveau_local.set(cle, valeur, expiration)
+            return trouve
+        self._niveau_local.delete(cle)
+        return self._stockage(politique).touch(cle, expiration)
+
+    def delete(self, key: str, version: Optional[int] = None) -> bool:
+        cle: str = self.make_and_validate_key(key, version=version)
+        politique: PolitiqueCache = self._politique(key)
+
+        supprime: bool = self._niveau_local.delete(cle)
+        if politique.partage:
+            supprime = self._stockage(politique).delete(cle) or supprime
+        return supprime
+
+    def clear(self) -> None:
+        self._niveau_local.clear()
+        self._partage.clear()
+        self._volatil.clear()
+
+    # ------------------------------------------------------------------
+    # Supervision
+    # ------------------------------------------------------------------
+
+    def statistiques(self) -> Dict[str, int]:
+        """
+        Renvoie les compteurs de succès/échecs de ce processus, par niveau.
+
+        Returns:
+            Dict[str, int]: `local_succes`, `local_echecs`, `partage_succes`, `partage_echecs`.
+        """
+        with self._niveau_local._verrou:
+            compteurs: Counter = Counter(self._niveau_local.compteurs)
+        return {nom: compteurs[nom] for nom in ("local_succes", "local_echecs", "partage_succes", "partage_echecs")}
+
+
+class CacheCompteursLimitation(BaseCache):
+    """
+    Cache dédié aux compteurs de limitation de débit (alias `RATELIMIT_USE_CACHE`).
+
+    Les compteurs sont des entiers stockés dans une base SQLite (WAL, sans fsync) partagée par
+    les workers ; `incr` est une seule requête atomique et `incrementer_fenetres` évalue toutes
+    les fenêtres d'une clé dans une seule transaction (voir `olympiadesnsi.limitation_debit`).
+    Les autres types de valeurs sont acceptés mais sans intérêt ici.
+    """
+
+    def __init__(self, location: str, params: Dict[str, Any]) -> None:
+        super().__init__(params)
+        self._compteurs: _NiveauPartage = _NiveauPartage(os.path.join(location, "compteurs.sqlite3"),
+                                                         durable=False)
+        self._nb_ecritures: int = 0
+
+    def incrementer_fenetres(self, fenetres: Sequence[Tuple[str, Optional[float]]]) -> List[int]:
+        """
+        Incrémente en une transaction les compteurs (clé, expiration absolue) fournis.
+        """
+        self._nb_ecritures += 1
+        if self._nb_ecritures % _FREQUENCE_PURGE == 0:
+            self._compteurs.purger(self._max_entries)
+        return self._compteurs.incrementer_fenetres(
+            [(self.make_and_validate_key(cle), expiration) for cle, expiration in fenetres]
+        )
+
+    def get(self, key: str, default: Any = None, version: Optional[int] = None) -> Any:
+        trouve, valeur, _ = self._compteurs.get(self.make_and_validate_key(key, version=version))
+        return valeur if trouve else default
+
+    def set(self, key: str, value: Any, timeout: Any = DEFAULT_TIMEOUT, version: Optional[int] = None) -> None:
+        self._compteurs.set(self.make_and_validate_key(key, version=version), value,
+                            self.get_backend_timeout(timeout))
+
+    def add(self, key: str, value: Any, timeout: Any = DEFAULT_TIMEOUT, version: Optional[int] = None) -> bool:
+        return self._compteurs.add(self.make_and_validate_key(key, version=version), value,
+                                   self.get_backend_timeout(timeout))
+
+    def incr(self, key: str, delta: int = 1, version: Optional[int] = None) -> int:
+        return self._compteurs.incr(self.make_and_validate_key(key, version=version), delta)
+
+    def touch(self, key: str, timeout: Any = DEFAULT_TIMEOUT, version: Optional[int] = None) -> bool:
+        return self._compteurs.touch(self.make_and_validate_key(key, version=version),
+                                     self.get_backend_timeout(timeout))
+
+    def delete(self, key: str, version: Optional[int] = None) -> bool:
+        return self._compteurs.delete(self.make_and_validate_key(key, version=version))
+
+    def clear(self) -> None:
+        self._compteurs.clear()
@@ -0,0 +1,108 @@
+"""
+Calculs coûteux mis en cache, protégés contre l'effet de meute (« cache stampede »).
+
+Quand une clé très lue est invalidée (par exemple par `epreuve.signals` pendant l'inscription
+d'un gros groupe), toutes les requêtes concurrentes constatent l'absence de valeur et relancent
+le même agrégat. `obtenir_ou_calculer` garantit qu'un seul calcul a lieu à la fois par clé :
+
+- le premier arrivé prend un verrou (`cache.add`, atomique dans tous les workers) et calcule ;
+- les autres renvoient la dernière valeur connue (copie « périmée » conservée plus longtemps)
+  s'il y en a une, sinon attendent le résultat du premier ;
+- la durée de vie est tirée aléatoirement (`jitter`) pour que des clés écrites ensemble
+  n'expirent pas ensemble.
+
+La valeur elle-même reste stockée telle quelle sous sa clé : les invalidations existantes
+(`cache.delete(cle)`) et les lectures directes continuent de fonctionner.
+"""
+from __future__ import annotations
+
+import random
+import time
+from typing import Callable, Optional, TypeVar
+
+from django.core.cache import cache
+
+T = TypeVar("T")
+
+# Durée de vie du verrou : au-delà, on considère que le calcul a échoué sans le libérer
+DUREE_VERROU: int = 30
+# Attente maximale d'un calcul en cours (en secondes) avant de calculer soi-même
+ATTENTE_MAX: float = 5.0
+INTERVALLE_ATTENTE: float = 0.02
+
+_ABSENT = object()
+
+
+def get_cache_key_verrou(cle: str) -> str:
+    return f"{cle}_verrou"
+
+
+def get_cache_key_perime(cle: str) -> str:
+    return f"{cle}_perime"
+
+
+def duree_avec_jitter(timeout: Optional[int], jitter: float = 0.1) -> Optional[int]:
+    """
+    Raccourcit aléatoirement une durée de vie d'au plus `jitter` (fraction), pour étaler les expirations.
+
+    Args:
+        timeout (Optional[int]): Durée de vie en secondes (None : pas d'expiration).
+        jitter (float): Fraction maximale retirée à la durée.
+
+    Returns:
+        Optional[int]: La durée à utiliser.
+    """
+    if not timeout:
+        return timeout
+    return max(1, round(timeout * (1 - random.uniform(0, jitter))))
+
+
+def obtenir_ou_calculer(
+        cle: str,
+        calcul: Callable[[], T],
+        timeout: Optional[int],
+        jitter: float = 0.1,
+) -> T:
+    """
+    Renvoie la valeur en cache de `cle`, ou la calcule une seule fois pour tous les workers.
+
+    Args:
+        cle (str): La clé de cache de la valeur.
+        calcul (Callable[[], T]): Le calcul à exécuter en cas d'absence (ne doit pas renvoyer None).
+        timeout (Optional[int]): Durée de vie de la valeur (None : jusqu'à invalidation).
+        jitter (float): Fraction aléatoire retirée à la durée de vie.
+
+    Returns:
+        T: La valeur, éventuellement la dernière connue si un autre worker la recalcule.
+    """
+    valeur = cache.get(cle, _ABSENT)
+    if valeur is not _ABSENT:
+        return valeur
+
+    cle_verrou: str = get_cache_key_verrou(cle)
+    if not cache.add(cle_verrou, 1, timeout=DUREE_VERROU):
+        # Un autre worker calcule : dernière valeur connue, sinon attente de son résultat
+        valeur = cache.get(get_cache_key_perime(cle), _ABSENT)
+        if valeur is not _ABSENT:
+            return valeur
+        limite: float = time.monotonic() + ATTENTE_MAX
+        while time.monotonic() < limite:
+            time.sleep(INTERVALLE_ATTENTE)
+            valeur = cache.get(cle, _ABSENT)
+            if valeur is not _ABSENT:
+                return valeur
+        return _calculer(cle, calcul, timeout, jitter)
+
+    try:
+        return _calculer(cle, calcul, timeout, jitter)
+    finally:
+        cache.delete(cle_verrou)
+
+
+def _calculer(cle: str, calcul: Callable[[], T], timeout: Optional[int], jitter: float) -> T:
+    valeur: T = calcul()
+    duree: Optional[int] = duree_avec_jitter(timeout, jitter)
+    cache.set(cle, valeur, timeout=duree)
+    # La copie périmée survit aux invalidations et dure plus longtemps que la valeur
+    cache.set(get_cache_key_perime(cle), valeur, timeout=None if duree is None else 2 * duree)
+    return valeur
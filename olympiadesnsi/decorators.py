@@ -3,9 +3,9 @@ from typing import Callable, Any, Optional, Dict
 from django.http import HttpResponse, HttpRequest
 from functools import wraps
 from django.shortcuts import get_object_or_404, render
-from epreuve.models import Epreuve, Exercice, MembreComite
+from epreuve.models import Epreuve, Exercice
 from intranet.models import GroupeParticipant
-from .interrogations_bd import user_est_inscrit_a_epreuve
+from .autorisations import get_contexte_autorisation
 from .utils import decode_id
 
 
@@ -25,7 +25,7 @@ def appartient_au_groupe(group_name):
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
             # Vérifier si l'utilisateur courant appartient au groupe donné.
-            if not request.user.groups.filter(name=group_name).exists():
+            if not get_contexte_autorisation(request.user).a_le_role(group_name):
                 # Si l'utilisateur n'appartient pas au groupe, retourner une réponse HTTP "Forbidden".
                 context: dict = {'message': "Vous n'avez pas les droits nécessaires pour exécuter cette action."}
                 return render(request, 'olympiadesnsi/erreur.html', context, status=403)
@@ -109,7 +109,7 @@ def participant_inscrit_a_epreuve_required(view_func):
         if epreuve is None:
             return render(request, "olympiadesnsi/erreur.html", {"message": "ID de l'épreuve introuvable."}, status=403)
 
-        if not user_est_inscrit_a_epreuve(request.user, epreuve):
+        if not get_contexte_autorisation(request.user).est_inscrit_a(epreuve.id):
             return render(request, "olympiadesnsi/erreur.html", {
                 "message": "Accès refusé car vous n'êtes pas inscrit à l'épreuve concernée."
             }, status=403)
@@ -181,7 +181,7 @@ def membre_comite_required(view_func: Callable[..., HttpResponse]) -> Callable[.
                           status=403)
 
         # Vérifie si l'utilisateur courant est membre du comité de cette épreuve
-        if not MembreComite.objects.filter(membre=request.user, epreuve=epreuve).exists():
+        if not get_contexte_autorisation(request.user).est_membre_comite(epreuve.id):
             return render(request, 'olympiadesnsi/erreur.html',
                           {'message': "Vous n'avez pas les droits nécessaires pour cette action réservée "
                                       "aux membres du comité d'organisation de l'épreuve."},
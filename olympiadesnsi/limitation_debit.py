@@ -0,0 +1,105 @@
+"""
+Limitation de débit multi-fenêtres.
+
+`limiter_debit` remplace une pile de décorateurs `@ratelimit` portant sur la même clé : toutes
+les fenêtres (par seconde, minute, heure...) sont évaluées en un seul appel au cache
+`RATELIMIT_USE_CACHE`. Avec `CacheCompteursLimitation`, cet appel est une seule transaction
+SQLite ; avec un autre backend, on retombe sur un `add`/`incr` par fenêtre, comme django_ratelimit.
+
+Les clés de cache, les fenêtres et l'exception levée sont celles de django_ratelimit, pour que
+la vue `RATELIMIT_VIEW` (`ratelimited_error`) continue de répondre aux dépassements.
+"""
+from __future__ import annotations
+
+from functools import wraps
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest
+from django_ratelimit import ALL
+# Fonctions internes de django_ratelimit (version épinglée dans requirements.txt),
+# réutilisées pour garder exactement les mêmes clés et fenêtres que `@ratelimit`.
+from django_ratelimit.core import (
+    EXPIRATION_FUDGE,
+    _SIMPLE_KEYS,
+    _get_window,
+    _make_cache_key,
+    _method_match,
+    _split_rate,
+)
+from django_ratelimit.exceptions import Ratelimited
+
+
+def _valeur_cle(key: Any, groupe: str, request: HttpRequest) -> str:
+    if callable(key):
+        return key(groupe, request)
+    return _SIMPLE_KEYS[key](request)
+
+
+def _compter(fenetres: List[Tuple[str, int, int]]) -> List[int]:
+    """
+    Incrémente les compteurs (clé, fin de fenêtre, durée) et renvoie leurs nouvelles valeurs.
+    """
+    cache = caches[getattr(settings, "RATELIMIT_USE_CACHE", "default")]
+    incrementer_fenetres: Optional[Callable] = getattr(cache, "incrementer_fenetres", None)
+    if incrementer_fenetres is not None:
+        return incrementer_fenetres([(cle, fin + EXPIRATION_FUDGE) for cle, fin, _ in fenetres])
+
+    valeurs: List[int] = []
+    for cle, _, periode in fenetres:
+        if cache.add(cle, 1, periode + EXPIRATION_FUDGE):
+            valeurs.append(1)
+        else:
+            try:
+                valeurs.append(cache.incr(cle))
+            except ValueError:
+                valeurs.append(1)
+    return valeurs
+
+
+def limiter_debit(
+        key: Any,
+        rates: Sequence[str],
+        method: Any = ALL,
+        group: Optional[str] = None,
+        block: bool = True,
+) -> Callable:
+    """
+    Décorateur de limitation de débit évaluant plusieurs fenêtres en un seul appel.
+
+    Exemple :
+        @limiter_debit(key='ip', rates=['5/s', '150/m', '5000/h'], method='GET')
+
+    Args:
+        key: 'ip', 'user', 'user_or_ip' ou une fonction (groupe, requête) -> str.
+        rates: Les limites, au format de django_ratelimit ('10/m', '2/s'...).
+        method: Méthode(s) HTTP concernée(s) (toutes par défaut).
+        group: Nom du groupe de compteurs (par défaut : module et nom de la vue).
+        block: Lève `Ratelimited` en cas de dépassement (sinon positionne seulement `request.limited`).
+    """
+
+    def decorator(view_func: Callable) -> Callable:
+        groupe: str = group or f"{view_func.__module__}.{view_func.__qualname__}"
+        limites: List[Tuple[str, int, int]] = [(rate, *_split_rate(rate)) for rate in rates]
+
+        @wraps(view_func)
+        def _wrapped_view(request: HttpRequest, *args: Any, **kwargs: Any) -> Any:
+            limite_atteinte: bool = False
+            if getattr(settings, "RATELIMIT_ENABLE", True) and _method_match(request, method):
+                valeur: str = _valeur_cle(key, groupe, request)
+                fenetres: List[Tuple[str, int, int]] = []
+                for rate, _, periode in limites:
+                    fin: int = _get_window(valeur, periode)
+                    fenetres.append((_make_cache_key(groupe, fin, rate, valeur, method), fin, periode))
+                compteurs: List[int] = _compter(fenetres)
+                limite_atteinte = any(nb > maximum for nb, (_, maximum, _) in zip(compteurs, limites))
+
+            request.limited = limite_atteinte or getattr(request, "limited", False)
+            if limite_atteinte and block:
+                raise Ratelimited()
+            return view_func(request, *args, **kwargs)
+
+        return _wrapped_view
+
+    return decorator
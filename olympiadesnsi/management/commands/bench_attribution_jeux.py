@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import random
+import time
+from datetime import timedelta
+from typing import Callable, List
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, UserExercice
+from epreuve.services.attribution_jeux import attribuer_jeux_de_test
+
+TAILLE_LOT: int = 5000
+
+
+class _Annulation(Exception):
+    pass
+
+
+def _creer_epreuve_synthetique(nb_participants: int, nb_exercices: int, nb_jeux: int) -> Epreuve:
+    referent = User.objects.create_user(username="bench_attribution_referent")
+    epreuve = Epreuve.objects.create(nom="Bench attribution", code="", date_debut=timezone.now(),
+                                     date_fin=timezone.now() + timedelta(hours=1), referent=referent)
+    for i in range(nb_exercices):
+        exercice = Exercice.objects.create(epreuve=epreuve, auteur=referent, titre=f"Exercice {i}",
+                                           avec_jeu_de_test=True)
+        jeux = [JeuDeTest(exercice=exercice, instance=f"{i}-{j}", reponse=str(j)) for j in range(nb_jeux)]
+        for jeu in jeux:
+            jeu.calculer_empreinte()
+        JeuDeTest.objects.bulk_create(jeux)
+
+    User.objects.bulk_create([User(username=f"bench_attribution_{i:06d}") for i in range(nb_participants)],
+                             batch_size=TAILLE_LOT)
+    return epreuve
+
+
+def _ligne_par_ligne(epreuve: Epreuve) -> int:
+    # Ancienne implémentation de Exercice.assigner_jeux_de_test : un UPDATE par UserExercice
+    nb: int = 0
+    for exercice in epreuve.exercices.all():
+        jeux: List[JeuDeTest] = list(exercice.get_jeux_de_test())
+        random.shuffle(jeux)
+        for i, ue in enumerate(exercice.user_exercices.all()):
+            if ue.jeu_de_test:
+                continue
+            ue.jeu_de_test = jeux[i % len(jeux)]
+            ue.save()
+            nb += 1
+    return nb
+
+
+class Command(BaseCommand):
+    help = ("Compare l'attribution des jeux de test ligne par ligne et en une requête ensembliste, "
+            "sur une épreuve synthétique (créée dans une transaction annulée).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participants', type=int, default=10000)
+        parser.add_argument('--exercices', type=int, default=5)
+        parser.add_argument('--jeux', type=int, default=50, help='Jeux de test par exercice')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                epreuve = _creer_epreuve_synthetique(options['participants'], options['exercices'],
+                                                     options['jeux'])
+                participants = User.objects.filter(username__startswith="bench_attribution_0")
+
+                debut: float = time.perf_counter()
+                epreuve.inscrire_participants(participants)
+                self.stdout.write(self.style.SUCCESS(
+                    f"Inscription de {options['participants']} participants (avec attribution) "
+                    f"en {time.perf_counter() - debut:.1f} s"
+                ))
+
+                self._mesurer("ligne par ligne", epreuve, lambda: _ligne_par_ligne(epreuve))
+                self._mesurer("ensembliste    ", epreuve, lambda: attribuer_jeux_de_test(epreuve.id))
+                raise _Annulation()
+        except _Annulation:
+            pass
+
+    def _mesurer(self, nom: str, epreuve: Epreuve, attribution: Callable[[], int]) -> None:
+        UserExercice.objects.filter(exercice__epreuve=epreuve).update(jeu_de_test=None)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE "User_Exercice", "JeuDeTest"')
+
+        requetes: List[str] = []
+
+        def compter(execute, sql, params, many, context):
+            requetes.append(sql)
+            return execute(sql, params, many, context)
+
+        debut: float = time.perf_counter()
+        with connection.execute_wrapper(compter):
+            nb: int = attribution()
+        duree: float = time.perf_counter() - debut
+        self.stdout.write(self.style.SUCCESS(
+            f"{nom} : {nb} attributions en {duree:.2f} s, {len(requetes)} requêtes"
+        ))
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import multiprocessing
+import random
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management.base import BaseCommand
+
+from olympiadesnsi.cache_backends import CacheHierarchise
+
+
+def _creer_backend(nom: str, dossier: str) -> BaseCache:
+    if nom == "fichiers":
+        return FileBasedCache(dossier, {"TIMEOUT": None, "OPTIONS": {"MAX_ENTRIES": 20000}})
+    return CacheHierarchise(dossier, {
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 20000, "FAMILLES": {"rl:": {"local": False, "durable": False}}},
+    })
+
+
+def _travailleur(nom: str, dossier: str, nb_operations: int, resultats: Any) -> None:
+    """
+    Simule un worker : pour chaque « requête », un compteur de limitation de débit
+    (add puis incr, comme django_ratelimit) et deux lectures de données partagées.
+    """
+    cache: BaseCache = _creer_backend(nom, dossier)
+    aleatoire = random.Random()
+    debut: float = time.perf_counter()
+    for _ in range(nb_operations):
+        cle_rl: str = f"rl:{aleatoire.randrange(200)}"
+        if not cache.add(cle_rl, 1, 60):
+            cache.incr(cle_rl)
+        for _ in range(2):
+            cle: str = f"epreuve_{aleatoire.randrange(20)}_contenu"
+            if cache.get(cle) is None:
+                cache.set(cle, "x" * 2000, 300)
+    resultats.put(time.perf_counter() - debut)
+
+
+class Command(BaseCommand):
+    help = ("Compare FileBasedCache et le cache hiérarchisé sous plusieurs processus concurrents "
+            "(limitation de débit + lectures de données partagées).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processus', type=int, default=4, help='Nombre de workers simulés')
+        parser.add_argument('--requetes', type=int, default=2000, help='Requêtes simulées par worker')
+
+    def handle(self, *args, **options):
+        nb_processus: int = options['processus']
+        nb_requetes: int = options['requetes']
+        contexte = multiprocessing.get_context("fork")
+
+        for nom in ("fichiers", "hierarchise"):
+            with tempfile.TemporaryDirectory() as dossier:
+                resultats = contexte.Queue()
+                processus: List[Any] = [
+                    contexte.Process(target=_travailleur, args=(nom, dossier, nb_requetes, resultats))
+                    for _ in range(nb_processus)
+                ]
+                debut: float = time.perf_counter()
+                for p in processus:
+                    p.start()
+                durees: List[float] = [resultats.get() for _ in processus]
+                for p in processus:
+                    p.join()
+                total: float = time.perf_counter() - debut
+
+            debit: float = nb_processus * nb_requetes / total
+            self.stdout.write(
+                f"{nom:12s} : {debit:8.0f} requêtes/s au total, "
+                f"{1000 * max(durees) / nb_requetes:.3f} ms/requête (worker le plus lent)"
+            )
+
+        with tempfile.TemporaryDirectory() as dossier:
+            cache: CacheHierarchise = _creer_backend("hierarchise", dossier)
+            for _ in range(1000):
+                cle: str = f"epreuve_{random.randrange(20)}_contenu"
+                if cache.get(cle) is None:
+                    cache.set(cle, "x", 300)
+            statistiques: Dict[str, int] = cache.statistiques()
+        self.stdout.write(self.style.SUCCESS(f"Statistiques (1 processus, 1000 lectures) : {statistiques}"))
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import os
+import random
+import time
+from typing import Iterator, List
+
+from django.core.management.base import BaseCommand
+
+from epreuve.services.zip_flux import Entree, iterer_zip
+
+
+def _entrees_synthetiques(nb_fichiers: int) -> Iterator[Entree]:
+    """Alterne des fichiers de code d'environ 1 à 3 Ko et de courtes réponses, comme un export de rendus."""
+    generateur = random.Random(0)
+    for i in range(nb_fichiers):
+        if i % 2:
+            yield f"participant_{i // 2:06d}/reponse_{i}.txt", str(generateur.randrange(10 ** 6))
+        else:
+            lignes: List[str] = [f"    total += donnees[{generateur.randrange(1000)}] * {generateur.random():.6f}"
+                                 for _ in range(generateur.randint(30, 90))]
+            yield (f"participant_{i // 2:06d}/code_{i}.py",
+                   "def solution(donnees):\n    total = 0\n" + "\n".join(lignes) + "\n    return total\n")
+
+
+class Command(BaseCommand):
+    help = ("Compare la durée de construction d'une archive ZIP compressée en série "
+            "et répartie sur un pool de processus, sur des fichiers synthétiques.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fichiers', type=int, default=50000, help="Nombre de fichiers dans l'archive")
+        parser.add_argument('--processus', type=int, nargs='+', default=None,
+                            help="Tailles de pool à comparer (défaut : 2 et le nombre de CPU)")
+
+    def handle(self, *args, **options):
+        nb_fichiers: int = options['fichiers']
+        tailles_pool: List[int] = options['processus'] or sorted({2, os.cpu_count() or 1})
+        self.stdout.write(f"{nb_fichiers} fichiers, {os.cpu_count()} CPU")
+
+        reference: float = 0.0
+        for processus in [1] + [p for p in tailles_pool if p > 1]:
+            debut: float = time.perf_counter()
+            taille: int = sum(len(morceau) for morceau in
+                              iterer_zip(_entrees_synthetiques(nb_fichiers), processus=processus))
+            duree: float = time.perf_counter() - debut
+            reference = reference or duree
+            self.stdout.write(self.style.SUCCESS(
+                f"{processus} processus : {duree:.2f} s ({reference / duree:.2f}x), archive de {taille / 1e6:.1f} Mo"
+            ))
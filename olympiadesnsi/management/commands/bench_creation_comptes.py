@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+from typing import Callable, List
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest
+from inscription.services import comptes
+from intranet.models import GroupeParticipant, ParticipantEstDansGroupe
+from login.utils import genere_participants_uniques
+
+
+class _Annulation(Exception):
+    pass
+
+
+def _ancienne_creation(groupe: GroupeParticipant, usernames: List[str]) -> List[User]:
+    # Ancienne implémentation de save_users : relecture des comptes créés par nom d'utilisateur
+    User.objects.bulk_create([User(username=username, password=make_password(None), is_active=True)
+                              for username in usernames])
+    users = User.objects.filter(username__in=usernames)
+    groupe_participant: Group = Group.objects.get(name="Participant")
+    relations = User.groups.through
+    relations.objects.bulk_create([relations(user_id=user.id, group_id=groupe_participant.id) for user in users])
+    ParticipantEstDansGroupe.objects.bulk_create([ParticipantEstDansGroupe(utilisateur=user, groupe=groupe)
+                                                  for user in users])
+    return list(users)
+
+
+class Command(BaseCommand):
+    help = ("Mesure la création en masse de comptes participants (comptes, groupes, inscription à une "
+            "épreuve) avec l'ancienne et la nouvelle implémentation, dans des transactions annulées.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comptes', type=int, default=10000)
+        parser.add_argument('--exercices', type=int, default=5)
+
+    def handle(self, *args, **options):
+        Group.objects.get_or_create(name="Participant")
+        nb: int = options['comptes']
+        self._mesurer("ancienne implémentation  ", nb, options['exercices'], _ancienne_creation)
+        seuil: int = comptes.SEUIL_COPY
+        try:
+            comptes.SEUIL_COPY = nb + 1
+            self._mesurer("bulk_create sans relecture", nb, options['exercices'],
+                          comptes.creer_comptes_participants)
+        finally:
+            comptes.SEUIL_COPY = seuil
+        if comptes.copy_disponible():
+            self._mesurer("COPY                      ", nb, options['exercices'],
+                          comptes.creer_comptes_participants)
+
+    def _mesurer(self, nom: str, nb: int, nb_exercices: int,
+                 creation: Callable[[GroupeParticipant, List[str]], List[User]]) -> None:
+        try:
+            with transaction.atomic():
+                referent = User.objects.create_user(username="bench_comptes_referent")
+                epreuve = Epreuve.objects.create(nom="Bench comptes", code="", date_debut=timezone.now(),
+                                                 date_fin=timezone.now() + timedelta(hours=1), referent=referent)
+                for i in range(nb_exercices):
+                    exercice = Exercice.objects.create(epreuve=epreuve, auteur=referent, titre=f"Exercice {i}",
+                                                       avec_jeu_de_test=True)
+                    JeuDeTest.objects.create(exercice=exercice, instance=str(i), reponse=str(i))
+                groupe = GroupeParticipant.objects.create(nom="Bench comptes", referent=referent)
+
+                debut: float = time.perf_counter()
+                usernames: List[str] = genere_participants_uniques(referent, nb)
+                users: List[User] = creation(groupe, usernames)
+                milieu: float = time.perf_counter()
+                epreuve.inscrire_participants(users)
+                fin: float = time.perf_counter()
+
+                self.stdout.write(self.style.SUCCESS(
+                    f"{nom} : {len(users)} comptes en {milieu - debut:.2f} s, "
+                    f"inscription à l'épreuve en {fin - milieu:.2f} s, total {fin - debut:.2f} s"
+                ))
+                raise _Annulation()
+        except _Annulation:
+            pass
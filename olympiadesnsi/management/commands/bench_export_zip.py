@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import io
+import secrets
+import time
+import tracemalloc
+import zipfile
+from datetime import timedelta
+from typing import Callable, List, Tuple
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from epreuve.models import Epreuve, Exercice, JeuDeTest, UserEpreuve, UserExercice
+from epreuve.services.export_zip import entrees_export
+from epreuve.services.zip_flux import iterer_zip
+
+TAILLE_LOT: int = 5000
+
+
+class _Annulation(Exception):
+    pass
+
+
+def _creer_epreuve_synthetique(nb_participants: int, nb_exercices: int, taille_code: int) -> Epreuve:
+    referent = User.objects.create_user(username="bench_export_referent")
+    epreuve = Epreuve.objects.create(nom="Bench export", code="", date_debut=timezone.now(),
+                                     date_fin=timezone.now() + timedelta(hours=1), referent=referent)
+    exercices: List[Tuple[Exercice, JeuDeTest]] = []
+    for i in range(nb_exercices):
+        exercice = Exercice.objects.create(epreuve=epreuve, auteur=referent, titre=f"Exercice {i}",
+                                           avec_jeu_de_test=True)
+        exercices.append((exercice, JeuDeTest.objects.create(exercice=exercice, instance="x" * 200, reponse="42")))
+
+    participants = User.objects.bulk_create(
+        [User(username=f"bench_export_{i:06d}") for i in range(nb_participants)], batch_size=TAILLE_LOT
+    )
+    UserEpreuve.objects.bulk_create(
+        [UserEpreuve(participant=p, epreuve=epreuve) for p in participants], batch_size=TAILLE_LOT
+    )
+    # Code peu compressible, pour que l'archive ait la taille d'un vrai export
+    UserExercice.objects.bulk_create(
+        [UserExercice(participant=p, exercice=exercice, jeu_de_test=jeu, solution_instance_participant="42",
+                      code_participant=secrets.token_hex(taille_code // 2))
+         for p in participants for exercice, jeu in exercices],
+        batch_size=TAILLE_LOT,
+    )
+    with connection.cursor() as cursor:
+        # Statistiques à jour, sans quoi le planificateur choisit des boucles imbriquées
+        cursor.execute('ANALYZE auth_user, "UserEpreuve", "User_Exercice", "Exercice", "JeuDeTest"')
+    return epreuve
+
+
+class Command(BaseCommand):
+    help = ("Compare la mémoire de l'export ZIP des rendus construit en mémoire et produit en flux, "
+            "sur une épreuve synthétique (créée dans une transaction annulée).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participants', type=int, default=10000)
+        parser.add_argument('--exercices', type=int, default=5)
+        parser.add_argument('--taille-code', type=int, default=1000, help='Taille du code soumis (octets)')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                debut: float = time.perf_counter()
+                epreuve = _creer_epreuve_synthetique(options['participants'], options['exercices'],
+                                                     options['taille_code'])
+                self.stdout.write(f"Épreuve synthétique créée en {time.perf_counter() - debut:.1f} s")
+                for by in ("exercice", "participant"):
+                    self._mesurer(f"{by:11s} en mémoire", lambda: self._en_memoire(epreuve, by))
+                    self._mesurer(f"{by:11s} en flux   ", lambda: self._en_flux(epreuve, by))
+                raise _Annulation()
+        except _Annulation:
+            pass
+
+    @staticmethod
+    def _en_memoire(epreuve: Epreuve, by: str) -> int:
+        # Ancienne implémentation : toute l'archive dans un BytesIO avant l'envoi
+        tampon = io.BytesIO()
+        with zipfile.ZipFile(tampon, "w", zipfile.ZIP_DEFLATED) as archive:
+            for chemin, contenu in entrees_export(epreuve, by):
+                archive.writestr(chemin, contenu)
+        return len(tampon.getvalue())
+
+    @staticmethod
+    def _en_flux(epreuve: Epreuve, by: str) -> int:
+        return sum(len(morceau) for morceau in iterer_zip(entrees_export(epreuve, by)))
+
+    def _mesurer(self, nom: str, export: Callable[[], int]) -> None:
+        # Durée et pic sont mesurés séparément : tracemalloc ralentit fortement l'exécution
+        debut: float = time.perf_counter()
+        taille: int = export()
+        duree: float = time.perf_counter() - debut
+        tracemalloc.start()
+        export()
+        _, pic = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(self.style.SUCCESS(
+            f"{nom} : archive de {taille / 1e6:.1f} Mo en {duree:.1f} s, pic mémoire Python {pic / 1e6:.1f} Mo"
+        ))
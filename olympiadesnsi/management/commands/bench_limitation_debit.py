@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import multiprocessing
+import random
+import tempfile
+import time
+from typing import Any, List, Tuple
+
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management.base import BaseCommand
+
+from olympiadesnsi.cache_backends import CacheCompteursLimitation
+
+# Fenêtres des pages d'accueil : 5/s, 150/m, 5000/h
+PERIODES: Tuple[int, ...] = (1, 60, 3600)
+OBJECTIF_REQUETES_PAR_SECONDE: int = 5000
+# FileBasedCache ne tient pas quelques dizaines de requêtes/s : on limite sa part du banc d'essai
+MAX_REQUETES_FICHIERS: int = 300
+
+
+def _creer_backend(nom: str, dossier: str) -> BaseCache:
+    if nom == "fichiers":
+        return FileBasedCache(dossier, {"TIMEOUT": None, "OPTIONS": {"MAX_ENTRIES": 100000}})
+    return CacheCompteursLimitation(dossier, {"OPTIONS": {"MAX_ENTRIES": 100000}})
+
+
+def _travailleur(nom: str, dossier: str, nb_requetes: int, resultats: Any) -> None:
+    """
+    Simule un worker : chaque « requête » incrémente les trois fenêtres d'une adresse IP,
+    soit en un appel (`incrementer_fenetres`), soit par add/incr par fenêtre (django_ratelimit).
+    """
+    cache: BaseCache = _creer_backend(nom.split("-")[0], dossier)
+    aleatoire = random.Random()
+    debut: float = time.perf_counter()
+    for _ in range(nb_requetes):
+        ip: int = aleatoire.randrange(500)
+        maintenant: float = time.time()
+        cles: List[Tuple[str, float, int]] = [
+            (f"rl:{periode}:{ip}", maintenant + periode, periode) for periode in PERIODES
+        ]
+        if nom == "compteurs-groupe":
+            cache.incrementer_fenetres([(cle, expiration) for cle, expiration, _ in cles])
+        else:
+            for cle, _, periode in cles:
+                if not cache.add(cle, 1, periode):
+                    try:
+                        cache.incr(cle)
+                    except ValueError:
+                        pass
+    resultats.put(time.perf_counter() - debut)
+
+
+class Command(BaseCommand):
+    help = ("Mesure le débit des compteurs de limitation de débit (3 fenêtres par requête) "
+            "sous plusieurs processus concurrents.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processus', type=int, default=4, help='Nombre de workers simulés')
+        parser.add_argument('--requetes', type=int, default=5000, help='Requêtes simulées par worker')
+
+    def handle(self, *args, **options):
+        nb_processus: int = options['processus']
+        nb_requetes: int
+        contexte = multiprocessing.get_context("fork")
+
+        for nom in ("fichiers", "compteurs-fenetre", "compteurs-groupe"):
+            nb_requetes = options['requetes']
+            if nom == "fichiers":
+                nb_requetes = min(nb_requetes, MAX_REQUETES_FICHIERS)
+            with tempfile.TemporaryDirectory() as dossier:
+                resultats = contexte.Queue()
+                processus: List[Any] = [
+                    contexte.Process(target=_travailleur, args=(nom, dossier, nb_requetes, resultats))
+                    for _ in range(nb_processus)
+                ]
+                debut: float = time.perf_counter()
+                for p in processus:
+                    p.start()
+                durees: List[float] = [resultats.get() for _ in processus]
+                for p in processus:
+                    p.join()
+                total: float = time.perf_counter() - debut
+
+            debit: float = nb_processus * nb_requetes / total
+            message: str = (
+                f"{nom:18s} : {debit:8.0f} requêtes/s au total, "
+                f"{1000 * max(durees) / nb_requetes:.3f} ms/requête (worker le plus lent)"
+            )
+            if debit >= OBJECTIF_REQUETES_PAR_SECONDE:
+                self.stdout.write(self.style.SUCCESS(message))
+            else:
+                self.stdout.write(message)
+        self.stdout.write(f"Objectif : {OBJECTIF_REQUETES_PAR_SECONDE} requêtes/s")
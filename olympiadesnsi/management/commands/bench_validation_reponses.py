@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+from django.core.management.base import BaseCommand
+
+from epreuve.utils import (
+    empreinte_reponse,
+    est_valide_reponse_empreinte,
+    est_valide_reponse_jeu_de_test,
+    forme_canonique_reponse,
+)
+
+
+def _mesurer(verification: Callable[[], bool], repetitions: int) -> float:
+    """Renvoie la durée moyenne d'une vérification, en millisecondes."""
+    debut: float = time.perf_counter()
+    for _ in range(repetitions):
+        verification()
+    return (time.perf_counter() - debut) * 1000 / repetitions
+
+
+class Command(BaseCommand):
+    help = ("Mesure le coût d'une vérification de réponse : comparaison ligne à ligne "
+            "des deux réponses contre comparaison à l'empreinte précalculée.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lignes', type=int, default=10000, help='Nombre de lignes de la réponse')
+        parser.add_argument('--repetitions', type=int, default=50, help='Nombre de vérifications mesurées')
+
+    def handle(self, *args, **options):
+        nb_lignes: int = options['lignes']
+        repetitions: int = options['repetitions']
+
+        attendue: str = "\n".join(f"{i} {i * i} résultat_é" for i in range(nb_lignes))
+        soumise: str = attendue.replace("\n", "\r\n") + "\n"
+        empreinte: str = empreinte_reponse(forme_canonique_reponse(attendue))
+
+        avant: float = _mesurer(lambda: est_valide_reponse_jeu_de_test(attendue, soumise), repetitions)
+        apres: float = _mesurer(lambda: est_valide_reponse_empreinte(soumise, empreinte), repetitions)
+
+        self.stdout.write(f"Réponse de {nb_lignes} lignes, {repetitions} vérifications")
+        self.stdout.write(f"  normalisation des deux côtés : {avant:.2f} ms/vérification")
+        self.stdout.write(f"  empreinte précalculée        : {apres:.2f} ms/vérification")
+        self.stdout.write(self.style.SUCCESS(f"Gain : x{avant / apres:.1f}"))
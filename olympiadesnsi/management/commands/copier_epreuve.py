@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from epreuve.models import Epreuve
+from epreuve.services.copie_epreuve import MAX_JEUX_COPIES, ResultatCopie, dupliquer_epreuve
+
+
+class Command(BaseCommand):
+    help = ("Copie une épreuve avec ses exercices et ses jeux de test "
+            "(les 5 premiers par exercice, ou tous avec --tous-les-jeux).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('epreuve_id', type=int, help="ID de l'épreuve à copier")
+        parser.add_argument('--membre', required=True,
+                            help="Nom d'utilisateur de l'organisateur ajouté au comité de la copie")
+        jeux = parser.add_mutually_exclusive_group()
+        jeux.add_argument('--jeux', type=int, default=MAX_JEUX_COPIES,
+                          help=f"Nombre de jeux de test copiés par exercice (défaut : {MAX_JEUX_COPIES})")
+        jeux.add_argument('--tous-les-jeux', action='store_true', help="Copie tous les jeux de test")
+
+    def handle(self, *args, **options):
+        try:
+            source: Epreuve = Epreuve.objects.get(id=options['epreuve_id'])
+            membre: User = User.objects.get(username=options['membre'])
+        except (Epreuve.DoesNotExist, User.DoesNotExist) as erreur:
+            raise CommandError(str(erreur))
+
+        resultat: ResultatCopie = dupliquer_epreuve(source, membre,
+                                                    None if options['tous_les_jeux'] else options['jeux'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Épreuve « {resultat.epreuve.nom} » (id {resultat.epreuve.id}) créée : "
+            f"{resultat.nb_exercices} exercices, {resultat.nb_jeux_de_test} jeux de test"
+        ))
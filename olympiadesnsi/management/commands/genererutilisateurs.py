@@ -39,7 +39,6 @@ class Command(BaseCommand):
             utilisateurs.append(user)
 
         epreuve.inscrire_participants(utilisateurs)
-        epreuve.assigner_jeux_tests_exercices()
 
         with open(chemin_csv, "w", newline='') as f:
             writer = csv.writer(f)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from epreuve.services.import_epreuve import EpreuveJsonInvalide, ResultatImport, importer_epreuve
+
+
+class Command(BaseCommand):
+    help = ("Importe une épreuve depuis un fichier JSON d'export (mêmes règles que l'import "
+            "depuis l'espace organisateur), sans limite de taille.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Chemin du fichier JSON")
+        parser.add_argument('--referent', required=True,
+                            help="Nom d'utilisateur de l'organisateur référent de l'épreuve importée")
+
+    def _afficher_progression(self, nb_crees: int, total: int) -> None:
+        self.stdout.write(f"{nb_crees}/{total} objets créés")
+
+    def handle(self, *args, **options):
+        try:
+            referent: User = User.objects.get(username=options['referent'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur inconnu : {options['referent']}")
+
+        try:
+            with open(options['fichier'], 'rb') as fichier:
+                resultat: ResultatImport = importer_epreuve(fichier, referent,
+                                                            progression=self._afficher_progression)
+        except OSError as erreur:
+            raise CommandError(f"Lecture impossible : {erreur}")
+        except (json.JSONDecodeError, UnicodeDecodeError) as erreur:
+            raise CommandError(f"JSON invalide : {erreur}")
+        except EpreuveJsonInvalide as erreur:
+            raise CommandError(str(erreur))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Épreuve « {resultat.epreuve.nom} » (id {resultat.epreuve.id}) importée : "
+            f"{resultat.nb_exercices} exercices, {resultat.nb_jeux_de_test} jeux de test"
+        ))
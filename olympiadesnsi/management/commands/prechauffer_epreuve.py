@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from epreuve.models import Epreuve
+from epreuve.services.prechauffage import RapportPrechauffage, prechauffer_epreuve
+
+
+class Command(BaseCommand):
+    help = ("Prépare une ou plusieurs épreuves avant leur ouverture : crée les UserEpreuve/UserExercice "
+            "manquants, attribue les jeux de test et remplit les caches. Relançable sans risque. "
+            "Avec --ouverture-dans, traite les épreuves qui ouvrent bientôt (à lancer par cron ; "
+            "le cache du nombre de participants des groupes expire après 5 minutes).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('epreuve_ids', nargs='*', type=int, help="Identifiants des épreuves à préparer")
+        parser.add_argument('--ouverture-dans', type=int, default=None, metavar='MINUTES',
+                            help="Prépare les épreuves qui ouvrent dans les MINUTES prochaines minutes")
+
+    def handle(self, *args, **options):
+        epreuves: List[Epreuve]
+        if options['ouverture_dans'] is not None:
+            maintenant = timezone.now()
+            epreuves = list(Epreuve.objects.filter(
+                date_debut__gte=maintenant,
+                date_debut__lte=maintenant + timedelta(minutes=options['ouverture_dans']),
+            ))
+        elif options['epreuve_ids']:
+            epreuves = list(Epreuve.objects.filter(id__in=options['epreuve_ids']))
+            manquantes = set(options['epreuve_ids']) - {epreuve.id for epreuve in epreuves}
+            if manquantes:
+                raise CommandError(f"Épreuve(s) introuvable(s) : {sorted(manquantes)}")
+        else:
+            raise CommandError("Indiquer des identifiants d'épreuve ou --ouverture-dans")
+
+        if not epreuves:
+            self.stdout.write("Aucune épreuve à préparer")
+
+        for epreuve in epreuves:
+            rapport: RapportPrechauffage = prechauffer_epreuve(epreuve)
+            self.stdout.write(self.style.SUCCESS(
+                f"Épreuve {epreuve.id} ({epreuve.nom}) : {rapport.nb_participants} participant(s), "
+                f"{rapport.nb_exercices} exercice(s), {rapport.nb_groupes} groupe(s) ; "
+                f"{rapport.user_epreuves_crees} UserEpreuve et {rapport.user_exercices_crees} UserExercice créés, "
+                f"{rapport.jeux_de_test_attribues} jeu(x) de test attribué(s)"
+            ))
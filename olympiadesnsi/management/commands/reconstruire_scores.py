@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import List
+
+from django.core.management.base import BaseCommand, CommandError
+
+from epreuve.models import Epreuve
+from epreuve.services.scores import reconstruire_scores_epreuve
+
+
+class Command(BaseCommand):
+    help = ("Recalcule les bonnes réponses (UserExercice.reponse_correcte) et les totaux par participant "
+            "(UserEpreuve.nb_bonnes_reponses) d'épreuves existantes. Relançable sans risque.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('epreuve_ids', nargs='*', type=int, help="Identifiants des épreuves à traiter")
+        parser.add_argument('--toutes', action='store_true', help="Traite toutes les épreuves")
+
+    def handle(self, *args, **options):
+        epreuves: List[Epreuve]
+        if options['toutes']:
+            epreuves = list(Epreuve.objects.order_by('id'))
+        elif options['epreuve_ids']:
+            epreuves = list(Epreuve.objects.filter(id__in=options['epreuve_ids']))
+            manquantes = set(options['epreuve_ids']) - {epreuve.id for epreuve in epreuves}
+            if manquantes:
+                raise CommandError(f"Épreuve(s) introuvable(s) : {sorted(manquantes)}")
+        else:
+            raise CommandError("Indiquer des identifiants d'épreuve ou --toutes")
+
+        for epreuve in epreuves:
+            nb_modifies: int = reconstruire_scores_epreuve(epreuve)
+            self.stdout.write(self.style.SUCCESS(
+                f"Épreuve {epreuve.id} ({epreuve.nom}) : {nb_modifies} réponse(s) mise(s) à jour"
+            ))
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from intranet.models import GroupeParticipant
+from intranet.services.groupes import TAILLE_LOT, ResultatSuppressionGroupe, supprimer_groupe
+
+
+class Command(BaseCommand):
+    help = ("Supprime un groupe de participants et les comptes qui n'appartiennent qu'à lui (comme "
+            "depuis l'espace organisateur), par lots : adapté aux très gros groupes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('groupe_id', type=int, help="Identifiant du groupe")
+        parser.add_argument('--taille-lot', type=int, default=TAILLE_LOT,
+                            help="Nombre de comptes supprimés par transaction")
+
+    def _afficher_progression(self, nb_supprimes: int, total: int) -> None:
+        self.stdout.write(f"{nb_supprimes}/{total} comptes supprimés")
+
+    def handle(self, *args, **options):
+        try:
+            groupe: GroupeParticipant = GroupeParticipant.objects.get(id=options['groupe_id'])
+        except GroupeParticipant.DoesNotExist:
+            raise CommandError(f"Groupe inconnu : {options['groupe_id']}")
+        if options['taille_lot'] < 1:
+            raise CommandError("--taille-lot doit être strictement positif")
+
+        resultat: ResultatSuppressionGroupe = supprimer_groupe(groupe.id, progression=self._afficher_progression,
+                                                               taille_lot=options['taille_lot'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Groupe « {groupe.nom} » supprimé : {resultat.nb_membres} membres, "
+            f"{resultat.nb_comptes_supprimes} comptes supprimés"
+        ))
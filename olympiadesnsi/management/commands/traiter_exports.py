@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from epreuve.models import TacheExport
+from epreuve.services.exports import executer_tache, prendre_tache, relancer_taches_interrompues
+
+
+class Command(BaseCommand):
+    help = ("Construit les exports d'épreuve en attente (mode EXPORTS_ASYNCHRONES). "
+            "Sans option, traite la file une fois puis s'arrête.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--boucle', action='store_true',
+                            help="Attend et traite les nouvelles demandes jusqu'à interruption")
+        parser.add_argument('--intervalle-ms', type=int, default=None,
+                            help="Attente quand la file est vide (défaut : EXPORTS_INTERVALLE_MS)")
+
+    def _vider_file(self) -> int:
+        nb: int = 0
+        tache: Optional[TacheExport] = prendre_tache()
+        while tache is not None:
+            executer_tache(tache)
+            if tache.est_terminee():
+                self.stdout.write(self.style.SUCCESS(
+                    f"Export {tache.id} ({tache.get_type_export_display()}, épreuve {tache.epreuve_id}) : "
+                    f"{tache.taille / 1e6:.1f} Mo"
+                ))
+            else:
+                self.stderr.write(f"Export {tache.id} en échec : {tache.erreur}")
+            nb += 1
+            tache = prendre_tache()
+        return nb
+
+    def handle(self, *args, **options):
+        intervalle_ms: int = options['intervalle_ms'] or settings.EXPORTS_INTERVALLE_MS
+
+        # Reprise : les tâches abandonnées par un worker arrêté brutalement repartent en file.
+        nb_relancees: int = relancer_taches_interrompues()
+        if nb_relancees:
+            self.stdout.write(f"{nb_relancees} tâche(s) interrompue(s) remise(s) en file")
+
+        self._vider_file()
+        if options['boucle']:
+            try:
+                while True:
+                    time.sleep(intervalle_ms / 1000)
+                    self._vider_file()
+            except KeyboardInterrupt:
+                pass
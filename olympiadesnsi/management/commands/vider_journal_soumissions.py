@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from epreuve.models import Epreuve
+from epreuve.services.journal_soumissions import JournalSoumissions, get_journal
+
+
+class Command(BaseCommand):
+    help = ("Applique en base les soumissions du journal local (mode write-behind). "
+            "Sans option, vide le journal une fois : c'est la reprise à lancer au démarrage.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--boucle', action='store_true',
+                            help="Vide le journal en continu jusqu'à interruption")
+        parser.add_argument('--intervalle-ms', type=int, default=None,
+                            help="Intervalle entre deux vidages (défaut : SOUMISSIONS_JOURNAL_INTERVALLE_MS)")
+        parser.add_argument('--jusqu-a-fin-epreuve', type=int, default=None, metavar='EPREUVE_ID',
+                            help="Vide en continu jusqu'à la fin de l'épreuve, puis une dernière fois")
+
+    def _rapport(self, nb: int) -> None:
+        self.stdout.write(self.style.SUCCESS(f"{nb} soumission(s) appliquée(s) en base"))
+
+    def handle(self, *args, **options):
+        journal: JournalSoumissions = get_journal()
+        intervalle_ms: int = options['intervalle_ms'] or settings.SOUMISSIONS_JOURNAL_INTERVALLE_MS
+
+        # Reprise : ce qui est resté dans le journal (arrêt brutal) est appliqué avant tout.
+        self._rapport(journal.vider())
+
+        epreuve_id: Optional[int] = options['jusqu_a_fin_epreuve']
+        if epreuve_id is not None:
+            try:
+                epreuve: Epreuve = Epreuve.objects.get(id=epreuve_id)
+            except Epreuve.DoesNotExist:
+                raise CommandError(f"Épreuve {epreuve_id} introuvable")
+            journal.boucle(intervalle_ms, lambda: timezone.now() <= epreuve.date_fin, self._rapport)
+            self._rapport(journal.vider())
+        elif options['boucle']:
+            try:
+                journal.boucle(intervalle_ms, lambda: True, self._rapport)
+            except KeyboardInterrupt:
+                self._rapport(journal.vider())
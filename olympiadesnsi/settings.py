@@ -77,6 +77,24 @@ def _parser_date_limite_inscription():
 
 OLYMPIADES_DATE_LIMITE_INSCRIPTION = _parser_date_limite_inscription()
 
+# Soumissions : écriture différée via un journal local (voir epreuve/services/journal_soumissions.py)
+SOUMISSIONS_WRITE_BEHIND = config("SOUMISSIONS_WRITE_BEHIND", default=False, cast=bool)
+SOUMISSIONS_JOURNAL_CHEMIN = config(
+    "SOUMISSIONS_JOURNAL_CHEMIN",
+    default=os.path.join(BASE_DIR, "journal_soumissions", "journal.sqlite3"),
+)
+SOUMISSIONS_JOURNAL_INTERVALLE_MS = config("SOUMISSIONS_JOURNAL_INTERVALLE_MS", default=500, cast=int)
+
+# Exports : archives conservées sur disque et réutilisées tant que les données ne changent pas
+# (voir epreuve/services/exports.py). Avec EXPORTS_ASYNCHRONES, elles sont construites par la
+# commande traiter_exports ; sinon, dans la requête, qui les transmet au client pendant leur construction.
+EXPORTS_ASYNCHRONES = config("EXPORTS_ASYNCHRONES", default=False, cast=bool)
+EXPORTS_CHEMIN = config("EXPORTS_CHEMIN", default=os.path.join(BASE_DIR, "exports"))
+EXPORTS_TAILLE_MAX_MO = config("EXPORTS_TAILLE_MAX_MO", default=2048, cast=int)
+EXPORTS_INTERVALLE_MS = config("EXPORTS_INTERVALLE_MS", default=1000, cast=int)
+# Processus de compression par archive (1 : compression dans le processus qui construit l'export)
+EXPORTS_PROCESSUS_COMPRESSION = config("EXPORTS_PROCESSUS_COMPRESSION", default=1, cast=int)
+
 RATELIMIT_USE_X_FORWARDED_FOR = config(
     'RATELIMIT_USE_X_FORWARDED_FOR',
     default=not DEBUG,  # True en prod, False en local
@@ -121,7 +139,8 @@ MIDDLEWARE = [
 # Dans settings.py
 RATELIMIT_VIEW = 'olympiadesnsi.views.ratelimited_error'
 
-RATELIMIT_USE_CACHE = 'default'
+# Compteurs de limitation de débit : cache dédié (voir CACHES["ratelimit"])
+RATELIMIT_USE_CACHE = 'ratelimit'
 RATELIMIT_ENABLE = True
 
 ROOT_URLCONF = "olympiadesnsi.urls"
@@ -179,15 +198,27 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Cache à deux niveaux (mémoire de chaque worker, puis SQLite partagé) : voir olympiadesnsi/cache_backends.py
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "BACKEND": "olympiadesnsi.cache_backends.CacheHierarchise",
         "LOCATION": os.path.join(BASE_DIR, "cache_django"),
         "TIMEOUT": None,  # persistant tant qu'on ne l'efface pas manuellement
         "OPTIONS": {
-            "MAX_ENTRIES": 20000
+            "MAX_ENTRIES": 20000,
+            "MAX_ENTREES_LOCALES": config("CACHE_MAX_ENTREES_LOCALES", default=5000, cast=int),
+            # Décalage maximal (secondes) entre workers après une écriture
+            "TTL_LOCAL": config("CACHE_TTL_LOCAL", default=2, cast=float),
         }
-    }
+    },
+    # Compteurs de limitation de débit : base SQLite partagée sans fsync, incréments atomiques
+    "ratelimit": {
+        "BACKEND": "olympiadesnsi.cache_backends.CacheCompteursLimitation",
+        "LOCATION": os.path.join(BASE_DIR, "cache_ratelimit"),
+        "OPTIONS": {
+            "MAX_ENTRIES": 100000,
+        }
+    },
 }
 
 # Internationalization
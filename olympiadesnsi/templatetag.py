@@ -1,13 +1,15 @@
 from django import template
 
+from olympiadesnsi.autorisations import get_contexte_autorisation
+
 register = template.Library()
 
 
 @register.filter(name='is_organisateur')
 def is_organisateur(user):
-    return user.groups.filter(name='Organisateur').exists()
+    return get_contexte_autorisation(user).a_le_role('Organisateur')
 
 
 @register.filter(name='is_participant')
 def is_organisateur(user):
-    return user.groups.filter(name='Participant').exists()
+    return get_contexte_autorisation(user).a_le_role('Participant')
@@ -0,0 +1,74 @@
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import Group, User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from epreuve.models import Epreuve, MembreComite
+from inscription.models import GroupeParticipeAEpreuve
+from intranet.models import GroupeParticipant, ParticipantEstDansGroupe
+from olympiadesnsi.autorisations import get_contexte_autorisation
+
+
+class ContexteAutorisationTests(TestCase):
+    def setUp(self):
+        # Cache jetable, avec le même backend que le déploiement (dont le cache sous BASE_DIR reste intact)
+        self.dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dossier.cleanup)
+        reglages = override_settings(CACHES={
+            'default': {'BACKEND': 'olympiadesnsi.cache_backends.CacheHierarchise', 'LOCATION': self.dossier.name},
+        })
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+        self.referent = User.objects.create_user(username="referent")
+        self.epreuve = Epreuve.objects.create(
+            nom="Epreuve", code="", date_debut=timezone.now(),
+            date_fin=timezone.now() + timedelta(hours=1), referent=self.referent,
+        )
+        self.groupe = GroupeParticipant.objects.create(nom="Groupe", referent=self.referent, statut="VALIDE")
+        self.participant = User.objects.create_user(username="participant")
+        self.participant.groups.add(Group.objects.get_or_create(name="Participant")[0])
+        ParticipantEstDansGroupe.objects.create(utilisateur=self.participant, groupe=self.groupe)
+
+    def _contexte(self, user: User):
+        # Nouvel objet User : simule une nouvelle requête (pas de contexte mémorisé sur l'objet)
+        return get_contexte_autorisation(User.objects.get(pk=user.pk))
+
+    def test_contexte_mis_en_cache(self):
+        self._contexte(self.participant)
+        user = User.objects.get(pk=self.participant.pk)
+
+        with self.assertNumQueries(0):
+            contexte = get_contexte_autorisation(user)
+
+        self.assertTrue(contexte.a_le_role("Participant"))
+        self.assertFalse(contexte.est_inscrit_a(self.epreuve.id))
+
+    def test_invalide_apres_inscription_du_groupe(self):
+        self.assertFalse(self._contexte(self.participant).est_inscrit_a(self.epreuve.id))
+
+        lien = GroupeParticipeAEpreuve.objects.create(groupe=self.groupe, epreuve=self.epreuve)
+        self.assertTrue(self._contexte(self.participant).est_inscrit_a(self.epreuve.id))
+
+        lien.delete()
+        self.assertFalse(self._contexte(self.participant).est_inscrit_a(self.epreuve.id))
+
+    def test_invalide_apres_retrait_du_groupe(self):
+        GroupeParticipeAEpreuve.objects.create(groupe=self.groupe, epreuve=self.epreuve)
+        self.assertTrue(self._contexte(self.participant).est_inscrit_a(self.epreuve.id))
+
+        ParticipantEstDansGroupe.objects.filter(utilisateur=self.participant).delete()
+
+        self.assertFalse(self._contexte(self.participant).est_inscrit_a(self.epreuve.id))
+
+    def test_invalide_apres_modification_du_comite_et_des_roles(self):
+        self.assertFalse(self._contexte(self.referent).est_membre_comite(self.epreuve.id))
+
+        MembreComite.objects.create(epreuve=self.epreuve, membre=self.referent)
+        Group.objects.get_or_create(name="Organisateur")[0].user_set.add(self.referent)
+
+        contexte = self._contexte(self.referent)
+        self.assertTrue(contexte.est_membre_comite(self.epreuve.id))
+        self.assertTrue(contexte.a_le_role("Organisateur"))
@@ -0,0 +1,91 @@
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from olympiadesnsi.cache_backends import CacheHierarchise
+
+
+class CacheHierarchiseTests(SimpleTestCase):
+    def setUp(self):
+        self.dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dossier.cleanup)
+        self.cache = self._creer_cache()
+
+    def _creer_cache(self) -> CacheHierarchise:
+        return CacheHierarchise(self.dossier.name, {
+            "TIMEOUT": None,
+            "OPTIONS": {
+                "MAX_ENTRIES": 100,
+                "TTL_LOCAL": 60,
+                "FAMILLES": {
+                    "rl:": {"local": False, "durable": False},
+                    "worker_": {"partage": False},
+                },
+            },
+        })
+
+    def _simuler_autre_worker(self) -> None:
+        # Un autre processus a son propre niveau local, vide
+        self.cache._niveau_local.clear()
+
+    def test_get_set_delete(self):
+        self.cache.set("cle", {"a": [1, 2]})
+        self.assertEqual(self.cache.get("cle"), {"a": [1, 2]})
+
+        self._simuler_autre_worker()
+        self.assertEqual(self.cache.get("cle"), {"a": [1, 2]})
+
+        self.assertTrue(self.cache.delete("cle"))
+        self.assertIsNone(self.cache.get("cle"))
+
+    def test_expiration(self):
+        self.cache.set("cle", 1, timeout=0.05)
+        time.sleep(0.1)
+
+        self.assertIsNone(self.cache.get("cle"))
+        self.assertTrue(self.cache.add("cle", 2))
+
+    def test_add_et_incr_partages(self):
+        self.assertTrue(self.cache.add("rl:x", 0, timeout=60))
+        self.assertFalse(self.cache.add("rl:x", 0, timeout=60))
+
+        self.assertEqual(self.cache.incr("rl:x"), 1)
+        self._simuler_autre_worker()
+        self.assertEqual(self.cache.incr("rl:x", 5), 6)
+        self.assertEqual(self.cache.get("rl:x"), 6)
+
+        with self.assertRaises(ValueError):
+            self.cache.incr("rl:absente")
+
+    def test_incr_invalide_la_copie_locale(self):
+        self.cache.set("version", 1)
+        self.cache.incr("version")
+
+        self.assertEqual(self.cache.get("version"), 2)
+
+    def test_famille_locale_non_partagee(self):
+        self.cache.set("worker_cle", "valeur")
+        self.assertEqual(self.cache.get("worker_cle"), "valeur")
+
+        self._simuler_autre_worker()
+        self.assertIsNone(self.cache.get("worker_cle"))
+
+    def test_statistiques(self):
+        self.cache.set("cle", 1)
+        self.cache.get("cle")
+        self._simuler_autre_worker()
+        self.cache.get("cle")
+        self.cache.get("absente")
+
+        stats = self.cache.statistiques()
+        self.assertGreaterEqual(stats["local_succes"], 1)
+        self.assertGreaterEqual(stats["partage_succes"], 1)
+        self.assertGreaterEqual(stats["partage_echecs"], 1)
+
+    def test_purge_au_dela_de_max_entries(self):
+        for i in range(600):
+            self.cache.set(f"cle_{i}", i)
+
+        nb = self.cache._partage._connexion().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        self.assertLessEqual(nb, 600 - 500 + 100)
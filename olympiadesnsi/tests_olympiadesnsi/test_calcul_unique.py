@@ -0,0 +1,62 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from olympiadesnsi.calcul_unique import (
+    duree_avec_jitter,
+    get_cache_key_perime,
+    get_cache_key_verrou,
+    obtenir_ou_calculer,
+)
+
+
+class ObtenirOuCalculerTests(SimpleTestCase):
+    cle = "test_calcul_unique"
+
+    def setUp(self):
+        cache.delete_many([self.cle, get_cache_key_perime(self.cle), get_cache_key_verrou(self.cle)])
+        self.nb_calculs = 0
+        self.verrou_compteur = threading.Lock()
+
+    def _agregat(self) -> int:
+        with self.verrou_compteur:
+            self.nb_calculs += 1
+        time.sleep(0.2)  # agrégat lent
+        return 42
+
+    def test_un_seul_calcul_pour_50_absences_simultanees(self):
+        depart = threading.Barrier(50)
+
+        def requete(_):
+            depart.wait()
+            return obtenir_ou_calculer(self.cle, self._agregat, timeout=300)
+
+        with ThreadPoolExecutor(max_workers=50) as executeur:
+            resultats = list(executeur.map(requete, range(50)))
+
+        self.assertEqual(self.nb_calculs, 1)
+        self.assertEqual(resultats, [42] * 50)
+        self.assertEqual(cache.get(self.cle), 42)
+
+    def test_valeur_perimee_pendant_le_recalcul(self):
+        obtenir_ou_calculer(self.cle, lambda: 1, timeout=None)
+        cache.delete(self.cle)  # invalidation, comme dans epreuve.signals
+        cache.add(get_cache_key_verrou(self.cle), 1)  # un autre worker recalcule
+
+        self.assertEqual(obtenir_ou_calculer(self.cle, self._agregat, timeout=None), 1)
+        self.assertEqual(self.nb_calculs, 0)
+
+    def test_recalcul_apres_invalidation(self):
+        obtenir_ou_calculer(self.cle, lambda: 1, timeout=None)
+        cache.delete(self.cle)
+
+        self.assertEqual(obtenir_ou_calculer(self.cle, self._agregat, timeout=None), 42)
+        self.assertIsNone(cache.get(get_cache_key_verrou(self.cle)))
+
+    def test_duree_avec_jitter(self):
+        self.assertIsNone(duree_avec_jitter(None))
+        for _ in range(100):
+            self.assertTrue(270 <= duree_avec_jitter(300) <= 300)
@@ -0,0 +1,96 @@
+import tempfile
+import time
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from django_ratelimit.exceptions import Ratelimited
+
+from olympiadesnsi.cache_backends import CacheCompteursLimitation
+from olympiadesnsi.limitation_debit import limiter_debit
+
+
+@limiter_debit(key='ip', rates=['2/m', '3/h'], method='GET')
+def vue_limitee(request):
+    return HttpResponse("ok")
+
+
+@limiter_debit(key='ip', rates=['1/m'], block=False)
+def vue_non_bloquante(request):
+    return HttpResponse(str(request.limited))
+
+
+class CacheCompteursLimitationTests(SimpleTestCase):
+    def setUp(self):
+        self.dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dossier.cleanup)
+        self.cache = CacheCompteursLimitation(self.dossier.name, {"OPTIONS": {"MAX_ENTRIES": 100}})
+
+    def test_incrementer_fenetres(self):
+        expiration = time.time() + 60
+        self.assertEqual(self.cache.incrementer_fenetres([("a", expiration), ("b", expiration)]), [1, 1])
+        self.assertEqual(self.cache.incrementer_fenetres([("a", expiration), ("b", expiration)]), [2, 2])
+        self.assertEqual(self.cache.incrementer_fenetres([("a", expiration)]), [3])
+        self.assertEqual(self.cache.get("a"), 3)
+
+    def test_fenetre_expiree_repart_a_un(self):
+        self.cache.incrementer_fenetres([("a", time.time() - 1)])
+        self.assertEqual(self.cache.incrementer_fenetres([("a", time.time() + 60)]), [1])
+
+    def test_add_incr_comme_django_ratelimit(self):
+        self.assertTrue(self.cache.add("a", 1, 60))
+        self.assertFalse(self.cache.add("a", 1, 60))
+        self.assertEqual(self.cache.incr("a"), 2)
+        with self.assertRaises(ValueError):
+            self.cache.incr("absente")
+
+
+class LimiterDebitTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        # Caches jetables : les fichiers de cache sous BASE_DIR sont ceux du déploiement
+        self.dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dossier.cleanup)
+        reglages = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'limitation'},
+            'ratelimit': {'BACKEND': 'olympiadesnsi.cache_backends.CacheCompteursLimitation',
+                          'LOCATION': self.dossier.name},
+        })
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        caches['default'].clear()
+
+    def test_bloque_au_depassement_de_la_plus_petite_fenetre(self):
+        for _ in range(2):
+            self.assertEqual(vue_limitee(self.factory.get('/')).status_code, 200)
+        with self.assertRaises(Ratelimited):
+            vue_limitee(self.factory.get('/'))
+
+    def test_methode_non_concernee(self):
+        for _ in range(5):
+            self.assertEqual(vue_limitee(self.factory.post('/')).status_code, 200)
+
+    def test_non_bloquant(self):
+        self.assertEqual(vue_non_bloquante(self.factory.get('/')).content, b"False")
+        self.assertEqual(vue_non_bloquante(self.factory.get('/')).content, b"True")
+
+    @override_settings(RATELIMIT_ENABLE=False)
+    def test_desactive(self):
+        for _ in range(5):
+            self.assertEqual(vue_limitee(self.factory.get('/')).status_code, 200)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'limitation'},
+    }, RATELIMIT_USE_CACHE='default')
+    def test_repli_sur_add_incr(self):
+        for _ in range(2):
+            self.assertEqual(vue_limitee(self.factory.get('/')).status_code, 200)
+        with self.assertRaises(Ratelimited):
+            vue_limitee(self.factory.get('/'))
+
+    def test_page_429(self):
+        url = reverse('home')
+        for _ in range(5):
+            self.client.get(url)
+        self.assertEqual(self.client.get(url).status_code, 429)
@@ -1,71 +1,102 @@
 $(document).ready(function () {
-    // Vérifie si originalData a bien été injecté depuis le template
-    if (typeof originalData === 'undefined') {
-        console.error("Données manquantes : la variable 'originalData' n'est pas définie.");
+    // Rendu détaillé : chargé page par page depuis le serveur (pagination par curseur)
+    const $tableau = $('.data-table');
+    const urlResultats = $tableau.data('url-resultats');
+    if (!urlResultats) {
         return;
     }
+    const texte = $.fn.dataTable.render.text();
+    let curseurSuivant = null;
+    let requeteEnCours = null;
 
-    // Fonction pour initialiser DataTables
-    function initDataTable() {
-        return $('.data-table').DataTable({
-            scrollX: true,
-            data: transformDataForDataTable(originalData),
-            columns: [
-                {data: 'username', width: '150px'},
-                {data: 'exerciceId', width: '100px'},
-                {data: 'exerciceTitre', width: '150px'},
-                {data: 'solution', width: '100px'},
-                {data: 'expected', width: '100px'}
-            ],
-            columnDefs: [
-                {targets: "_all", className: "dt-head-center"}
-            ],
-            language: {
-                "lengthMenu": "Afficher _MENU_ éléments par page",
-                "zeroRecords": "Aucun élément trouvé",
-                "info": "Affichage de la page _PAGE_ sur _PAGES_",
-                "infoEmpty": "Aucun enregistrement disponible",
-                "infoFiltered": "(filtré de _MAX_ enregistrements au total)",
-                "search": "Recherche:",
-                "paginate": {
-                    "first": "Premier",
-                    "last": "Dernier",
-                    "next": "Suivant",
-                    "previous": "Précédent"
-                }
+    function cellule(largeur) {
+        return {
+            display: function (data) {
+                return `<div class="scrollable-cell" style="width:${largeur}px;">${texte.display(data)}</div>`;
             }
-        });
-    }
-
-    function transformDataForDataTable(data) {
-        return data.map(item => ({
-            username: `<div class="scrollable-cell" style="width:100px;">${item.username}</div>`,
-            exerciceId: `<div class="scrollable-cell" style="width:100px;">${item.exerciceId}</div>`,
-            exerciceTitre: `<div class="scrollable-cell" style="width:100px;">${item.exerciceTitre}</div>`,
-            solution: `<div class="scrollable-cell" style="width:200px;">${item.solution}</div>`,
-            expected: `<div class="scrollable-cell" style="width:200px;">${item.expected}</div>`
-        }));
+        };
     }
 
-    let table = initDataTable();
+    const table = $tableau.DataTable({
+        scrollX: true,
+        paging: false,
+        ordering: false,
+        data: [],
+        columns: [
+            {data: 'username', width: '150px', render: cellule(100)},
+            {data: 'exerciceId', width: '100px', render: cellule(100)},
+            {data: 'exerciceTitre', width: '150px', render: cellule(100)},
+            {data: 'solution', width: '100px', render: cellule(200)},
+            {data: 'expected', width: '100px', render: cellule(200)},
+            {data: 'correct', width: '50px', render: data => data ? '✔' : '✘'},
+            {
+                data: null, width: '80px',
+                render: () => '<button class="btn btn-sm btn-outline-secondary detail-resultat">Détail</button>'
+            }
+        ],
+        columnDefs: [
+            {targets: "_all", className: "dt-head-center"}
+        ],
+        language: {
+            "zeroRecords": "Aucun élément trouvé",
+            "info": "_TOTAL_ élément(s) chargé(s)",
+            "infoEmpty": "Aucun enregistrement disponible",
+            "infoFiltered": "(filtré de _MAX_ enregistrements chargés)",
+            "search": "Recherche:"
+        }
+    });
 
-    function filterData() {
-        const exerciceId = $('#exercice-select').val();
-        const participantId = $('#participant-select').val();
+    function parametres() {
+        return {
+            exercice: $('#exercice-select').val(),
+            groupe: $('#groupe-select').val(),
+            participant: $('#participant-select').val(),
+            correct: $('#correct-select').val(),
+            tri: $('#tri-select').val()
+        };
+    }
 
-        const filteredData = originalData.filter(item => {
-            const matchesExercice = exerciceId === "all" || item.exerciceId.toString() === exerciceId;
-            const matchesParticipant = participantId === "all" || item.participantId.toString() === participantId;
-            return matchesExercice && matchesParticipant;
+    function chargerPage(reinitialiser) {
+        if (requeteEnCours) {
+            requeteEnCours.abort();
+        }
+        const donnees = parametres();
+        if (!reinitialiser && curseurSuivant) {
+            donnees.apres = curseurSuivant;
+        }
+        requeteEnCours = $.getJSON(urlResultats, donnees).done(function (reponse) {
+            if (reinitialiser) {
+                table.clear();
+            }
+            table.rows.add(reponse.lignes).draw(false);
+            curseurSuivant = reponse.suivant;
+            $('#charger-plus').toggle(curseurSuivant !== null);
+        }).always(function () {
+            requeteEnCours = null;
         });
-
-        table.clear();
-        table.rows.add(transformDataForDataTable(filteredData));
-        table.draw();
     }
 
-    $('#exercice-select, #participant-select').change(filterData);
-    filterData();
+    // Code soumis et jeu de test : chargés à la demande, sous la ligne
+    $tableau.on('click', 'button.detail-resultat', function () {
+        const ligne = table.row($(this).closest('tr'));
+        if (ligne.child.isShown()) {
+            ligne.child.hide();
+            return;
+        }
+        $.getJSON(`${urlResultats}${ligne.data().id}/`).done(function (detail) {
+            const $detail = $('<div>');
+            $('<strong>').text('Jeu de test :').appendTo($detail);
+            $('<pre>').text(detail.test).appendTo($detail);
+            $('<strong>').text('Code :').appendTo($detail);
+            $('<pre>').text(detail.code).appendTo($detail);
+            ligne.child($detail).show();
+        });
+    });
+
+    $('#exercice-select, #groupe-select, #participant-select, #correct-select, #tri-select')
+        .change(() => chargerPage(true));
+    $('#charger-plus').click(() => chargerPage(false));
+    chargerPage(true);
 });
 
 $(document).ready(function () {